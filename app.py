@@ -3,4 +3,9 @@ from flask_app import create_app
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+    from flask_app.extensions import graph
+    from flask_app.src.graph_schema import apply_schema_migrations
+
+    # The development server has no gunicorn on_starting hook
+    apply_schema_migrations(graph)
+    app.run(debug=True, use_reloader=False)
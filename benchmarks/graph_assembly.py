@@ -0,0 +1,193 @@
+"""
+Micro-benchmark for graph row assembly in GraphQueryService.get_graph_for_param.
+
+Compares the previous per-record loop with flask_app.src.graph_assembly on
+synthetic records shaped like the default get-graph-for query.
+
+    python -m benchmarks.graph_assembly --chunks 20000 --concepts 30000
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from flask_app.src.graph_assembly import assemble_graph
+
+COMMUNITY_TYPE = "courseId"
+COMMUNITY_ID = "00000000-0000-4000-8000-000000000000"
+
+
+def default_params() -> List[Tuple[str, str]]:
+    # Same columns as GraphQueryService.get_default_graph_params
+    com_string = f"{COMMUNITY_TYPE}_{COMMUNITY_ID}_community"
+    return [
+        ("ID(n)", "nodeId"), ("LABELS(n)", "nodeLabels"),
+        ("n.position", "position"), ("n.fileName", "fileName"),
+        ("n.id", "conceptId"), ("n.description", "description"),
+        (f"n['{com_string}']", "communityId"),
+        ("rel.type", "relType"),
+        ("ID(r)", "relatedNodeId"), ("LABELS(r)", "relatedNodeLabels"),
+        ("r.position", "relatedNodePosition"), ("r.fileName", "relatedNodeFileName"),
+        ("r.id", "relatedNodeConceptId"), ("r.description", "relatedNodeDescription"),
+        (f"r['{com_string}']", "relatedNodeCommunityId"),
+    ]
+
+
+def synthetic_records(chunks: int, concepts: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    One document, chunks linked to the document, their neighbours and a few
+    concepts each, and concepts related to each other.
+    """
+    rng = random.Random(seed)
+    nodes = {0: {'nodeLabels': ['Document'], 'fileName': 'lecture.pdf', 'position': None, 'conceptId': None, 'description': None}}
+    for i in range(1, chunks + 1):
+        nodes[i] = {'nodeLabels': ['Chunk'], 'fileName': None, 'position': i, 'conceptId': None, 'description': None}
+    for i in range(chunks + 1, chunks + concepts + 1):
+        nodes[i] = {'nodeLabels': ['Concept', '__Entity__'], 'fileName': None, 'position': None,
+                    'conceptId': f"concept {i}", 'description': f"description of concept {i}"}
+    for node in nodes.values():
+        node['communityId'] = rng.randrange(50)
+
+    concept_ids = list(range(chunks + 1, chunks + concepts + 1))
+    edges = {node_id: [] for node_id in nodes}
+    for i in range(1, chunks + 1):
+        edges[i].append(('PART_OF', 0))
+        if i < chunks:
+            edges[i].append(('NEXT_CHUNK', i + 1))
+        for concept in rng.sample(concept_ids, min(3, len(concept_ids))):
+            edges[i].append(('HAS_ENTITY', concept))
+    for concept in concept_ids:
+        edges[concept].append(('RELATED', rng.choice(concept_ids)))
+
+    records = []
+    for node_id, node in nodes.items():
+        row = {'nodeId': node_id, **node}
+        targets = edges[node_id] or [(None, None)]
+        for rel_type, target in targets:
+            related = nodes.get(target)
+            records.append({
+                **row,
+                'relType': rel_type,
+                'relatedNodeId': target,
+                'relatedNodeLabels': related['nodeLabels'] if related else None,
+                'relatedNodePosition': related['position'] if related else None,
+                'relatedNodeFileName': related['fileName'] if related else None,
+                'relatedNodeConceptId': related['conceptId'] if related else None,
+                'relatedNodeDescription': related['description'] if related else None,
+                'relatedNodeCommunityId': related['communityId'] if related else None,
+            })
+    rng.shuffle(records)
+    return records
+
+
+def legacy_assemble(result: List[Dict[str, Any]], return_params: List[Tuple[str, str]]):
+    """The per-record loop get_graph_for_param used before graph_assembly."""
+    nodes = {
+        'documents': {},
+        'chunks': {},
+        'concepts': {}
+    }
+    relationships = []
+
+    for record in result:
+        node_data = {}
+        related_node_data = {}
+        rel_type = None
+
+        for param in return_params:
+            attr_name = param[1]
+            attr_value = record.get(attr_name)
+            
+            if attr_name.startswith("relatedNode"):
+                related_node_data[attr_name.replace("relatedNode", "")] = attr_value
+            elif attr_name == "relType":
+                rel_type = attr_value
+            else:
+                node_data[attr_name] = attr_value
+
+        if 'nodeId' in node_data and 'nodeLabels' in node_data:
+            node_type = next((label for label in ['Document', 'Chunk', 'Concept'] if label in node_data['nodeLabels']), None)
+            if node_type:
+                node_info = nodes[node_type.lower() + 's'].get(node_data['nodeId'], {})
+                node_info['id'] = node_data['nodeId']
+                if node_type == 'Document':
+                    node_info['fileName'] = node_data.get('fileName')
+                elif node_type == 'Chunk':
+                    node_info['position'] = node_data.get('position')
+                elif node_type == 'Concept':
+                    node_info['conceptId'] = node_data.get('conceptId')
+                    node_info['description'] = node_data.get('description')
+                
+                if 'communityId' in node_data and 'communityId' not in node_info:
+                    node_info['communityId'] = node_data['communityId']
+                
+                nodes[node_type.lower() + 's'][node_data['nodeId']] = node_info
+
+        if related_node_data.get('Id') is not None and related_node_data.get('Labels') is not None:
+            related_node_type = next((label for label in ['Document', 'Chunk', 'Concept'] if label in related_node_data['Labels']), None)
+            if related_node_type:
+                related_node_info = nodes[related_node_type.lower() + 's'].get(related_node_data['Id'], {})
+                related_node_info['id'] = related_node_data['Id']
+                if related_node_type == 'Document':
+                    related_node_info['fileName'] = related_node_data.get('FileName')
+                elif related_node_type == 'Chunk':
+                    related_node_info['position'] = related_node_data.get('Position')
+                elif related_node_type == 'Concept':
+                    related_node_info['conceptId'] = related_node_data.get('ConceptId')
+                    related_node_info['description'] = related_node_data.get('Description')
+                
+                if 'relatedNodeCommunityId' in related_node_data and 'communityId' not in related_node_info:
+                    related_node_info['communityId'] = related_node_data['relatedNodeCommunityId']
+                
+                nodes[related_node_type.lower() + 's'][related_node_data['Id']] = related_node_info
+
+        if 'nodeId' in node_data and related_node_data.get('Id') is not None and rel_type is not None:
+            relationships.append({
+                "start_node_id": node_data['nodeId'], 
+                "relationship_type": rel_type, 
+                "end_node_id": related_node_data['Id']
+            })
+
+    for node_type in nodes:
+        nodes[node_type] = list(nodes[node_type].values())
+
+    return nodes, relationships
+
+
+def measure(fn, records, params, repeat: int) -> Tuple[float, Any]:
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn(records, params)
+        best = min(best, time.perf_counter() - start)
+    return len(records) / best, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--concepts', type=int, default=30000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    params = default_params()
+    records = synthetic_records(args.chunks, args.concepts)
+
+    before, legacy_output = measure(legacy_assemble, records, params, args.repeat)
+    after, output = measure(assemble_graph, records, params, args.repeat)
+
+    legacy_nodes, legacy_relationships = legacy_output
+    nodes, relationships = output
+    assert legacy_relationships == relationships, "relationships differ"
+    for node_type in legacy_nodes:
+        assert sorted(legacy_nodes[node_type], key=lambda n: n['id']) == \
+            sorted(nodes[node_type], key=lambda n: n['id']), f"{node_type} differ"
+
+    print(f"{len(records)} rows")
+    print(f"before: {before:,.0f} rows/sec")
+    print(f"after:  {after:,.0f} rows/sec ({after / before:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ import runpod
 
 from .extensions import api, cors, supabase, graph
 from .routes import init_api
+from .src.fake_runpod import FakeRunpodEndpoint
+from .src.job_queue import SqliteJobQueue
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -19,7 +21,57 @@ def create_app():
     app.config['MODEL'] = 'gpt-3.5-turbo-0125'
     app.config['UPDATE_GRAPH_CHUNKS_PROCESSED'] = 10
     app.config['NUMBER_OF_CHUNKS_TO_COMBINE'] = 2
-    app.config["RUNPOD_ENDPOINT"] = runpod.Endpoint(os.getenv("RUNPOD_WHISPER_ENDPOINT_ID"))
+    app.config['PIPELINE_PREPARE_WORKERS'] = 2
+    app.config['PIPELINE_EXTRACT_WORKERS'] = 2
+    app.config['PIPELINE_MAX_IN_FLIGHT'] = 4
+    app.config['EMBEDDING_BATCH_SIZE'] = 100
+    app.config['EMBEDDING_MAX_WORKERS'] = 4
+    app.config['EMBEDDING_CACHE_PATH'] = os.getenv('EMBEDDING_CACHE_PATH', '/tmp/notello/embedding_cache.sqlite3')
+    app.config['EMBEDDING_CACHE_MAX_ENTRIES'] = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 200000))
+    app.config['EXTRACTION_CACHE_PATH'] = os.getenv('EXTRACTION_CACHE_PATH', '/tmp/notello/extraction_cache.sqlite3')
+    app.config['EXTRACTION_CACHE_MAX_ENTRIES'] = int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', 50000))
+    app.config['LLM_REQUESTS_PER_MINUTE'] = int(os.getenv('LLM_REQUESTS_PER_MINUTE', 3500))
+    app.config['LLM_TOKENS_PER_MINUTE'] = int(os.getenv('LLM_TOKENS_PER_MINUTE', 160000))
+    app.config['LLM_MAX_CONCURRENCY'] = 16
+    app.config['LLM_MIN_CONCURRENCY'] = 1
+    app.config['LLM_TARGET_LATENCY_SECONDS'] = 30
+    app.config['LLM_RATE_LIMIT_PATH'] = os.getenv('LLM_RATE_LIMIT_PATH', '/tmp/notello/llm_rate_limit.json')
+    app.config['COMMUNITY_DRIFT_THRESHOLD'] = 0.25
+    app.config['COMMUNITY_RECOMPUTE_WINDOW_SECONDS'] = 120
+    app.config['YOUTUBE_CACHE_PATH'] = os.getenv('YOUTUBE_CACHE_PATH', '/tmp/notello/youtube_cache.sqlite3')
+    app.config['YOUTUBE_CACHE_MAX_ENTRIES'] = int(os.getenv('YOUTUBE_CACHE_MAX_ENTRIES', 5000))
+    app.config['GRAPH_CACHE_PATH'] = os.getenv('GRAPH_CACHE_PATH', '/tmp/notello/graph_cache.sqlite3')
+    app.config['GRAPH_CACHE_MAX_ENTRIES'] = int(os.getenv('GRAPH_CACHE_MAX_ENTRIES', 2000))
+    app.config['TOPIC_GRAPH_VECTOR_CANDIDATES'] = 200
+    app.config['TOPIC_GRAPH_MAX_CHUNKS'] = 8
+    app.config['TOPIC_GRAPH_MAX_COMMUNITIES'] = 3
+    app.config['TOPIC_GRAPH_MAX_CONCEPTS'] = 40
+    app.config['TOPIC_GRAPH_MAX_RELATIONSHIPS'] = 120
+    app.config['QUIZ_BATCH_SIZE'] = 5
+    app.config['NOTE_STATUS_FLUSH_SECONDS'] = 2
+    # Kept outside /tmp so queued jobs survive a reboot
+    app.config['JOB_QUEUE'] = SqliteJobQueue(os.getenv('JOB_QUEUE_PATH', os.path.expanduser('~/.notello/jobs.sqlite3')))
+    app.config['JOB_WORKER_THREADS'] = int(os.getenv('JOB_WORKER_THREADS', 2))
+    app.config['JOB_MAX_ATTEMPTS'] = 3
+    app.config['JOB_LEASE_SECONDS'] = 120
+    app.config['JOB_POLL_INTERVAL'] = 2
+    if os.getenv('RUNPOD_FAKE') == '1':
+        app.config["RUNPOD_ENDPOINT"] = FakeRunpodEndpoint(os.getenv('RUNPOD_FAKE_PATH', '/tmp/notello/fake_runpod.sqlite3'))
+    else:
+        app.config["RUNPOD_ENDPOINT"] = runpod.Endpoint(os.getenv("RUNPOD_WHISPER_ENDPOINT_ID"))
+    app.config['RUNPOD_POLL_INTERVAL_SECONDS'] = 15
+    app.config['RUNPOD_TIMEOUT_SECONDS'] = 3600
+    app.config['RUNPOD_WEBHOOK_BASE_URL'] = os.getenv('RUNPOD_WEBHOOK_BASE_URL')
+    app.config['RUNPOD_WEBHOOK_SECRET'] = os.getenv('RUNPOD_WEBHOOK_SECRET')
+    app.config['AUDIO_STREAM_SEGMENTS'] = os.getenv('AUDIO_STREAM_SEGMENTS', '0') == '1'
+    app.config['AUDIO_STREAM_WINDOW_SECONDS'] = 300
+    app.config['AUDIO_CHUNK_MAX_CHARACTERS'] = 800
+    app.config['AUDIO_SPLIT_ENABLED'] = os.getenv('AUDIO_SPLIT_ENABLED', '1') == '1'
+    app.config['AUDIO_SPLIT_MIN_SECONDS'] = 900
+    app.config['AUDIO_SPLIT_TARGET_SECONDS'] = 300
+    app.config['AUDIO_SPLIT_OVERLAP_SECONDS'] = 5
+    app.config['AUDIO_SPLIT_SEARCH_SECONDS'] = 20
+    app.config['AUDIO_SPLIT_MAX_PARALLEL'] = 4
     
     with app.app_context():
         init_api(api)
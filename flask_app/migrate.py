@@ -0,0 +1,11 @@
+import logging
+
+from .extensions import graph
+from .src.graph_schema import apply_schema_migrations
+
+# Applies pending graph schema migrations: python -m flask_app.migrate
+# gunicorn_config.on_starting runs this once before forking the app workers
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(message)s', level='INFO')
+    apply_schema_migrations(graph)
+    graph._driver.close()
@@ -3,8 +3,12 @@ def init_api(api):
     from .upload import api as upload_ns
     from .quiz import api as quiz_ns
     from .health import api as health_ns
+    from .jobs import api as jobs_ns
+    from .runpod import api as runpod_ns
 
     api.add_namespace(graph_ns)
     api.add_namespace(upload_ns)
     api.add_namespace(quiz_ns)
     api.add_namespace(health_ns)
+    api.add_namespace(jobs_ns)
+    api.add_namespace(runpod_ns)
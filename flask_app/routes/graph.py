@@ -1,22 +1,64 @@
 import logging
 from flask_restx import Namespace, Resource
-from flask import request
+from flask import Response, request, stream_with_context
 
 
 from flask_app.services.GraphQueryService import GraphQueryService
 from flask_app.services.HelperService import HelperService
+from flask_app.services.CommunityService import CommunityService
+from flask_app.services.GraphCacheService import GraphCacheService
+from flask_app.src.shared import graph_format
 
 api = Namespace('graph')
 
+EXPORT_NODE_TYPES = ['Document', 'Chunk', 'Concept']
+EXPORT_DEFAULT_LIMIT = 5000
+EXPORT_MAX_LIMIT = 20000
+
+def graph_response(response, etag: str, compact: bool):
+    headers = {'ETag': f'"{etag}"', 'Vary': 'Accept'}
+
+    if compact:
+        nodes, relationships = response['nodes'], response['relationships']
+        body = graph_format.dumps(graph_format.to_columnar(nodes, relationships))
+        return Response(body, status=200, headers=headers, mimetype=graph_format.COMPACT_GRAPH_MIMETYPE)
+
+    return response, 200, headers
+
 @api.route('/get-graph-for/<string:param>/<string:id>')
 class GetGraphFor(Resource):
     def get(self, param, id):
+        """
+        Send Accept: application/vnd.notello.graph.columnar+json for the
+        compact columnar format, otherwise the graph is returned as plain JSON.
+        """
         try:
             logging.info(f"Get graph for {param}, {id}")
 
             if not HelperService.validate_all_uuid4(id):
                 return {f'message': 'Invalid {param} id'}, 400
+
+            compact = request.accept_mimetypes.best_match(
+                ['application/json', graph_format.COMPACT_GRAPH_MIMETYPE]
+            ) == graph_format.COMPACT_GRAPH_MIMETYPE
+
+            version = GraphCacheService.get_version(param=param, id=id)
+            etag = GraphCacheService.etag(param=param, id=id, version=version, compact=compact)
+
+            if request.if_none_match.contains_weak(etag):
+                return '', 304, {'ETag': f'"{etag}"', 'Vary': 'Accept'}
+
+            cached = GraphCacheService.get_response(param=param, id=id, version=version)
+
+            if cached is not None:
+                return graph_response(cached, etag, compact)
             
+            if param == 'noteId':
+                CommunityService.ensure_note_communities(noteId=id)
+                # A community recompute bumps the note version
+                version = GraphCacheService.get_version(param=param, id=id)
+                etag = GraphCacheService.etag(param=param, id=id, version=version, compact=compact)
+
             nodes, relationships = GraphQueryService.get_graph_for_param(key=param, value=id)
 
             if nodes is None or relationships is None:
@@ -24,11 +66,60 @@ class GetGraphFor(Resource):
 
             logging.info(f"Graph, nodes: {len(nodes)}, relationships: {len(relationships)}")
 
-            return {
+            response = {
                 'nodes': nodes,
                 'relationships': relationships
-                }, 200
+                }
+
+            GraphCacheService.set_response(param=param, id=id, version=version, response=response)
+
+            return graph_response(response, etag, compact)
         except Exception as e:
             message = f" Unable to get notes for {param} {id}, Exception: {e}"
             logging.exception(message)
-            return {'message': message}, 400
\ No newline at end of file
+            return {'message': message}, 400
+
+
+@api.route('/export/<string:param>/<string:id>')
+class ExportGraphFor(Resource):
+    def get(self, param, id):
+        """
+        Streams one page of the graph as NDJSON. Pass the nextCursor of the
+        final line as ?after= to fetch the next page, ?types=Concept,Chunk
+        to restrict node types and ?limit= for the page size.
+        """
+        try:
+            logging.info(f"Export graph for {param}, {id}")
+
+            if not HelperService.validate_all_uuid4(id):
+                return {'message': f'Invalid {param} id'}, 400
+
+            after = request.args.get('after', default=-1, type=int)
+            limit = min(request.args.get('limit', default=EXPORT_DEFAULT_LIMIT, type=int), EXPORT_MAX_LIMIT)
+
+            if limit <= 0:
+                return {'message': 'Invalid limit'}, 400
+
+            types = request.args.get('types')
+            nodeTypes = None
+            if types:
+                nodeTypes = [nodeType.strip().capitalize() for nodeType in types.split(',') if nodeType.strip()]
+                if any(nodeType not in EXPORT_NODE_TYPES for nodeType in nodeTypes):
+                    return {'message': f'Invalid types, expected any of {", ".join(EXPORT_NODE_TYPES)}'}, 400
+
+            # Fail fast on an unknown scope before the stream starts
+            GraphQueryService.get_scope_query(key=param, return_clause="n")
+
+            def generate():
+                for line in GraphQueryService.stream_graph_for_param(
+                    key=param, value=id, after=after, limit=limit, nodeTypes=nodeTypes
+                ):
+                    yield graph_format.dumps(line) + b"\n"
+
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        except Exception as e:
+            message = f" Unable to export graph for {param} {id}, Exception: {e}"
+            logging.exception(message)
+            return {'message': message}, 400
@@ -1,8 +1,19 @@
 from flask_restx import Namespace, Resource
 
+from flask_app.src.shared.embedding_cache import get_embedding_cache
+from flask_app.src.shared.extraction_cache import get_extraction_cache
+
 api = Namespace('health')
 
 @api.route('/ping')
 class Health(Resource):
     def get(self):
-        return {'message': 'pong'}, 200
\ No newline at end of file
+        return {'message': 'pong'}, 200
+
+@api.route('/cache-stats')
+class CacheStats(Resource):
+    def get(self):
+        return {
+            'embeddings': get_embedding_cache().stats(),
+            'extractions': get_extraction_cache().stats()
+            }, 200
\ No newline at end of file
@@ -0,0 +1,17 @@
+import logging
+from flask_restx import Namespace, Resource
+
+from flask_app.services.JobService import JobService
+
+api = Namespace('jobs')
+
+@api.route('/status/<string:jobId>')
+class JobStatus(Resource):
+    def get(self, jobId):
+        job = JobService.get_job(jobId=jobId)
+
+        if job is None:
+            logging.info(f"Job not found: {jobId}")
+            return {'message': 'Job not found'}, 404
+
+        return job, 200
\ No newline at end of file
@@ -5,7 +5,7 @@ from flask_app.services.QuizService import QuizService
 from flask_app.services.HelperService import HelperService
 from flask_app.services.GraphQueryService import GraphQueryService
 from flask_app.services.SupabaseService import SupabaseService
-from flask_app.services.ContextAwareThread import ContextAwareThread
+from flask_app.services.JobService import JobService, JobType
 
 api = Namespace('quiz')
 
@@ -31,7 +31,7 @@ create_quiz_parser.add_argument('numQuestions', location='form',
                         type=int, required=False,
                         help='Number of questions to generate')
 create_quiz_parser.add_argument('topics', location='form', 
-                        type=list, required=False,
+                        type=str, action='append', required=False,
                         help='List of topics to generate quiz for')
 
 @api.expect(create_quiz_parser)
@@ -43,7 +43,7 @@ class GenerateQuizFor(Resource):
         courseId = args.get('courseId', None)
         noteId = args.get('noteId', None)
         specifierParam = args.get('specifierParam', None)
-        topics = args.get('topics', [])
+        topics = args.get('topics') or []
         difficulty = args.get('difficulty', 3)
         numQuestions = args.get('numQuestions', 5)
 
@@ -66,8 +66,8 @@ class GenerateQuizFor(Resource):
         if quizId is None:
             return {'message': 'Quiz creation failed'}, 400
 
-        ContextAwareThread(
-                target=QuizService.generate_quiz,
+        jobId = JobService.enqueue(
+                jobType=JobType.QUIZ,
                 args=(topics, 
                       courseId, 
                       userId, 
@@ -77,9 +77,9 @@ class GenerateQuizFor(Resource):
                       numQuestions,
                       specifierParam
                       )
-        ).start()
+        )
 
-        return {'quizId': quizId}, 201
+        return {'quizId': quizId, 'jobId': jobId}, 201
     
 @api.route('/get-questions-for/<string:quizId>')
 class GetQuestionsFor(Resource):
@@ -0,0 +1,43 @@
+import hmac
+import logging
+from flask_restx import Namespace, Resource
+from flask import current_app, request
+
+from flask_app.services.TranscriptionService import TranscriptionService
+
+api = Namespace('runpod')
+
+@api.route('/webhook/<string:noteId>')
+class RunpodWebhook(Resource):
+    def post(self, noteId):
+        """
+        Called by Runpod when a transcription job ends, with the same body
+        as its /status response.
+        """
+        secret = current_app.config['RUNPOD_WEBHOOK_SECRET']
+        token = request.args.get('token', '')
+
+        if not secret or not hmac.compare_digest(token, secret):
+            return {'message': 'Unauthorized'}, 401
+
+        payload = request.get_json(silent=True) or {}
+
+        state = TranscriptionService.get_state(noteId=noteId)
+
+        if state is None or payload.get('id') != state['runpodJobId']:
+            logging.warning(f"Runpod webhook for unknown job {payload.get('id')} on note {noteId}")
+            return {'message': 'Unknown transcription'}, 404
+
+        if state['streaming'] or state['parts'] is not None:
+            # Streamed and split transcriptions are driven by the poller only
+            return {'status': state['status']}, 202
+
+        try:
+            status = TranscriptionService.advance(noteId=noteId, runpodJobId=state['runpodJobId'], runpodStatus=payload)
+        except Exception as e:
+            message = f" Unable to advance transcription for note {noteId}, Exception: {e}"
+            logging.exception(message)
+            # Runpod retries failed webhooks, the poller covers the rest
+            return {'message': message}, 500
+
+        return {'status': status}, 200
@@ -2,9 +2,8 @@ import logging
 from flask_restx import Namespace, Resource
 from werkzeug.datastructures import FileStorage
 
-from flask_app.services.ContextAwareThread import ContextAwareThread
+from flask_app.services.JobService import JobService, JobType
 from flask_app.services.NoteService import NoteForm, NoteService
-from flask_app.services.GraphCreationService import GraphCreationService
 from flask_app.services.HelperService import HelperService
 
 
@@ -48,14 +47,14 @@ class YoutubeIntake(Resource):
             if not HelperService.validate_all_uuid4(noteId):
                 return {'message': 'Note creation failed'}, 400
 
-            ContextAwareThread(
-                target=GraphCreationService.create_graph_from_youtube,
+            jobId = JobService.enqueue(
+                jobType=JobType.YOUTUBE,
                 args=(youtubeUrl, noteId, courseId, userId)
-            ).start()
+            )
 
             logging.info(f"Source Node created successfully for source type: youtube and source: {youtubeUrl}")
 
-            return {'noteId': noteId}, 200
+            return {'noteId': noteId, 'jobId': jobId}, 200
         except Exception as e:
             message = f" Unable to create source node for source type: youtube, Exception: {e}"
             logging.exception(message)
@@ -98,13 +97,13 @@ class AudioIntake(Resource):
             if not HelperService.validate_all_uuid4(noteId):
                 return {'message': 'Note creation failed'}, 400
 
-            ContextAwareThread(
-                    target=NoteService.audio_file_to_graph,
-                    args=(noteId, courseId, userId, audio_file, keywords)
-            ).start()
+            jobId = JobService.enqueue(
+                    jobType=JobType.AUDIO,
+                    args=(noteId, courseId, userId, audio_file.filename, audio_file.read(), keywords)
+            )
             
             logging.info(f"Source Node created successfully for source type: audio and source: {audio_file}")
-            return {'noteId': noteId}, 201
+            return {'noteId': noteId, 'jobId': jobId}, 201
         except Exception as e:
             message = f" Unable to create source node for source type: audio and source: {audio_file}, Exception: {e}"
             logging.exception(message)
@@ -147,13 +146,13 @@ class TextIntake(Resource):
         if not HelperService.validate_all_uuid4(noteId):
             return {'message': 'Note creation failed'}, 400
 
-        ContextAwareThread(
-                target=GraphCreationService.create_graph_from_raw_text,
+        jobId = JobService.enqueue(
+                jobType=JobType.TEXT,
                 args=(noteId, courseId, userId, rawText, noteName)
-        ).start()
+        )
 
         logging.info(f"Source Node created successfully for source type: text and source: {rawText}")
-        return {'noteId': noteId}, 201
+        return {'noteId': noteId, 'jobId': jobId}, 201
 
 create_text_file_note_parser = api.parser()
 create_text_file_note_parser.add_argument('file', location='files', 
@@ -198,10 +197,10 @@ class TextFileIntake(Resource):
         
         file_content = file.read()
 
-        ContextAwareThread(
-                target=NoteService.pdf_file_to_graph,
+        jobId = JobService.enqueue(
+                jobType=JobType.TEXT_FILE,
                 args=(noteId, courseId, userId, file.filename, file_content, file_type)
-        ).start()
+        )
 
         logging.info(f"Source Node created successfully for source type: pdf and source: {file.filename}")
-        return {'noteId': noteId}, 201
\ No newline at end of file
+        return {'noteId': noteId, 'jobId': jobId}, 201
\ No newline at end of file
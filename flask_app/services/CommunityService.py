@@ -0,0 +1,273 @@
+import logging
+import time
+import uuid
+from typing import Dict, List
+from flask import current_app
+from flask_app.src.graphDB_dataAccess import graphDBdataAccess
+from flask_app.src.shared.constants import MEMBERSHIP_SCOPES
+from .GraphCacheService import GraphCacheService
+
+
+class CommunityService:
+
+    @staticmethod
+    def mark_note_dirty(noteId: str) -> None:
+        """
+        Note communities are recomputed lazily, the next time the note's graph is read.
+        """
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MERGE (s:CommunityState {key: $key})
+        SET s.dirty = true
+        """, {'key': f"noteId_{noteId}"})
+
+        GraphCacheService.bump(noteId=noteId)
+
+    @staticmethod
+    def mark_course_dirty(courseId: str, noteId: str) -> str:
+        """
+        Record that noteId changed the course graph and schedule one course
+        recompute COMMUNITY_RECOMPUTE_WINDOW_SECONDS from now. Further notes
+        added before it runs join the same recompute.
+        """
+        from .JobService import JobService, JobType
+
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MERGE (s:CommunityState {key: $key})
+        WITH s, coalesce(s.pendingNoteIds, []) AS pending
+        SET s.dirty = true,
+            s.pendingNoteIds = CASE WHEN $noteId IN pending THEN pending ELSE pending + $noteId END
+        """, {'key': f"courseId_{courseId}", 'noteId': noteId})
+
+        return JobService.enqueue(
+            jobType=JobType.COMMUNITY,
+            args=(courseId,),
+            delay=float(current_app.config['COMMUNITY_RECOMPUTE_WINDOW_SECONDS']),
+            dedupeKey=f"community:courseId:{courseId}"
+        )
+
+    @staticmethod
+    def recompute_course(courseId: str) -> Dict | None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+        key = f"courseId_{courseId}"
+
+        result = graphAccess.execute_query("""
+        MATCH (s:CommunityState {key: $key})
+        WITH s, coalesce(s.pendingNoteIds, []) AS pending
+        SET s.pendingNoteIds = [], s.dirty = false
+        RETURN pending
+        """, {'key': key})
+
+        pending = result[0]['pending'] if len(result) > 0 else []
+
+        if len(pending) == 0:
+            logging.info(f"No pending community changes for course {courseId}")
+            return None
+
+        try:
+            return CommunityService.update_communities_for_param(
+                id_type='courseId',
+                target_id=courseId,
+                changedNoteIds=pending
+            )
+        except Exception:
+            # Put the notes back so the retried job still sees them
+            graphAccess.execute_query("""
+            MATCH (s:CommunityState {key: $key})
+            SET s.dirty = true,
+                s.pendingNoteIds = coalesce(s.pendingNoteIds, []) + [noteId IN $pending WHERE NOT noteId IN coalesce(s.pendingNoteIds, [])]
+            """, {'key': key, 'pending': pending})
+            raise
+
+    @staticmethod
+    def ensure_note_communities(noteId: str) -> None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        result = graphAccess.execute_query("""
+        MATCH (s:CommunityState {key: $key})
+        WHERE s.dirty = true
+        SET s.dirty = false
+        RETURN s.key AS key
+        """, {'key': f"noteId_{noteId}"})
+
+        if len(result) == 0:
+            return
+
+        try:
+            CommunityService.update_communities_for_param(id_type='noteId', target_id=noteId)
+        except Exception:
+            CommunityService.mark_note_dirty(noteId=noteId)
+            raise
+
+    @staticmethod
+    def update_communities_for_param(id_type: str, target_id: str, changedNoteIds: List[str] = None) -> Dict:
+        """
+        Recompute Louvain communities for a note or course.
+
+        For a course with changedNoteIds, only the nodes of those notes and
+        their direct neighbours in the course are re-clustered, seeded with the
+        stored community ids. A full recompute runs instead when there is no
+        previous full run or the nodes touched since then exceed
+        COMMUNITY_DRIFT_THRESHOLD of the course.
+        """
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        try:
+            start = time.time()
+
+            state = CommunityService.get_community_state(graphAccess, id_type, target_id)
+
+            incremental = (
+                changedNoteIds
+                and id_type == 'courseId'
+                and state is not None
+                and state['touchedSinceFull'] <= float(current_app.config['COMMUNITY_DRIFT_THRESHOLD']) * max(state['nodeCountAtFull'], 1)
+            )
+
+            if incremental:
+                updated_count = CommunityService.update_communities_incremental(graphAccess, target_id, changedNoteIds)
+            else:
+                updated_count = CommunityService.update_communities_full(graphAccess, id_type, target_id)
+
+            elapsed = time.time() - start
+
+            graphAccess.execute_query("""
+            MERGE (s:CommunityState {key: $key})
+            SET s.touchedSinceFull = CASE WHEN $incremental THEN coalesce(s.touchedSinceFull, 0) + $updatedCount ELSE 0 END,
+                s.nodeCountAtFull = CASE WHEN $incremental THEN s.nodeCountAtFull ELSE $updatedCount END,
+                s.lastIncrementalSeconds = CASE WHEN $incremental THEN $elapsed ELSE s.lastIncrementalSeconds END,
+                s.lastFullSeconds = CASE WHEN $incremental THEN s.lastFullSeconds ELSE $elapsed END,
+                s.updatedAt = datetime()
+            """, {
+                'key': f"{id_type}_{target_id}",
+                'incremental': incremental,
+                'updatedCount': updated_count,
+                'elapsed': elapsed
+            })
+
+            GraphCacheService.bump(**{id_type: target_id})
+
+            mode = 'incremental' if incremental else 'full'
+
+            logging.info(f"Communities for {id_type} {target_id} updated ({mode}): {updated_count} nodes in {elapsed:.2f}s")
+
+            return {'mode': mode, 'updatedCount': updated_count, 'seconds': elapsed}
+
+        except ValueError as ve:
+            logging.error(f"Invalid input: {str(ve)}")
+            raise
+        except Exception as e:
+            logging.error(f"An error occurred: {str(e)}")
+            raise
+
+    @staticmethod
+    def get_community_state(graphAccess: graphDBdataAccess, id_type: str, target_id: str) -> Dict | None:
+        result = graphAccess.execute_query("""
+        MATCH (s:CommunityState {key: $key})
+        WHERE s.nodeCountAtFull IS NOT NULL
+        RETURN s.nodeCountAtFull AS nodeCountAtFull, coalesce(s.touchedSinceFull, 0) AS touchedSinceFull
+        """, {'key': f"{id_type}_{target_id}"})
+
+        return result[0] if len(result) > 0 else None
+
+    @staticmethod
+    def drop_temp_graph(graphAccess: graphDBdataAccess, graph_name: str) -> None:
+        try:
+            graphAccess.execute_query(
+                "CALL gds.graph.drop($graphName, false) YIELD graphName RETURN graphName",
+                {'graphName': graph_name}
+            )
+        except Exception as e:
+            logging.error(f"Failed to drop temp graph {graph_name}: {str(e)}")
+
+    @staticmethod
+    def update_communities_full(graphAccess: graphDBdataAccess, id_type: str, target_id: str) -> int:
+        graph_name = f"{target_id}_{uuid.uuid4().hex}_temp_graph"
+
+        label, rel = MEMBERSHIP_SCOPES[id_type]
+
+        # Louvain writes communityIds straight to the nodes by internal id,
+        # nothing but the counts comes back to Python
+        query = f"""
+        MATCH (scope:{label} {{id: $targetId}})<-[:{rel}]-(n:Concept)-[r:RELATED]-(relatedNode:Concept)-[:{rel}]->(scope)
+
+        WITH collect(distinct n) + collect(distinct relatedNode) AS nodes, collect(distinct r) AS rels
+
+        CALL gds.graph.project.cypher(
+        '{graph_name}',
+        'UNWIND $nodes AS n RETURN id(n) AS id',
+        'UNWIND $rels AS r RETURN id(startNode(r)) AS source, id(endNode(r)) AS target',
+        {{parameters: {{nodes: nodes, rels: rels}}}}
+        )
+        YIELD graphName
+
+        CALL gds.louvain.write('{graph_name}', {{writeProperty: $property}})
+        YIELD nodePropertiesWritten, communityCount
+
+        RETURN nodePropertiesWritten, communityCount
+        """
+
+        try:
+            result = graphAccess.execute_query(query, {
+                'targetId': target_id,
+                'property': f"{id_type}_{target_id}_community"
+            })
+        finally:
+            CommunityService.drop_temp_graph(graphAccess, graph_name)
+
+        logging.info(f"Updated nodes: {result}")
+
+        return result[0]['nodePropertiesWritten'] if len(result) > 0 else 0
+
+    @staticmethod
+    def update_communities_incremental(graphAccess: graphDBdataAccess, courseId: str, noteIds: List[str]) -> int:
+        community_property = f"courseId_{courseId}_community"
+        graph_name = f"{courseId}_{uuid.uuid4().hex}_temp_graph"
+
+        # Nodes without a stored community start as singletons with ids above every existing one
+        query = f"""
+        MATCH (course:Course {{id: $courseId}})
+        OPTIONAL MATCH (c:Concept)-[:IN_COURSE]->(course)
+        WHERE c[$property] IS NOT NULL
+        WITH course, coalesce(max(c[$property]), 0) AS maxSeed
+
+        MATCH (note:Note)<-[:IN_NOTE]-(t:Concept)-[:IN_COURSE]->(course)
+        WHERE note.id IN $noteIds AND EXISTS {{ (t)-[:RELATED]-(:Concept) }}
+        WITH course, maxSeed, collect(DISTINCT t) AS touched
+        UNWIND touched AS t
+        OPTIONAL MATCH (t)-[:RELATED]-(neighbour:Concept)-[:IN_COURSE]->(course)
+        WITH maxSeed, touched, collect(DISTINCT neighbour) AS neighbours
+        UNWIND touched + neighbours AS n
+        WITH maxSeed, collect(DISTINCT n) AS nodes
+        UNWIND nodes AS a
+        MATCH (a)-[r:RELATED]->(b)
+        WHERE b IN nodes
+        WITH maxSeed, nodes, collect(DISTINCT r) AS rels
+
+        CALL gds.graph.project.cypher(
+        '{graph_name}',
+        'UNWIND $nodes AS n RETURN id(n) AS id, coalesce(n[$property], $maxSeed + 1 + id(n)) AS seed',
+        'UNWIND $rels AS r RETURN id(startNode(r)) AS source, id(endNode(r)) AS target',
+        {{parameters: {{nodes: nodes, rels: rels, property: $property, maxSeed: maxSeed}}}}
+        )
+        YIELD graphName
+
+        CALL gds.louvain.write('{graph_name}', {{seedProperty: 'seed', writeProperty: $property}})
+        YIELD nodePropertiesWritten, communityCount
+
+        RETURN nodePropertiesWritten, communityCount
+        """
+
+        try:
+            result = graphAccess.execute_query(query, {
+                'courseId': courseId,
+                'noteIds': noteIds,
+                'property': community_property
+            })
+        finally:
+            CommunityService.drop_temp_graph(graphAccess, graph_name)
+
+        return result[0]['nodePropertiesWritten'] if len(result) > 0 else 0
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import zlib
+from typing import Dict, List
+from flask import current_app
+
+from flask_app.src.shared import graph_format
+from flask_app.src.shared.disk_cache import SqliteLRUCache
+from flask_app.src.shared.graph_versions import GraphVersionStore
+
+_version_store: GraphVersionStore | None = None
+_response_cache: SqliteLRUCache | None = None
+
+
+class GraphCacheService:
+    """
+    Versioned cache of /graph/get-graph-for responses and quiz topic
+    subgraphs. Anything that changes
+    a note, course or user graph calls bump(), which makes every cached
+    response and ETag for that scope stale.
+    """
+
+    @staticmethod
+    def version_store() -> GraphVersionStore:
+        global _version_store
+        if _version_store is None:
+            _version_store = GraphVersionStore(current_app.config['GRAPH_CACHE_PATH'])
+        return _version_store
+
+    @staticmethod
+    def response_cache() -> SqliteLRUCache:
+        global _response_cache
+        if _response_cache is None:
+            _response_cache = SqliteLRUCache(
+                path=current_app.config['GRAPH_CACHE_PATH'],
+                max_entries=int(current_app.config['GRAPH_CACHE_MAX_ENTRIES']),
+                table='graph_responses'
+            )
+        return _response_cache
+
+    @staticmethod
+    def get_version(param: str, id: str) -> int:
+        return GraphCacheService.version_store().get(f"{param}:{id}")
+
+    @staticmethod
+    def bump(noteId: str = None, courseId: str = None, userId: str = None) -> None:
+        scopes = []
+        if noteId is not None:
+            scopes.append(f"noteId:{noteId}")
+        if courseId is not None:
+            scopes.append(f"courseId:{courseId}")
+        if userId is not None:
+            scopes.append(f"userId:{userId}")
+
+        if len(scopes) > 0:
+            GraphCacheService.version_store().bump(*scopes)
+            logging.info(f"Bumped graph versions for {scopes}")
+
+    @staticmethod
+    def bump_scopes(scopes: List[Dict]) -> None:
+        """
+        Bumps scopes given as {'param': 'noteId' | 'courseId' | 'userId', 'id': ...},
+        the shape Neo4j writes return for the scopes they touched.
+        """
+        keys = sorted({f"{scope['param']}:{scope['id']}" for scope in scopes if scope['id'] is not None})
+
+        if len(keys) > 0:
+            GraphCacheService.version_store().bump(*keys)
+            logging.info(f"Bumped graph versions for {len(keys)} scopes")
+
+    @staticmethod
+    def etag(param: str, id: str, version: int, compact: bool = False) -> str:
+        suffix = f"-{graph_format.COMPACT_GRAPH_FORMAT}" if compact else ""
+        # The epoch changes whenever the version counters restart from 0
+        epoch = GraphCacheService.version_store().epoch()
+        return f"{param}-{id}-{epoch}-v{version}{suffix}"
+
+    @staticmethod
+    def get_response(param: str, id: str, version: int) -> Dict | None:
+        data = GraphCacheService.response_cache().get(f"{param}:{id}:{version}")
+        return graph_format.loads(zlib.decompress(data)) if data is not None else None
+
+    @staticmethod
+    def set_response(param: str, id: str, version: int, response: Dict) -> None:
+        data = zlib.compress(graph_format.dumps(response))
+        GraphCacheService.response_cache().set(f"{param}:{id}:{version}", data)
+
+    @staticmethod
+    def topic_key(param: str, id: str, version: int, topics: List[str]) -> str:
+        normalized = sorted({" ".join(topic.lower().split()) for topic in topics})
+        digest = hashlib.sha256("\n".join(normalized).encode('utf-8')).hexdigest()
+        return f"topics:{param}:{id}:{version}:{digest}"
+
+    @staticmethod
+    def get_topic_graph(param: str, id: str, version: int, topics: List[str]) -> Dict | None:
+        data = GraphCacheService.response_cache().get(GraphCacheService.topic_key(param, id, version, topics))
+        return graph_format.loads(zlib.decompress(data)) if data is not None else None
+
+    @staticmethod
+    def set_topic_graph(param: str, id: str, version: int, topics: List[str], topicGraph: Dict) -> None:
+        data = zlib.compress(graph_format.dumps(topicGraph))
+        GraphCacheService.response_cache().set(GraphCacheService.topic_key(param, id, version, topics), data)
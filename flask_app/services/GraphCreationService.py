@@ -7,11 +7,13 @@ from flask import current_app
 from .SupabaseService import SupabaseService
 from flask_app.src.graphDB_dataAccess import graphDBdataAccess
 from flask_app.src.entities.source_node import sourceNode
-from flask_app.src.document_sources.youtube import get_documents_from_youtube
+from flask_app.src.document_sources.youtube import get_youtube_video_id, youtube_source_pages, youtube_source_text
 from flask_app.src.main import processing_source
 from flask_app.src.document_sources.text_loader import get_text_chunks_langchain
 from .HelperService import HelperService
 from .SimilarityService import SimilarityService
+from .CommunityService import CommunityService
+from .GraphCacheService import GraphCacheService
 from flask_app.models.Quiz import QuizQuestion
 
 
@@ -32,14 +34,37 @@ class GraphCreationService:
                 word_edit_distance=5
             )
 
-            similar = similarityService.same_youtube_node_exists(course_id=courseId, url=sourceUrl)
+            graphDb_data_Access: graphDBdataAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+            graphDb_data_Access.reset_note_graph(noteId)
+
+            similar = similarityService.same_youtube_node_exists(course_id=courseId, url=sourceUrl, note_id=noteId)
 
             if similar:
                 logging.info(f"File: {sourceUrl} is similar to {similar}")
                 SupabaseService.update_note(noteId=noteId, key='graphStatus', value='already-exists')
                 return
 
-            transcript = HelperService.check_url_source(ytUrl=sourceUrl)
+            videoId = get_youtube_video_id(sourceUrl)
+            processed = similarityService.processed_youtube_node(video_id=videoId, note_id=noteId)
+
+            if processed:
+                logging.info(f"Video {videoId} was already processed as note {processed}, cloning its graph")
+                GraphCreationService.clone_youtube_graph(
+                    sourceNoteId=processed,
+                    sourceUrl=sourceUrl,
+                    videoId=videoId,
+                    noteId=noteId,
+                    courseId=courseId,
+                    userId=userId
+                )
+                SupabaseService.update_note_fields(noteId=noteId, fields={
+                    'sourceUrl': sourceUrl,
+                    'graphStatus': 'complete'
+                })
+                return
+
+            # Fetched once per video, used for the size, title and pages below
+            source = HelperService.check_url_source(ytUrl=sourceUrl)
 
             obj_source_node = sourceNode(
                 file_type='text',
@@ -50,12 +75,11 @@ class GraphCreationService:
                 url=sourceUrl,
                 created_at=datetime.now(),
                 noteId=noteId,
-                file_size=sys.getsizeof(transcript)
+                file_size=sys.getsizeof(youtube_source_text(source))
             )
-            
-            graphDb_data_Access: graphDBdataAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
 
-            fileName, pages = get_documents_from_youtube(obj_source_node.url)
+            fileName = source['metadata']['title']
+            pages = youtube_source_pages(source)
 
             obj_source_node.noteId = noteId
 
@@ -72,16 +96,131 @@ class GraphCreationService:
                 noteId=noteId
                 )
             
-            GraphCreationService.update_communities_for_param(id_type='noteId', target_id=noteId)
-            GraphCreationService.update_communities_for_param(id_type='courseId', target_id=courseId)
+            CommunityService.mark_note_dirty(noteId=noteId)
+            CommunityService.mark_course_dirty(courseId=courseId, noteId=noteId)
 
-            SupabaseService.update_note(noteId=noteId, key='sourceUrl', value=sourceUrl)
-            SupabaseService.update_note(noteId=noteId, key='graphStatus', value='complete')
+            similarityService.register_youtube_node(video_id=videoId, note_id=noteId)
+
+            SupabaseService.update_note_fields(noteId=noteId, fields={
+                'sourceUrl': sourceUrl,
+                'graphStatus': 'complete'
+            })
 
             logging.info(f'File {fileName} has been processed successfully, success_count: {successCount}, failed_count: {failedCount}')
         except Exception as e:
             logging.exception(f'Exception in create_source_node_graph_url_youtube: {e}')
             SupabaseService.update_note(noteId=noteId, key='graphStatus', value='error')
+            # The job queue retries the job until it runs out of attempts
+            raise
+
+    @staticmethod
+    def clone_youtube_graph(
+        sourceNoteId: str,
+        sourceUrl: str,
+        videoId: str,
+        noteId: str,
+        courseId: str,
+        userId: str
+    ) -> int:
+        """
+        Copies the graph of an already processed note of the same video into
+        a new note, without the LLM or embedding API. The Document and its
+        chunks, embeddings and chunk chain included, are copied; Concepts
+        and their RELATED edges are shared, so they only gain membership of
+        the new scopes.
+        The copy and the note's entry in the video registry are one
+        statement, so a complete clone is always registered.
+        Returns the number of chunks copied.
+        """
+        start_time = datetime.now()
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        result = graphAccess.execute_query("""
+        MATCH (source:Document {noteId: $sourceNoteId})
+        MERGE (d:Document {noteId: $noteId})
+        SET d = apoc.map.removeKeys(properties(source), ['status', 'errorMessage']),
+            d.noteId = $noteId,
+            d.courseId = $courseId,
+            d.userId = $userId,
+            d.url = $url,
+            d.status = 'Completed',
+            d.clonedFrom = $sourceNoteId,
+            d.created_at = $now,
+            d.updated_at = $now
+        MERGE (v:YoutubeVideo {id: $videoId})
+        MERGE (d)-[:OF_VIDEO]->(v)
+        MERGE (note:Note {id: $noteId})
+        MERGE (course:Course {id: $courseId})
+        MERGE (user:User {id: $userId})
+        WITH d, note, course, user
+        CALL {
+            WITH note, course, user
+            MATCH (:Note {id: $sourceNoteId})<-[:IN_NOTE]-(n:Concept)
+            MERGE (n)-[:IN_NOTE]->(note)
+            MERGE (n)-[:IN_COURSE]->(course)
+            MERGE (n)-[:IN_USER]->(user)
+        }
+        CALL {
+            WITH d
+            MATCH (source:Chunk {noteId: $sourceNoteId})
+            CREATE (c:Chunk)
+            SET c = properties(source),
+                c.id = randomUUID(),
+                c.noteId = $noteId,
+                c.courseId = $courseId,
+                c.userId = $userId
+            CREATE (c)-[:HAS_DOCUMENT {type: 'PART_OF'}]->(d)
+            WITH source, c
+            CALL {
+                WITH source, c
+                MATCH (source)-[ref:REFERENCES]->(entity)
+                CREATE (c)-[:REFERENCES {type: ref.type}]->(entity)
+            }
+            RETURN count(c) AS chunkCount
+        }
+        // The source's FIRST_CHUNK / NEXT_CHUNK edges, matched up by chunk position
+        CALL {
+            WITH d
+            MATCH (:Document {noteId: $sourceNoteId})-[edge:HAS_CHUNK]->(sourceChunk:Chunk)
+            MATCH (c:Chunk {noteId: $noteId, position: sourceChunk.position})
+            CREATE (d)-[:HAS_CHUNK {type: edge.type}]->(c)
+        }
+        CALL {
+            MATCH (sourcePrevious:Chunk {noteId: $sourceNoteId})-[edge:HAS_CHUNK]->(sourceNext:Chunk)
+            MATCH (previous:Chunk {noteId: $noteId, position: sourcePrevious.position})
+            MATCH (next:Chunk {noteId: $noteId, position: sourceNext.position})
+            CREATE (previous)-[:HAS_CHUNK {type: edge.type}]->(next)
+        }
+        SET d.total_chunks = chunkCount
+        RETURN chunkCount
+        """, {
+            'sourceNoteId': sourceNoteId,
+            'videoId': videoId,
+            'noteId': noteId,
+            'courseId': courseId,
+            'userId': userId,
+            'url': sourceUrl,
+            'now': start_time
+        })
+
+        if len(result) == 0:
+            # Deleted since it was looked up, the retried job picks another source or extracts
+            raise Exception(f"Source note {sourceNoteId} for video {videoId} no longer exists")
+
+        chunkCount = result[0]['chunkCount']
+
+        graphAccess.update_source_node(sourceNode(
+            noteId=noteId,
+            processing_time=datetime.now() - start_time
+        ))
+
+        CommunityService.mark_note_dirty(noteId=noteId)
+        CommunityService.mark_course_dirty(courseId=courseId, noteId=noteId)
+        GraphCacheService.bump(noteId=noteId, courseId=courseId, userId=userId)
+
+        logging.info(f"Cloned {chunkCount} chunks of note {sourceNoteId} into note {noteId} in {datetime.now() - start_time}")
+
+        return chunkCount
 
     @staticmethod
     def create_graph_from_raw_text(  
@@ -96,6 +235,9 @@ class GraphCreationService:
             successCount=0
             failedCount=0
             
+            graphDb_data_Access: graphDBdataAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+            graphDb_data_Access.reset_note_graph(noteId)
+
             pages = get_text_chunks_langchain(rawText)
 
             similarityService = SimilarityService(
@@ -129,8 +271,6 @@ class GraphCreationService:
                 file_size=sys.getsizeof(rawText)
             )
 
-            graphDb_data_Access: graphDBdataAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
-
             obj_source_node.noteId = noteId
 
             graphDb_data_Access.create_source_node(obj_source_node)
@@ -146,8 +286,8 @@ class GraphCreationService:
                 noteId=noteId
                 )
             
-            GraphCreationService.update_communities_for_param(id_type='noteId', target_id=noteId)
-            GraphCreationService.update_communities_for_param(id_type='courseId', target_id=courseId)
+            CommunityService.mark_note_dirty(noteId=noteId)
+            CommunityService.mark_course_dirty(courseId=courseId, noteId=noteId)
             
             SupabaseService.update_note(noteId=noteId, key='graphStatus', value='complete')
 
@@ -155,72 +295,9 @@ class GraphCreationService:
         except Exception as e:
             logging.exception(f'Exception: {e}')
             SupabaseService.update_note(noteId=noteId, key='graphStatus', value='error')
-
-
-    @staticmethod
-    def update_communities_for_param(id_type: str, target_id: str) -> Dict:
-        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
-
-        try:
-            query = f"""
-            MATCH (n)-[r]-(relatedNode)
-            WHERE "{target_id}" IN n.{id_type} AND "{target_id}" IN relatedNode.{id_type}
-
-            WITH collect(distinct n) + collect(distinct relatedNode) AS nodes, collect(distinct r) AS rels
-
-            CALL gds.graph.project.cypher(
-            '{target_id}_temp_graph',
-            'UNWIND $nodes AS n RETURN id(n) AS id',
-            'UNWIND $rels AS r RETURN id(startNode(r)) AS source, id(endNode(r)) AS target',
-            {{parameters: {{nodes: nodes, rels: rels}}}}
-            )
-            YIELD graphName
-
-            CALL gds.louvain.stream('{target_id}_temp_graph')
-            YIELD nodeId, communityId
-
-            WITH gds.util.asNode(nodeId) AS node, communityId
-
-            WITH collect({{node: node, communityId: communityId}}) AS results
-
-            CALL gds.graph.drop('{target_id}_temp_graph') YIELD graphName
-
-            UNWIND results AS result
-            RETURN result.node AS node, result.communityId AS communityId
-            """
-
-            result = graphAccess.execute_query(query)
-
-            updated_nodes = []
-
-            for record in result:
-                node = record['node']
-                communityId = record['communityId']
-
-                node[f'{id_type}_{target_id}_community'] = communityId
-
-                updated_nodes.append(node)
-
-
-            update_query = """
-            UNWIND $nodes AS node
-            MATCH (n)
-            WHERE n.id = node.id
-            SET n += node
-            RETURN count(n) as updatedCount
-            """
-
-            update_result = graphAccess.execute_query(update_query, {'nodes': updated_nodes})
-
-            logging.info(f"Updated nodes: {update_result}")
-
-        except ValueError as ve:
-            logging.error(f"Invalid input: {str(ve)}")
-            raise
-        except Exception as e:
-            logging.error(f"An error occurred: {str(e)}")
             raise
 
+
     @staticmethod
     def insert_quiz_question(questions: List[QuizQuestion]) -> None:
         graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
@@ -260,4 +337,17 @@ class GraphCreationService:
             } for q in questions
         ]}
         
-        graphAccess.execute_query(query, params)
\ No newline at end of file
+        graphAccess.execute_query(query, params)
+
+    @staticmethod
+    def delete_quiz_questions(questionIds: List[str]) -> None:
+        if len(questionIds) == 0:
+            return
+
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MATCH (question:QuizQuestion)
+        WHERE question.id IN $questionIds
+        DETACH DELETE question
+        """, {'questionIds': questionIds})
@@ -1,9 +1,13 @@
 import json
 import logging
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Generator, List, Tuple
 from flask_app.src.graphDB_dataAccess import graphDBdataAccess
+from flask_app.src.graph_assembly import assemble_graph
 from flask import current_app
 from flask_app.models.Quiz import QuizQuestion
+from flask_app.services.GraphCacheService import GraphCacheService
+from flask_app.src.shared.common_fn import load_embedding_model
+from flask_app.src.shared.constants import MEMBERSHIP_SCOPES
 
 class GraphQueryService():
 
@@ -30,6 +34,106 @@ class GraphQueryService():
     
     
     
+    @staticmethod
+    def get_scope_query(key: str, return_clause: str, node_clause: str = "", related_node_clause: str = "") -> str:
+        """
+        Documents and Chunks carry scalar, range indexed scope properties.
+        Concepts belong to a scope through an edge to its (:Note/Course/User) node.
+        node_clause and related_node_clause narrow n and r further, e.g. for paging.
+        """
+        if key not in MEMBERSHIP_SCOPES:
+            raise ValueError(f"Unsupported graph scope: {key}")
+
+        label, rel = MEMBERSHIP_SCOPES[key]
+
+        return f"""
+            CALL {{
+                MATCH (n:Document) WHERE n.{key} = $value RETURN n
+                UNION
+                MATCH (n:Chunk) WHERE n.{key} = $value RETURN n
+                UNION
+                MATCH (:{label} {{id: $value}})<-[:{rel}]-(n:Concept) RETURN n
+            }}
+            {node_clause}
+            OPTIONAL MATCH (n)-[rel]->(r)
+            WHERE (((r:Document OR r:Chunk) AND r.{key} = $value)
+                OR (r:Concept AND EXISTS {{ (r)-[:{rel}]->(:{label} {{id: $value}}) }}))
+                {related_node_clause}
+            RETURN {return_clause}
+            """
+
+    @staticmethod
+    def stream_graph_for_param(
+        key: str,
+        value: str,
+        after: int = -1,
+        limit: int = 5000,
+        nodeTypes: List[str] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yields one page of the graph straight off the Neo4j result cursor:
+        up to limit nodes with internal id greater than after, each followed
+        by its in-scope outgoing relationships, then a final page marker
+        carrying the cursor for the next page (None on the last page).
+        """
+        graph = current_app.config['NEO4J_GRAPH']
+        com_string = f"{key}_{value}_community"
+
+        query = GraphQueryService.get_scope_query(
+            key=key,
+            return_clause=f"""ID(n) AS nodeId, LABELS(n) AS nodeLabels, n.position AS position,
+                n.fileName AS fileName, n.id AS conceptId, n.description AS description,
+                n['{com_string}'] AS communityId, rel.type AS relType, ID(r) AS relatedNodeId
+                ORDER BY nodeId""",
+            node_clause="""
+            WITH n
+            WHERE ID(n) > $after AND ($nodeTypes IS NULL OR any(l IN LABELS(n) WHERE l IN $nodeTypes))
+            WITH n ORDER BY ID(n) LIMIT $limit
+            """,
+            related_node_clause="AND ($nodeTypes IS NULL OR any(l IN LABELS(r) WHERE l IN $nodeTypes))"
+        )
+
+        parameters = {
+            "value": value,
+            "after": after,
+            "limit": limit,
+            "nodeTypes": nodeTypes
+        }
+
+        node_count = 0
+        last_node_id = None
+
+        with graph._driver.session(database=graph._database) as session:
+            for record in session.run(query, parameters):
+                if record['nodeId'] != last_node_id:
+                    node_type = next((label for label in ['Document', 'Chunk', 'Concept'] if label in record['nodeLabels']), None)
+                    last_node_id = record['nodeId']
+                    node_count += 1
+
+                    if node_type is not None:
+                        node_info = {'id': record['nodeId'], 'communityId': record['communityId']}
+                        if node_type == 'Document':
+                            node_info['fileName'] = record['fileName']
+                        elif node_type == 'Chunk':
+                            node_info['position'] = record['position']
+                        else:
+                            node_info['conceptId'] = record['conceptId']
+                            node_info['description'] = record['description']
+
+                        yield {'kind': 'node', 'nodeType': node_type.lower(), 'node': node_info}
+
+                if record['relatedNodeId'] is not None and record['relType'] is not None:
+                    yield {
+                        'kind': 'relationship',
+                        'relationship': {
+                            "start_node_id": record['nodeId'],
+                            "relationship_type": record['relType'],
+                            "end_node_id": record['relatedNodeId']
+                        }
+                    }
+
+        yield {'kind': 'page', 'nextCursor': last_node_id if node_count == limit else None}
+
     @staticmethod
     def get_graph_for_param(
         key: str, 
@@ -39,18 +143,12 @@ class GraphQueryService():
         try:
             graphDb_data_Access = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
 
-            final_params = return_params = return_params if return_params is not None else \
+            final_params = return_params if return_params is not None else \
                 GraphQueryService.get_default_graph_params(communityType=key, communityId=value)
 
             return_clause = ", ".join(f"{param[0]} AS {param[1]}" for param in final_params)
 
-            QUERY = f"""
-            MATCH (n)
-            WHERE n.{key} = $value OR $value IN n.{key}
-            OPTIONAL MATCH (n)-[rel]->(r)
-            WHERE r.{key} = $value or $value IN r.{key}
-            RETURN {return_clause}
-            """
+            QUERY = GraphQueryService.get_scope_query(key=key, return_clause=return_clause)
 
             parameters = {
                 "value": value
@@ -58,74 +156,7 @@ class GraphQueryService():
 
             result = graphDb_data_Access.execute_query(QUERY, parameters)
 
-            nodes = {
-                'documents': {},
-                'chunks': {},
-                'concepts': {}
-            }
-            relationships = []
-
-            for record in result:
-                node_data = {}
-                related_node_data = {}
-                rel_type = None
-
-                for param in return_params:
-                    attr_name = param[1]
-                    attr_value = record.get(attr_name)
-                    
-                    if attr_name.startswith("relatedNode"):
-                        related_node_data[attr_name.replace("relatedNode", "")] = attr_value
-                    elif attr_name == "relType":
-                        rel_type = attr_value
-                    else:
-                        node_data[attr_name] = attr_value
-
-                if 'nodeId' in node_data and 'nodeLabels' in node_data:
-                    node_type = next((label for label in ['Document', 'Chunk', 'Concept'] if label in node_data['nodeLabels']), None)
-                    if node_type:
-                        node_info = nodes[node_type.lower() + 's'].get(node_data['nodeId'], {})
-                        node_info['id'] = node_data['nodeId']
-                        if node_type == 'Document':
-                            node_info['fileName'] = node_data.get('fileName')
-                        elif node_type == 'Chunk':
-                            node_info['position'] = node_data.get('position')
-                        elif node_type == 'Concept':
-                            node_info['conceptId'] = node_data.get('conceptId')
-                            node_info['description'] = node_data.get('description')
-                        
-                        if 'communityId' in node_data and 'communityId' not in node_info:
-                            node_info['communityId'] = node_data['communityId']
-                        
-                        nodes[node_type.lower() + 's'][node_data['nodeId']] = node_info
-
-                if related_node_data.get('Id') is not None and related_node_data.get('Labels') is not None:
-                    related_node_type = next((label for label in ['Document', 'Chunk', 'Concept'] if label in related_node_data['Labels']), None)
-                    if related_node_type:
-                        related_node_info = nodes[related_node_type.lower() + 's'].get(related_node_data['Id'], {})
-                        related_node_info['id'] = related_node_data['Id']
-                        if related_node_type == 'Document':
-                            related_node_info['fileName'] = related_node_data.get('FileName')
-                        elif related_node_type == 'Chunk':
-                            related_node_info['position'] = related_node_data.get('Position')
-                        elif related_node_type == 'Concept':
-                            related_node_info['conceptId'] = related_node_data.get('ConceptId')
-                            related_node_info['description'] = related_node_data.get('Description')
-                        
-                        if 'relatedNodeCommunityId' in related_node_data and 'communityId' not in related_node_info:
-                            related_node_info['communityId'] = related_node_data['relatedNodeCommunityId']
-                        
-                        nodes[related_node_type.lower() + 's'][related_node_data['Id']] = related_node_info
-
-                if 'nodeId' in node_data and related_node_data.get('Id') is not None and rel_type is not None:
-                    relationships.append({
-                        "start_node_id": node_data['nodeId'], 
-                        "relationship_type": rel_type, 
-                        "end_node_id": related_node_data['Id']
-                    })
-
-            for node_type in nodes:
-                nodes[node_type] = list(nodes[node_type].values())
+            nodes, relationships = assemble_graph(result, final_params)
 
             return nodes, relationships
 
@@ -138,7 +169,7 @@ class GraphQueryService():
                         noteId: str = None, 
                         specifierParam: str = None,
                         topics: List[str] = []
-                    ) -> str | None:
+                    ) -> Dict[str, Any] | None:
         if specifierParam == 'noteId':
             return GraphQueryService.get_topic_graph_from_param(param="noteId", id=noteId, topics=topics)
         elif specifierParam == 'courseId':
@@ -151,8 +182,205 @@ class GraphQueryService():
     def get_topic_graph_from_param(param: str, 
                                    id: str, 
                                    topics: List[str] = None
-                                   ) -> str | None:
-        return {'message': 'Not implemented'}, 200
+                                   ) -> Dict[str, Any] | None:
+        """
+        Context subgraph for quiz generation: the chunks closest to the topics,
+        the communities their concepts fall in and the best connected concepts
+        of those communities with the relationships between them. Capped by
+        the TOPIC_GRAPH_* settings and cached until the scope's graph changes.
+        Returns None when the scope has nothing to ask about.
+        """
+        topics = [topic.strip() for topic in (topics or []) if topic and topic.strip()]
+
+        if param not in MEMBERSHIP_SCOPES:
+            logging.error(f"Unsupported topic graph scope: {param}")
+            return None
+
+        version = GraphCacheService.get_version(param=param, id=id)
+        cached = GraphCacheService.get_topic_graph(param=param, id=id, version=version, topics=topics)
+
+        if cached is not None:
+            logging.info(f"Topic graph cache hit for {param} {id}")
+            return cached
+
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+        config = current_app.config
+
+        chunks = GraphQueryService.get_topic_chunks(graphAccess, param, id, topics, int(config['TOPIC_GRAPH_MAX_CHUNKS']))
+
+        communities, relevance = GraphQueryService.get_topic_communities(
+            graphAccess, param, id, chunks, int(config['TOPIC_GRAPH_MAX_COMMUNITIES'])
+        )
+
+        concepts = GraphQueryService.get_topic_concepts(
+            graphAccess, param, id, communities, relevance, int(config['TOPIC_GRAPH_MAX_CONCEPTS'])
+        )
+
+        relationships = GraphQueryService.get_relationships_between_concepts(
+            graphAccess, [concept['id'] for concept in concepts], int(config['TOPIC_GRAPH_MAX_RELATIONSHIPS'])
+        )
+
+        if len(chunks) == 0 and len(concepts) == 0:
+            logging.info(f"No topic graph for {param} {id}, topics: {topics}")
+            return None
+
+        topic_graph = {
+            'topics': topics,
+            'communities': communities,
+            'concepts': concepts,
+            'relationships': relationships,
+            'chunks': chunks
+        }
+
+        GraphCacheService.set_topic_graph(param=param, id=id, version=version, topics=topics, topicGraph=topic_graph)
+
+        logging.info(f"Topic graph for {param} {id}: {len(chunks)} chunks, {len(communities)} communities, "
+                     f"{len(concepts)} concepts, {len(relationships)} relationships")
+
+        return topic_graph
+
+    @staticmethod
+    def get_topic_chunks(graphAccess: graphDBdataAccess, key: str, value: str, topics: List[str], limit: int) -> List[Dict]:
+        """
+        Chunks in scope ranked by their best cosine similarity to any topic.
+        The vector index is over-fetched and filtered to the scope. If none of
+        the candidates are in scope, the scope's chunks are scanned directly.
+        """
+        if len(topics) == 0:
+            return []
+
+        embeddings, _ = load_embedding_model()
+        topicEmbeddings = embeddings.embed_documents(topics)
+
+        return_clause = """
+            WITH c, max(score) AS score
+            ORDER BY score DESC
+            LIMIT $limit
+            RETURN c.id AS chunkId, c.noteId AS noteId, c.position AS position, c.text AS text, score
+            """
+
+        parameters = {
+            'value': value,
+            'topicEmbeddings': topicEmbeddings,
+            'candidates': int(current_app.config['TOPIC_GRAPH_VECTOR_CANDIDATES']),
+            'limit': limit
+        }
+
+        chunks = graphAccess.execute_query(f"""
+            UNWIND $topicEmbeddings AS topicEmbedding
+            CALL db.index.vector.queryNodes('vector', $candidates, topicEmbedding) YIELD node AS c, score
+            WITH c, score WHERE c.{key} = $value
+            {return_clause}
+            """, parameters)
+
+        if len(chunks) == 0:
+            chunks = graphAccess.execute_query(f"""
+                MATCH (c:Chunk) WHERE c.{key} = $value AND c.embedding IS NOT NULL
+                UNWIND $topicEmbeddings AS topicEmbedding
+                WITH c, gds.similarity.cosine(c.embedding, topicEmbedding) AS score
+                {return_clause}
+                """, parameters)
+
+        return chunks
+
+    @staticmethod
+    def get_topic_communities(
+        graphAccess: graphDBdataAccess,
+        key: str,
+        value: str,
+        chunks: List[Dict],
+        limit: int
+    ) -> Tuple[List[Dict], Dict[int, float]]:
+        """
+        Scores communities by the similarity of the chunks referencing their
+        concepts, or by size when there are no topic chunks. Also returns the
+        per concept relevance the scores were built from.
+        """
+        label, rel = MEMBERSHIP_SCOPES[key]
+        com_string = f"{key}_{value}_community"
+
+        relevance = {}
+
+        if len(chunks) > 0:
+            hits = graphAccess.execute_query(f"""
+                MATCH (scope:{label} {{id: $value}})
+                UNWIND $chunks AS hit
+                MATCH (:Chunk {{id: hit.chunkId}})-[:REFERENCES]->(t:Concept)-[:{rel}]->(scope)
+                RETURN ID(t) AS nodeId, t['{com_string}'] AS communityId, sum(hit.score) AS relevance
+                """, {'value': value, 'chunks': [{'chunkId': c['chunkId'], 'score': c['score']} for c in chunks]})
+
+            scores = {}
+            for hit in hits:
+                relevance[hit['nodeId']] = hit['relevance']
+                if hit['communityId'] is not None:
+                    scores[hit['communityId']] = scores.get(hit['communityId'], 0) + hit['relevance']
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [{'communityId': communityId, 'score': score} for communityId, score in ranked], relevance
+
+        largest = graphAccess.execute_query(f"""
+            MATCH (:{label} {{id: $value}})<-[:{rel}]-(t:Concept)
+            WHERE t['{com_string}'] IS NOT NULL
+            RETURN t['{com_string}'] AS communityId, count(t) AS size
+            ORDER BY size DESC
+            LIMIT $limit
+            """, {'value': value, 'limit': limit})
+
+        return [{'communityId': c['communityId'], 'score': float(c['size'])} for c in largest], relevance
+
+    @staticmethod
+    def get_topic_concepts(
+        graphAccess: graphDBdataAccess,
+        key: str,
+        value: str,
+        communities: List[Dict],
+        relevance: Dict[int, float],
+        limit: int
+    ) -> List[Dict]:
+        """
+        Concepts of the chosen communities, plus any topic hits outside them,
+        ranked by topic relevance and then by degree.
+        """
+        label, rel = MEMBERSHIP_SCOPES[key]
+        com_string = f"{key}_{value}_community"
+
+        candidates = graphAccess.execute_query(f"""
+            MATCH (scope:{label} {{id: $value}})<-[:{rel}]-(t:Concept)
+            WHERE t['{com_string}'] IN $communityIds OR ID(t) IN $hitIds
+            WITH t, COUNT {{ (t)-[:RELATED]-(:Concept) }} AS degree
+            ORDER BY degree DESC
+            LIMIT $candidateLimit
+            RETURN ID(t) AS id, t.id AS conceptId, t.description AS description,
+                t['{com_string}'] AS communityId, degree
+            """, {
+                'value': value,
+                'communityIds': [c['communityId'] for c in communities],
+                'hitIds': list(relevance.keys()),
+                # Enough headroom that relevant low degree concepts survive the degree cut
+                'candidateLimit': limit * 4 + len(relevance)
+            })
+
+        concepts = []
+        for candidate in candidates:
+            concept = dict(candidate)
+            concept['relevance'] = relevance.get(candidate['id'], 0.0)
+            concepts.append(concept)
+
+        concepts.sort(key=lambda concept: (concept['relevance'], concept['degree']), reverse=True)
+
+        return concepts[:limit]
+
+    @staticmethod
+    def get_relationships_between_concepts(graphAccess: graphDBdataAccess, nodeIds: List[int], limit: int) -> List[Dict]:
+        if len(nodeIds) == 0:
+            return []
+
+        return graphAccess.execute_query("""
+            MATCH (a:Concept)-[r:RELATED]->(b:Concept)
+            WHERE ID(a) IN $nodeIds AND ID(b) IN $nodeIds
+            RETURN a.id AS source, r.type AS type, b.id AS target
+            LIMIT $limit
+            """, {'nodeIds': nodeIds, 'limit': limit})
     
     @staticmethod
     def get_quiz_questions_by_id(quizId: str) -> List[QuizQuestion]:
@@ -1,26 +1,25 @@
 import logging
-import re
 from uuid import UUID
 from datetime import datetime
+from typing import Any, Dict
 from neo4j.time import DateTime
 
-from flask_app.src.document_sources.youtube import get_youtube_transcript
+from flask_app.src.document_sources.youtube import get_youtube_source
 
 
 class HelperService:
     @staticmethod
-    def check_url_source(ytUrl: str):
-        match = re.search(r'(?:v=)([0-9A-Za-z_-]{11})\s*', ytUrl)
-        logging.info(f"match value{match}")
-
-        transcript = get_youtube_transcript(match.group(1))
-
-        if transcript==None or len(transcript)==0:
+    def check_url_source(ytUrl: str) -> Dict[str, Any]:
+        """
+        Validates the video and returns its cached transcript and metadata,
+        see get_youtube_source.
+        """
+        try:
+            return get_youtube_source(ytUrl)
+        except Exception as e:
             message = f"Youtube transcript is not available for : {ytUrl}"
-            logging.exception(message)
+            logging.exception(f"{message}: {e}")
             raise Exception(message)
-
-        return transcript
     
     @staticmethod
     def validate_uuid4(uuid_string) -> bool:
@@ -0,0 +1,95 @@
+import logging
+from enum import Enum
+from typing import Callable, Dict, Tuple
+from flask import Flask, current_app
+
+from flask_app.src.job_queue import JobWorkerPool, SqliteJobQueue
+from .GraphCreationService import GraphCreationService
+from .NoteService import NoteService
+from .QuizService import QuizService
+from .CommunityService import CommunityService
+from .TranscriptionService import TranscriptionService
+
+
+class JobType(Enum):
+    QUIZ = 'quiz'
+    TEXT = 'text'
+    YOUTUBE = 'youtube'
+    TEXT_FILE = 'text-file'
+    AUDIO = 'audio'
+    COMMUNITY = 'community'
+    TRANSCRIPTION_POLL = 'transcription-poll'
+
+# Lower runs first: cheap, interactive jobs ahead of long ingestion
+JOB_PRIORITY = {
+    JobType.QUIZ: 0,
+    JobType.COMMUNITY: 1,
+    JobType.TRANSCRIPTION_POLL: 1,
+    JobType.TEXT: 1,
+    JobType.YOUTUBE: 2,
+    JobType.TEXT_FILE: 2,
+    JobType.AUDIO: 3,
+}
+
+class JobService:
+
+    @staticmethod
+    def handlers() -> Dict[str, Callable]:
+        return {
+            JobType.QUIZ.value: QuizService.generate_quiz,
+            JobType.TEXT.value: GraphCreationService.create_graph_from_raw_text,
+            JobType.YOUTUBE.value: GraphCreationService.create_graph_from_youtube,
+            JobType.TEXT_FILE.value: NoteService.pdf_file_to_graph,
+            JobType.AUDIO.value: NoteService.audio_file_to_graph,
+            JobType.COMMUNITY.value: CommunityService.recompute_course,
+            JobType.TRANSCRIPTION_POLL.value: TranscriptionService.poll,
+        }
+
+    @staticmethod
+    def enqueue(jobType: JobType, args: Tuple, delay: float = 0, dedupeKey: str = None) -> str:
+        queue: SqliteJobQueue = current_app.config['JOB_QUEUE']
+
+        jobId = queue.enqueue(
+            job_type=jobType.value,
+            args=args,
+            priority=JOB_PRIORITY[jobType],
+            max_attempts=int(current_app.config['JOB_MAX_ATTEMPTS']),
+            delay=delay,
+            dedupe_key=dedupeKey
+        )
+
+        pool: JobWorkerPool | None = current_app.config.get('JOB_WORKER_POOL')
+        if pool is not None:
+            pool.notify()
+
+        logging.info(f"Enqueued job {jobId} of type {jobType.value}")
+
+        return jobId
+
+    @staticmethod
+    def get_job(jobId: str) -> Dict | None:
+        queue: SqliteJobQueue = current_app.config['JOB_QUEUE']
+        return queue.get(jobId)
+
+    @staticmethod
+    def start_workers(app: Flask) -> JobWorkerPool | None:
+        size = int(app.config['JOB_WORKER_THREADS'])
+
+        if size <= 0:
+            return None
+
+        handlers = JobService.handlers()
+
+        pool = JobWorkerPool(
+            app=app,
+            queue=app.config['JOB_QUEUE'],
+            resolve=lambda job_type: handlers[job_type],
+            size=size,
+            lease_seconds=float(app.config['JOB_LEASE_SECONDS']),
+            poll_interval=float(app.config['JOB_POLL_INTERVAL'])
+        )
+        pool.start()
+
+        app.config['JOB_WORKER_POOL'] = pool
+
+        return pool
@@ -1,10 +1,11 @@
 from enum import Enum
 from io import BytesIO
-from werkzeug.datastructures import FileStorage
 import logging
+from flask import current_app
 from .SupabaseService import SupabaseService
-from .RunpodService import RunpodService
+from .TranscriptionService import TranscriptionService, TranscriptionStatus
 from .GraphCreationService import GraphCreationService
+from flask_app.src.audio_splitter import split_audio
 from flask_app.src.document_sources.pdf_loader import extract_text
 
 class NoteForm(Enum):
@@ -58,11 +59,23 @@ class NoteService:
         noteId: str,
         courseId: str,
         userId: str,
-        audio_file: FileStorage,
+        file_name: str,
+        file_content: bytes,
         keywords: str
         ):
         try:
-            file_content = audio_file.read()
+            state = TranscriptionService.get_state(noteId)
+            if state is not None and state['status'] == TranscriptionStatus.SUBMITTING:
+                # An earlier attempt stopped partway through submitting, the audio is already uploaded
+                logging.info(f"Resuming the transcription submission for note {noteId}")
+                TranscriptionService.submit_jobs(noteId, state['keywords'], state['parts'])
+                return
+
+            if state is not None and state['status'] != TranscriptionStatus.FAILED:
+                # A retried job must not submit the same audio to Runpod twice
+                logging.info(f"Transcription for note {noteId} was already submitted")
+                return
+
             fileId = SupabaseService.upload_file(
                 file=file_content, 
                 fileName=noteId,
@@ -71,30 +84,58 @@ class NoteService:
                 )
 
             if fileId is None:
-                logging.exception(f"Failed to upload file for note {noteId}")
-                return
-
-            output = RunpodService.transcribe(
-                fileName=noteId, 
-                keywords=keywords
+                raise Exception(f"Failed to upload file for note {noteId}")
+
+            parts = []
+            if current_app.config['AUDIO_SPLIT_ENABLED']:
+                parts = split_audio(
+                    content=file_content,
+                    target_seconds=float(current_app.config['AUDIO_SPLIT_TARGET_SECONDS']),
+                    overlap_seconds=float(current_app.config['AUDIO_SPLIT_OVERLAP_SECONDS']),
+                    search_seconds=float(current_app.config['AUDIO_SPLIT_SEARCH_SECONDS']),
+                    min_seconds=float(current_app.config['AUDIO_SPLIT_MIN_SECONDS'])
                 )
 
-            if output is None:
-                logging.exception(f"Failed to transcribe file for note {noteId}")
-                return
-            
-            GraphCreationService.create_graph_from_raw_text(
-                rawText=output,
-                noteId=noteId, 
-                courseId=courseId, 
-                userId=userId,
-                fileName=audio_file.filename
+            for part in parts:
+                part['fileName'] = f"{noteId}-{part['index']:03d}"
+                partId = SupabaseService.upload_file(
+                    file=part['wav'],
+                    fileName=part['fileName'],
+                    bucketName='audio-files',
+                    contentType='audio/wav',
+                    updateNote=False
+                )
+                if partId is None:
+                    logging.warning(f"Failed to upload audio part {part['fileName']}, transcribing note {noteId} whole")
+                    parts = []
+                    break
+
+            # Graph creation is queued once the transcript is ready
+            if len(parts) > 1:
+                TranscriptionService.submit_parts(
+                    noteId=noteId,
+                    courseId=courseId,
+                    userId=userId,
+                    fileName=file_name,
+                    keywords=keywords,
+                    parts=parts
                 )
+            else:
+                TranscriptionService.submit(
+                    noteId=noteId,
+                    courseId=courseId,
+                    userId=userId,
+                    fileName=file_name,
+                    keywords=keywords
+                    )
             
             logging.info(f"File uploaded successfully for note {noteId}")
 
         except Exception as e:
             logging.exception(f'Exception Stack trace: {e}')
+            SupabaseService.update_note(noteId, 'contentStatus', 'error')
+            # The job queue retries the job until it runs out of attempts
+            raise
 
 
     @staticmethod
@@ -110,8 +151,7 @@ class NoteService:
             output = extract_text(file_content, file_name, file_type)
 
             if output is None:
-                logging.exception(f"Failed to transcribe file for note {noteId}")
-                return
+                raise Exception(f"Failed to transcribe file for note {noteId}")
 
             fileId = SupabaseService.upload_file(
                 file=file_content, 
@@ -121,8 +161,7 @@ class NoteService:
                 )
 
             if fileId is None:
-                logging.exception(f"Failed to upload file for note {noteId}")
-                return
+                raise Exception(f"Failed to upload file for note {noteId}")
                         
             GraphCreationService.create_graph_from_raw_text(
                 rawText=output,
@@ -136,3 +175,5 @@ class NoteService:
 
         except Exception as e:
             logging.exception(f'Exception Stack trace: {e}')
+            SupabaseService.update_note(noteId, 'graphStatus', 'error')
+            raise
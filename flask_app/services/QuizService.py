@@ -1,9 +1,11 @@
 import logging
-from random import randint
+from typing import Generator, List
+from flask import current_app
 from flask_app.services.GraphQueryService import GraphQueryService
 from flask_app.services.SupabaseService import SupabaseService
 from flask_app.models.Quiz import QuizQuestion, QuizQuestionAnswer
 from flask_app.services.GraphCreationService import GraphCreationService
+from flask_app.src.quiz_llm import generate_questions_from_OpenAI, split_topic_graph
 
 class QuizService():
     validSpecifiers = ['courseId', 'noteId']
@@ -28,30 +30,46 @@ class QuizService():
     
         if topic_graph is None:
             return None
+
+        if len(topic_graph.get('concepts', [])) == 0 and len(topic_graph.get('chunks', [])) == 0:
+            # Nothing to ground the questions in, don't ask the model to make them up
+            logging.warning(f"No concepts or excerpts found for quiz {quizId}, no questions generated")
+            return None
         
-        questionIds = []
-        
-        for _ in range(numQuestions):
-            question = SupabaseService.add_quiz_question(quizId=quizId)
+        questionIds = SupabaseService.add_quiz_questions(quizId=quizId, numQuestions=numQuestions)
 
-            if len(question) == 0:
-                logging.error(f"Failed to add question for quiz {quizId}")
-                return None
-            
-            questionIds.append(question[0]['id'])
+        if len(questionIds) == 0:
+            logging.error(f"Failed to add questions for quiz {quizId}")
+            return None
 
-        questions = QuizService.generate_quiz_questions(
-            topic_graph=topic_graph,
-            courseId=courseId, 
-            userId=userId,
-            quizId=quizId,
-            noteId=noteId,
-            questionIds=questionIds,
-            difficulty=difficulty,
-            numQuestions=numQuestions
-            )
-        
-        GraphCreationService.insert_quiz_question(questions=questions)
+        insertedIds = []
+
+        try:
+            for questions in QuizService.generate_quiz_questions(
+                topic_graph=topic_graph,
+                courseId=courseId, 
+                userId=userId,
+                quizId=quizId,
+                noteId=noteId,
+                questionIds=questionIds,
+                difficulty=difficulty,
+                numQuestions=numQuestions
+                ):
+                # Each batch is readable as soon as it is generated
+                GraphCreationService.insert_quiz_question(questions=questions)
+                insertedIds.extend(question.questionId for question in questions)
+        except Exception:
+            # Don't leave questions behind, a retried job starts over with new rows
+            GraphCreationService.delete_quiz_questions(questionIds=insertedIds)
+            SupabaseService.delete_quiz_questions(questionIds)
+            raise
+
+        # The model may return fewer questions than asked for in a batch
+        inserted = set(insertedIds)
+        unused = [questionId for questionId in questionIds if questionId not in inserted]
+        SupabaseService.delete_quiz_questions(unused)
+
+        logging.info(f"Generated {len(insertedIds)} of {numQuestions} questions for quiz {quizId}")
     
     @staticmethod
     def generate_quiz_questions(
@@ -62,30 +80,44 @@ class QuizService():
         questionIds=[],
         difficulty=None,
         numQuestions=None,
-        noteId=None):
+        noteId=None) -> Generator[List[QuizQuestion], None, None]:
+        """
+        Generates questions in parallel batches over disjoint parts of the
+        topic graph and yields each batch as it completes. Question ids are
+        reserved per batch so they keep the order they were created in.
+        """
+        batches = split_topic_graph(
+            topic_graph=topic_graph,
+            numQuestions=numQuestions,
+            batchSize=int(current_app.config['QUIZ_BATCH_SIZE'])
+        )
 
-        questions = []
+        offsets = []
+        offset = 0
+        for batch in batches:
+            offsets.append(offset)
+            offset += batch['count']
 
-        for i in range(numQuestions):
-            question = QuizQuestion(
-                question=f"Question {i}",
-                answers=[],
-                topics=[f"Topic {j}" for j in range(randint(1, 5))],
-                difficulty=difficulty,
-                userId=userId,
-                courseId=courseId,
-                noteId=noteId,
-                quizId=quizId,
-                questionId=f"{questionIds[i]}",
-            )
+        for i, generated in generate_questions_from_OpenAI(batches=batches, difficulty=difficulty, fairnessKey=quizId):
+            questions = []
 
-            for j in range(4):
-                question.answers.append(QuizQuestionAnswer(
-                    label=f"Answer {j}",
-                    correct=(j == 2),
-                    explanation=f"Explanation for answer {j}"
+            for j, item in enumerate(generated):
+                questions.append(QuizQuestion(
+                    question=item.question,
+                    answers=[
+                        QuizQuestionAnswer(
+                            label=answer.label,
+                            correct=answer.correct,
+                            explanation=answer.explanation
+                        ) for answer in item.answers
+                    ],
+                    topics=item.topics,
+                    difficulty=difficulty,
+                    userId=userId,
+                    courseId=courseId,
+                    noteId=noteId,
+                    quizId=quizId,
+                    questionId=f"{questionIds[offsets[i] + j]}",
                 ))
-            
-            questions.append(question)
 
-        return questions
+            yield questions
@@ -1,54 +1,56 @@
 from flask import current_app
 from runpod import Endpoint
 import logging
-from .SupabaseService import SupabaseService
+from typing import Any, Dict
+
+# Runpod job statuses after which the job will not change again
+RUNPOD_FINAL_STATUSES = {'COMPLETED', 'FAILED', 'CANCELLED', 'TIMED_OUT'}
 
 
 class RunpodService:
     @staticmethod
-    def transcribe(fileName: str, keywords: str) -> str | None:
-        logging.info(f'Transcribing file: {fileName}')
+    def submit(fileName: str, keywords: str, webhook: str = None) -> str:
+        """
+        Queues a Whisper job for the uploaded file and returns the Runpod job
+        id straight away. Runpod calls webhook, if given, when the job ends.
+        """
+        logging.info(f'Submitting transcription for file: {fileName}')
 
         endpoint: Endpoint = current_app.config['RUNPOD_ENDPOINT']
 
-        try:
-            run_request = endpoint.run(
-                {
-                    "input": {
-                        "id": fileName
-                    }
-                }
-            )
-
-            logging.info(f'Runpod job id: {run_request.job_id}')
-
-            output = run_request.output(timeout=600)
-
-            logging.info(f'Runpod job on file: {fileName}')
-
-            runpod_status = run_request.status()
-
-            logging.info(f'Runpod job status: {runpod_status}')
+        request = {
+            "input": {
+                "id": fileName
+            }
+        }
+        if webhook is not None:
+            request["webhook"] = webhook
 
-            if runpod_status != 'COMPLETED':
-                logging.error(f'Runpod job failed with output: {output}, file: {fileName}, status: {runpod_status}')
-                SupabaseService.update_note(fileName, 'contentStatus', 'error')
-                return None
-            else:
-                logging.info(f'Runpod job completed successfully')
+        run_request = endpoint.run(request)
 
-                outputFormatted = RunpodService.parse_whisper_output(output)
-                SupabaseService.update_note(fileName, 'contentStatus', 'complete')
-                SupabaseService.update_note(fileName, 'rawContent', outputFormatted)
-                return outputFormatted
+        logging.info(f'Runpod job id: {run_request.job_id}')
 
-        except TimeoutError:
-            logging.error(f'Runpod job timed out')
+        return run_request.job_id
 
-        except Exception as e:
-            logging.exception(f'Exception Stack trace: {e}')
-            return None
+    @staticmethod
+    def get_status(jobId: str) -> Dict[str, Any]:
+        """
+        One status request, without waiting. The result has the job's
+        status and, once it is COMPLETED, its output.
+        """
+        endpoint: Endpoint = current_app.config['RUNPOD_ENDPOINT']
+        return endpoint.rp_client.get(f"{endpoint.endpoint_id}/status/{jobId}")
         
+    @staticmethod
+    def get_stream(jobId: str) -> Dict[str, Any]:
+        """
+        Output the job has streamed since the last call, for workers that
+        yield Whisper segments as they are transcribed. Runpod hands out each
+        streamed item once.
+        """
+        endpoint: Endpoint = current_app.config['RUNPOD_ENDPOINT']
+        return endpoint.rp_client.get(f"{endpoint.endpoint_id}/stream/{jobId}")
+
     @staticmethod
     def parse_whisper_output(output: dict):
         '''
@@ -59,4 +61,4 @@ class RunpodService:
         for line in output["data"]:
             out += line["text"] + ' '
         
-        return out.strip()
\ No newline at end of file
+        return out.strip()
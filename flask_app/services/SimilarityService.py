@@ -1,5 +1,7 @@
 import logging
 from flask_app.src.shared.common_fn import load_embedding_model
+from flask_app.src.document_sources.youtube import get_youtube_video_id
+from flask_app.services.GraphCacheService import GraphCacheService
 
 from flask import current_app
 
@@ -16,16 +18,6 @@ class SimilarityService:
 
         logging.info(f"Embedding: Using OpenAI Embeddings , Dimension:{dimension}")
 
-        current_app.config['NEO4J_GRAPH'].query("""
-            CREATE VECTOR INDEX `doc_embedding` IF NOT EXISTS FOR (d:Document) ON (d.embedding)
-            OPTIONS {indexConfig: {
-                `vector.dimensions`: $dimensions,
-                `vector.similarity_function`: 'cosine'
-            }}
-        """, {
-            "dimensions": dimension
-        })
-
         ## UPDATE TO BE NOTEID NOT FILENAME
         query_to_create_or_update_document = """
         MERGE (d:Document {noteId: $noteId})
@@ -81,15 +73,25 @@ class SimilarityService:
             )
 
         if len(docs) > 0:
-            self.delete_node(node[0])
+            deleted = self.delete_node(node[0])
+            GraphCacheService.bump(
+                noteId=noteId,
+                courseId=deleted.get("courseId") or courseId,
+                userId=deleted.get("userId")
+            )
             return docs[0]["noteId"]
         else:
             return None
 
-    def same_youtube_node_exists(self, course_id, url) -> str | None:
+    def same_youtube_node_exists(self, course_id, url, note_id=None) -> str | None:
+        """
+        Another note in this course for the same video, matched on the URL
+        as given or on the canonical video id once that note has completed.
+        """
         query = """
         MATCH (d:Document)
-        WHERE d.courseId = $courseId AND d.url = $url
+        WHERE d.courseId = $courseId AND d.noteId <> $noteId
+            AND (d.url = $url OR EXISTS { (d)-[:OF_VIDEO]->(:YoutubeVideo {id: $videoId}) })
         RETURN d.noteId as noteId
         LIMIT 1
         """
@@ -98,22 +100,58 @@ class SimilarityService:
             query,
             params={
                 "courseId": course_id,
-                "url": url
+                "noteId": note_id or "",
+                "url": url,
+                "videoId": get_youtube_video_id(url)
             }
         )
 
-        print("result", result)
+        if len(result) > 0:
+            return result[0]["noteId"]
+        else:
+            return None
+
+    def processed_youtube_node(self, video_id, note_id) -> str | None:
+        """
+        Any other note, in any course, whose graph for this video is complete.
+        """
+        result = current_app.config['NEO4J_GRAPH'].query("""
+        MATCH (:YoutubeVideo {id: $videoId})<-[:OF_VIDEO]-(d:Document)
+        WHERE d.noteId <> $noteId
+        RETURN d.noteId AS noteId
+        ORDER BY d.created_at
+        LIMIT 1
+        """, params={"videoId": video_id, "noteId": note_id})
 
         if len(result) > 0:
             return result[0]["noteId"]
         else:
             return None
-        
-    def delete_node(self, node):
+
+    def register_youtube_node(self, video_id, note_id) -> None:
+        """
+        Adds a note with a complete graph to the video registry, so the
+        video is never extracted again, whichever course adds it next.
+        """
         current_app.config['NEO4J_GRAPH'].query("""
+        MATCH (d:Document {noteId: $noteId})
+        MERGE (v:YoutubeVideo {id: $videoId})
+        MERGE (d)-[:OF_VIDEO]->(v)
+        """, params={"videoId": video_id, "noteId": note_id})
+        
+    def delete_node(self, node) -> dict:
+        """
+        Returns the deleted Document's courseId and userId, whose cached
+        graphs included it.
+        """
+        result = current_app.config['NEO4J_GRAPH'].query("""
             MATCH (d:Document)
             WHERE ID(d) = $nodeId
+            WITH d, d.courseId AS courseId, d.userId AS userId
             DETACH DELETE d
+            RETURN courseId, userId
             """,
             params={"nodeId": node["id"]}
-        )
\ No newline at end of file
+        )
+
+        return result[0] if len(result) > 0 else {}
\ No newline at end of file
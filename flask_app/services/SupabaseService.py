@@ -1,14 +1,23 @@
 from io import BytesIO
 import logging
-from typing import List
+from functools import lru_cache
+from typing import Any, Dict, List
 from supabase import Client
 from flask import current_app
 from flask_app.services.HelperService import HelperService
+from flask_app.src.note_status_writer import CoalescingNoteWriter
 
 from flask_app.constants import NOTE_TABLE_NAME, QUIZ_QUESTION_TABLE_NAME, QUIZ_TABLE_NAME
 
 supabase: Client = current_app.config['SUPABASE_CLIENT']
 
+_note_writer: CoalescingNoteWriter | None = None
+
+# Note ids are validated once, in a bounded cache, not on every status update
+@lru_cache(maxsize=4096)
+def _is_valid_note_id(noteId: str) -> bool:
+    return HelperService.validate_all_uuid4(noteId)
+
 class SupabaseService:
 
     @staticmethod
@@ -46,17 +55,20 @@ class SupabaseService:
         file: BytesIO,
         fileName: str, 
         bucketName: str,
-        contentType: str
+        contentType: str,
+        updateNote: bool = True
     ) -> str | None:
         try:
             response = supabase.storage.from_(bucketName).upload(
                 fileName,
                 file,
-                file_options={'content-type': contentType}
+                # Overwrite what an earlier attempt of the same job uploaded
+                file_options={'content-type': contentType, 'upsert': 'true'}
             )
 
             json = response.json()
-            SupabaseService.update_note(fileName, 'sourceUrl', "file url placeholder")
+            if updateNote:
+                SupabaseService.update_note(fileName, 'sourceUrl', "file url placeholder")
             logging.info(f'Uploaded file: {fileName} to bucket: {bucketName}')
             logging.info(f'File ID: {json["Id"]}')
             return json['Id']
@@ -64,16 +76,41 @@ class SupabaseService:
             logging.exception(f'Exception in upload_file: {e}')
             return None
     
+    @staticmethod
+    def note_writer() -> CoalescingNoteWriter:
+        global _note_writer
+        if _note_writer is None:
+            _note_writer = CoalescingNoteWriter(
+                write=SupabaseService.write_note_fields,
+                interval=float(current_app.config['NOTE_STATUS_FLUSH_SECONDS'])
+            )
+        return _note_writer
+
+    @staticmethod
+    def flush_note_updates():
+        if _note_writer is not None:
+            _note_writer.flush()
+
     @staticmethod
     def update_note(noteId: str, key: str, value: str):
-        if not HelperService.validate_all_uuid4(noteId):
+        SupabaseService.update_note_fields(noteId, {key: value})
+
+    @staticmethod
+    def update_note_fields(noteId: str, fields: Dict[str, Any]):
+        """
+        Queues the fields for the note. Updates are merged per note and
+        written together, terminal statuses are written immediately.
+        """
+        if not _is_valid_note_id(noteId):
             logging.error(f'Invalid noteId: {noteId}')
             return None
 
-        logging.info(f'Updating note {noteId} with key {key} and value {value}')
-        return supabase.table(NOTE_TABLE_NAME).update({
-            key: value
-            }).eq('id', noteId).execute().data
+        SupabaseService.note_writer().update(noteId, fields)
+
+    @staticmethod
+    def write_note_fields(noteId: str, fields: Dict[str, Any]):
+        logging.info(f'Updating note {noteId} with keys {list(fields.keys())}')
+        return supabase.table(NOTE_TABLE_NAME).update(fields).eq('id', noteId).execute().data
     
     @staticmethod
     def create_quiz(
@@ -105,13 +142,46 @@ class SupabaseService:
         return quizId
     
     @staticmethod
-    def add_quiz_question(
-        quizId: str, 
+    def add_quiz_questions(
+        quizId: str,
+        numQuestions: int
     ) -> List[str]:
+        """
+        Creates all question rows for a quiz in one insert and returns their
+        ids in order. PostgREST runs a bulk insert as a single statement, so
+        either every row is created or none is.
+        """
         if not HelperService.validate_all_uuid4(quizId):
             logging.error(f'Invalid quizId: {quizId}')
             return []
 
-        return supabase.table(QUIZ_QUESTION_TABLE_NAME).insert({
-            'quizId': quizId,
-        }).execute().data
+        if numQuestions <= 0:
+            return []
+
+        try:
+            rows = supabase.table(QUIZ_QUESTION_TABLE_NAME).insert(
+                [{'quizId': quizId} for _ in range(numQuestions)]
+            ).execute().data
+        except Exception as e:
+            logging.exception(f'Exception in add_quiz_questions: {e}')
+            return []
+
+        questionIds = [row['id'] for row in rows]
+
+        if len(questionIds) != numQuestions:
+            logging.error(f'Expected {numQuestions} questions for quiz {quizId}, got {len(questionIds)}')
+            SupabaseService.delete_quiz_questions(questionIds)
+            return []
+
+        return questionIds
+
+    @staticmethod
+    def delete_quiz_questions(questionIds: List[str]) -> None:
+        if len(questionIds) == 0:
+            return
+
+        try:
+            supabase.table(QUIZ_QUESTION_TABLE_NAME).delete().in_('id', questionIds).execute()
+            logging.info(f'Deleted {len(questionIds)} quiz questions')
+        except Exception as e:
+            logging.exception(f'Exception in delete_quiz_questions: {e}')
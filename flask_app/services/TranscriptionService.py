@@ -0,0 +1,656 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from flask import current_app
+from flask_app.src.audio_segments import normalize_segments, segments_duration, segments_to_chunks
+from flask_app.src.audio_splitter import stitch_parts
+from flask_app.src.document_sources.text_loader import get_text_chunks_langchain
+from flask_app.src.entities.source_node import sourceNode
+from flask_app.src.graphDB_dataAccess import graphDBdataAccess
+from flask_app.src.main import processing_source
+from .CommunityService import CommunityService
+from .RunpodService import RunpodService
+from .SimilarityService import SimilarityService
+from .SupabaseService import SupabaseService
+
+
+class TranscriptionStatus:
+    SUBMITTING = 'submitting'
+    SUBMITTED = 'submitted'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+ACTIVE_STATUSES = [TranscriptionStatus.SUBMITTED, TranscriptionStatus.RUNNING]
+
+# Runpod job status -> transcription status
+RUNPOD_TRANSITIONS = {
+    'IN_QUEUE': TranscriptionStatus.SUBMITTED,
+    'IN_PROGRESS': TranscriptionStatus.RUNNING,
+    'COMPLETED': TranscriptionStatus.COMPLETED,
+    'FAILED': TranscriptionStatus.FAILED,
+    'CANCELLED': TranscriptionStatus.FAILED,
+    'TIMED_OUT': TranscriptionStatus.FAILED,
+}
+
+
+class TranscriptionService:
+    """
+    Audio transcription as a resumable state machine kept on a
+    (:Transcription {noteId}) node:
+    submitting -> submitted -> running -> completed | failed.
+
+    The node is written in the submitting state before anything is sent to
+    Runpod, and each Runpod job id is recorded as soon as it is returned,
+    so a retried AUDIO job resumes the submission instead of repeating it.
+
+    Nothing waits on the GPU. submit() queues the Runpod job and a poll job;
+    each poll is a single status request that re-queues itself while the
+    Runpod job is active. A Runpod webhook, when configured, advances the
+    same state, and whichever arrives first hands the transcript to graph
+    creation. The hand-off is recorded separately (handedOff), so a poll
+    finishes one that was interrupted after the transcription completed.
+
+    In streaming mode (AUDIO_STREAM_SEGMENTS) the poller alone drives the
+    job: it reads the segments Runpod has streamed so far and builds the
+    graph one AUDIO_STREAM_WINDOW_SECONDS window at a time while the rest
+    of the audio is still being transcribed.
+
+    Long audio is split at silences (AUDIO_SPLIT_*) and transcribed as
+    several Runpod jobs in parallel; the poller tracks the parts and
+    stitches their segments back together in order.
+    """
+
+    @staticmethod
+    def submit(noteId: str, courseId: str, userId: str, fileName: str, keywords: str) -> str:
+        TranscriptionService.start(
+            noteId=noteId,
+            courseId=courseId,
+            userId=userId,
+            fileName=fileName,
+            streaming=bool(current_app.config['AUDIO_STREAM_SEGMENTS']),
+            keywords=keywords
+        )
+
+        runpodJobId = TranscriptionService.submit_jobs(noteId, keywords)
+
+        logging.info(f"Transcription for note {noteId} submitted as Runpod job {runpodJobId}")
+
+        return runpodJobId
+
+    @staticmethod
+    def submit_parts(
+        noteId: str,
+        courseId: str,
+        userId: str,
+        fileName: str,
+        keywords: str,
+        parts: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Transcribes audio split by audio_splitter.split_audio as one Runpod
+        job per part, already uploaded under part['fileName']. At most
+        AUDIO_SPLIT_MAX_PARALLEL parts run at once, the poller submits the
+        rest as earlier parts finish and stitches the results in order.
+        """
+        parts = [
+            {key: value for key, value in part.items() if key != 'wav'} | {
+                'status': 'queued', 'attempts': 0, 'runpodJobId': None, 'segments': None
+            }
+            for part in parts
+        ]
+
+        TranscriptionService.start(
+            noteId=noteId,
+            courseId=courseId,
+            userId=userId,
+            fileName=fileName,
+            streaming=bool(current_app.config['AUDIO_STREAM_SEGMENTS']),
+            parts=parts,
+            keywords=keywords
+        )
+
+        TranscriptionService.submit_jobs(noteId, keywords, parts)
+
+        logging.info(f"Transcription for note {noteId} split into {len(parts)} Runpod jobs")
+
+    @staticmethod
+    def start(
+        noteId: str,
+        courseId: str,
+        userId: str,
+        fileName: str,
+        streaming: bool,
+        parts: List[Dict[str, Any]] = None,
+        keywords: str = None
+    ) -> None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MERGE (t:Transcription {noteId: $noteId})
+        SET t.runpodJobId = null,
+            t.status = $status,
+            t.courseId = $courseId,
+            t.userId = $userId,
+            t.fileName = $fileName,
+            t.submittedAt = $now,
+            t.updatedAt = $now,
+            t.error = null,
+            t.streaming = $streaming,
+            t.segmentsRead = 0,
+            t.pendingSegments = '[]',
+            t.nextPosition = 0,
+            t.transcript = '',
+            t.parts = $parts,
+            t.ingestedParts = 0,
+            t.keywords = $keywords,
+            t.handedOff = false
+        """, {
+            'noteId': noteId,
+            'status': TranscriptionStatus.SUBMITTING,
+            'courseId': courseId,
+            'userId': userId,
+            'fileName': fileName,
+            'now': time.time(),
+            'streaming': streaming,
+            'parts': json.dumps(parts) if parts is not None else None,
+            'keywords': keywords
+        })
+
+    @staticmethod
+    def submit_jobs(noteId: str, keywords: str, parts: List[Dict[str, Any]] = None) -> str:
+        """
+        Submits the Runpod jobs of a transcription in the submitting state,
+        then moves it to submitted and queues the poller. Parts that an
+        earlier attempt already submitted are not submitted again.
+        """
+        from .JobService import JobService, JobType
+
+        if parts is not None:
+            TranscriptionService.submit_queued_parts(noteId, keywords, parts)
+            runpodJobId = f"split:{noteId}"
+        else:
+            runpodJobId = RunpodService.submit(
+                fileName=noteId,
+                keywords=keywords,
+                webhook=TranscriptionService.webhook_url(noteId)
+            )
+
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MATCH (t:Transcription {noteId: $noteId})
+        SET t.runpodJobId = $runpodJobId,
+            t.status = $status,
+            t.submittedAt = $now,
+            t.updatedAt = $now
+        """, {
+            'noteId': noteId,
+            'runpodJobId': runpodJobId,
+            'status': TranscriptionStatus.SUBMITTED,
+            'now': time.time()
+        })
+
+        JobService.enqueue(
+            jobType=JobType.TRANSCRIPTION_POLL,
+            args=(noteId,),
+            delay=float(current_app.config['RUNPOD_POLL_INTERVAL_SECONDS']),
+            dedupeKey=f"transcription:{noteId}"
+        )
+
+        return runpodJobId
+
+    @staticmethod
+    def webhook_url(noteId: str) -> str | None:
+        base = current_app.config['RUNPOD_WEBHOOK_BASE_URL']
+        secret = current_app.config['RUNPOD_WEBHOOK_SECRET']
+
+        if not base or not secret:
+            return None
+
+        return f"{base.rstrip('/')}/runpod/webhook/{noteId}?token={secret}"
+
+    @staticmethod
+    def get_state(noteId: str) -> Dict[str, Any] | None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        result = graphAccess.execute_query("""
+        MATCH (t:Transcription {noteId: $noteId})
+        RETURN t.runpodJobId AS runpodJobId, t.status AS status, t.courseId AS courseId,
+            t.userId AS userId, t.fileName AS fileName, t.submittedAt AS submittedAt,
+            coalesce(t.streaming, false) AS streaming, coalesce(t.segmentsRead, 0) AS segmentsRead,
+            coalesce(t.pendingSegments, '[]') AS pendingSegments, coalesce(t.nextPosition, 0) AS nextPosition,
+            coalesce(t.transcript, '') AS transcript, t.parts AS parts,
+            coalesce(t.ingestedParts, 0) AS ingestedParts, t.keywords AS keywords,
+            coalesce(t.handedOff, true) AS handedOff
+        """, {'noteId': noteId})
+
+        if len(result) == 0:
+            return None
+
+        state = dict(result[0])
+        state['pendingSegments'] = json.loads(state['pendingSegments'])
+        state['parts'] = json.loads(state['parts']) if state['parts'] is not None else None
+        return state
+
+    @staticmethod
+    def transition(noteId: str, runpodJobId: str, status: str, error: str = None, transcript: str = None) -> bool:
+        """
+        Moves an active transcription to status. The node is locked before the
+        status is checked, so of a racing poll and webhook only one gets to
+        finish the transcription. Returns whether this call changed the state.
+        """
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        result = graphAccess.execute_query("""
+        MATCH (t:Transcription {noteId: $noteId, runpodJobId: $runpodJobId})
+        CALL apoc.lock.nodes([t])
+        WITH t
+        WHERE t.status IN $active AND t.status <> $status
+        SET t.status = $status, t.updatedAt = $now, t.error = $error,
+            t.transcript = coalesce($transcript, t.transcript)
+        RETURN t.status AS status
+        """, {
+            'noteId': noteId,
+            'runpodJobId': runpodJobId,
+            'active': ACTIVE_STATUSES,
+            'status': status,
+            'now': time.time(),
+            'error': error,
+            'transcript': transcript
+        })
+
+        return len(result) > 0
+
+    @staticmethod
+    def advance(noteId: str, runpodJobId: str, runpodStatus: Dict[str, Any]) -> str | None:
+        """
+        Applies one Runpod status response, from a poll or the webhook, and
+        returns the transcription status afterwards.
+        """
+        status = RUNPOD_TRANSITIONS.get(runpodStatus.get('status'))
+
+        if status is None:
+            logging.warning(f"Unknown Runpod status for note {noteId}: {runpodStatus.get('status')}")
+            state = TranscriptionService.get_state(noteId)
+            return state['status'] if state is not None else None
+
+        if status == TranscriptionStatus.COMPLETED:
+            try:
+                rawText = RunpodService.parse_whisper_output(runpodStatus['output'])
+            except Exception as e:
+                logging.exception(f"Unreadable transcript for note {noteId}: {e}")
+                return TranscriptionService.fail(noteId, runpodJobId, f"Unreadable transcript: {e}")
+
+            return TranscriptionService.complete(noteId, runpodJobId, rawText)
+
+        if status == TranscriptionStatus.FAILED:
+            return TranscriptionService.fail(noteId, runpodJobId, runpodStatus.get('error') or runpodStatus.get('status'))
+
+        TranscriptionService.transition(noteId, runpodJobId, status)
+        return status
+
+    @staticmethod
+    def complete(noteId: str, runpodJobId: str, rawText: str) -> str:
+        """
+        Keeps the full transcript on the Transcription node and hands it to
+        graph creation.
+        """
+        if not TranscriptionService.transition(noteId, runpodJobId, TranscriptionStatus.COMPLETED, transcript=rawText):
+            return TranscriptionService.get_state(noteId)['status']
+
+        TranscriptionService.hand_off(noteId, TranscriptionService.get_state(noteId))
+
+        return TranscriptionStatus.COMPLETED
+
+    @staticmethod
+    def hand_off(noteId: str, state: Dict[str, Any]) -> None:
+        """
+        Stores the transcript on the note and, unless the graph was built
+        while streaming, queues graph creation for a completed transcription.
+        Safe to repeat: the graph job is deduplicated and the hand-off is only
+        recorded once everything before it succeeded.
+        """
+        from .JobService import JobService, JobType
+
+        SupabaseService.update_note_fields(noteId, {
+            'contentStatus': 'complete',
+            'rawContent': state['transcript']
+        })
+
+        if state['streaming']:
+            similar = TranscriptionService.remove_if_duplicate(noteId, state) if state['nextPosition'] > 0 else None
+
+            if similar:
+                SupabaseService.update_note(noteId=noteId, key='graphStatus', value='already-exists')
+            else:
+                if state['nextPosition'] > 0:
+                    CommunityService.mark_note_dirty(noteId=noteId)
+                    CommunityService.mark_course_dirty(courseId=state['courseId'], noteId=noteId)
+
+                SupabaseService.update_note(noteId, 'graphStatus', 'complete')
+        else:
+            JobService.enqueue(
+                jobType=JobType.TEXT,
+                args=(noteId, state['courseId'], state['userId'], state['transcript'], state['fileName']),
+                dedupeKey=f"graph:{noteId}"
+            )
+
+        TranscriptionService.mark_handed_off(noteId)
+
+        logging.info(f"Transcription for note {noteId} complete, handed off to graph creation")
+
+    @staticmethod
+    def remove_if_duplicate(noteId: str, state: Dict[str, Any]) -> str | None:
+        """
+        The duplicate check create_graph_from_raw_text runs before building a
+        graph, run on the full transcript of a streamed note once its graph
+        is built. A duplicate's streamed graph is removed again. Returns the
+        similar note's id, if any.
+        """
+        similarityService = SimilarityService(
+            similarity_threshold=0.9,
+            word_edit_distance=5
+        )
+
+        similar = similarityService.has_similar_documents(
+            courseId=state['courseId'],
+            noteId=noteId,
+            documents=get_text_chunks_langchain(state['transcript'])
+        )
+
+        if similar:
+            logging.info(f"Streamed transcription for note {noteId} is similar to {similar}, removing its graph")
+            graphDBdataAccess(current_app.config['NEO4J_GRAPH']).reset_note_graph(noteId)
+
+        return similar
+
+    @staticmethod
+    def mark_handed_off(noteId: str) -> None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MATCH (t:Transcription {noteId: $noteId})
+        SET t.handedOff = true, t.updatedAt = $now
+        """, {'noteId': noteId, 'now': time.time()})
+
+    @staticmethod
+    def fail(noteId: str, runpodJobId: str, error: str) -> str:
+        if TranscriptionService.transition(noteId, runpodJobId, TranscriptionStatus.FAILED, error=str(error)):
+            logging.error(f"Transcription for note {noteId} failed: {error}")
+            SupabaseService.update_note(noteId, 'contentStatus', 'error')
+        return TranscriptionStatus.FAILED
+
+    @staticmethod
+    def poll(noteId: str) -> None:
+        """
+        Job handler: one non-blocking status check, then re-queue itself
+        while the Runpod job is still active and within RUNPOD_TIMEOUT_SECONDS.
+        """
+        from .JobService import JobService, JobType
+
+        state = TranscriptionService.get_state(noteId)
+
+        if state is None:
+            return
+
+        if state['status'] == TranscriptionStatus.COMPLETED and not state['handedOff']:
+            # The transcription completed but graph creation was never queued
+            TranscriptionService.hand_off(noteId, state)
+            return
+
+        if state['status'] not in ACTIVE_STATUSES:
+            return
+
+        if state['parts'] is not None:
+            status = TranscriptionService.advance_parts(noteId, state)
+        elif state['streaming']:
+            status = TranscriptionService.consume_stream(noteId, state)
+        else:
+            status = TranscriptionService.advance(noteId, state['runpodJobId'], RunpodService.get_status(state['runpodJobId']))
+
+        if status not in ACTIVE_STATUSES:
+            return
+
+        if time.time() - state['submittedAt'] > float(current_app.config['RUNPOD_TIMEOUT_SECONDS']):
+            TranscriptionService.fail(noteId, state['runpodJobId'], 'Timed out waiting for Runpod')
+            return
+
+        JobService.enqueue(
+            jobType=JobType.TRANSCRIPTION_POLL,
+            args=(noteId,),
+            delay=float(current_app.config['RUNPOD_POLL_INTERVAL_SECONDS']),
+            dedupeKey=f"transcription:{noteId}"
+        )
+
+    @staticmethod
+    def save_progress(
+        noteId: str,
+        segmentsRead: int,
+        pendingSegments: List[Dict[str, Any]],
+        nextPosition: int = None,
+        transcript: str = None,
+        ingestedParts: int = None
+    ) -> None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MATCH (t:Transcription {noteId: $noteId})
+        SET t.segmentsRead = $segmentsRead,
+            t.pendingSegments = $pendingSegments,
+            t.nextPosition = coalesce($nextPosition, t.nextPosition),
+            t.transcript = coalesce($transcript, t.transcript),
+            t.ingestedParts = coalesce($ingestedParts, t.ingestedParts),
+            t.updatedAt = $now
+        """, {
+            'noteId': noteId,
+            'segmentsRead': segmentsRead,
+            'pendingSegments': json.dumps(pendingSegments),
+            'nextPosition': nextPosition,
+            'transcript': transcript,
+            'ingestedParts': ingestedParts,
+            'now': time.time()
+        })
+
+    @staticmethod
+    def consume_stream(noteId: str, state: Dict[str, Any]) -> str | None:
+        """
+        Reads newly streamed segments and ingests them once a full window
+        has built up. On completion the segments that were never streamed
+        are taken from the job output, the rest is ingested and the note
+        is finished.
+        """
+        runpodJobId = state['runpodJobId']
+        response = RunpodService.get_stream(runpodJobId)
+        status = RUNPOD_TRANSITIONS.get(response.get('status'))
+
+        streamed = normalize_segments([item.get('output') for item in response.get('stream') or []])
+        segments = state['pendingSegments'] + streamed
+        segmentsRead = state['segmentsRead'] + len(streamed)
+
+        if status == TranscriptionStatus.FAILED:
+            return TranscriptionService.fail(noteId, runpodJobId, response.get('error') or response.get('status'))
+
+        if status == TranscriptionStatus.COMPLETED:
+            remaining = normalize_segments(RunpodService.get_status(runpodJobId).get('output'))[segmentsRead:]
+            segments += remaining
+            segmentsRead += len(remaining)
+
+        # Streamed items are handed out once, keep them before doing anything that can fail
+        TranscriptionService.save_progress(noteId, segmentsRead, segments)
+
+        if status == TranscriptionStatus.COMPLETED or \
+                segments_duration(segments) >= float(current_app.config['AUDIO_STREAM_WINDOW_SECONDS']):
+            state = TranscriptionService.ingest_window(noteId, state, segments, segmentsRead)
+
+        if status == TranscriptionStatus.COMPLETED:
+            return TranscriptionService.finish_stream(noteId, state)
+
+        if status is not None:
+            TranscriptionService.transition(noteId, runpodJobId, status)
+            return status
+
+        return state['status']
+
+    @staticmethod
+    def ingest_window(
+        noteId: str,
+        state: Dict[str, Any],
+        segments: List[Dict[str, Any]],
+        segmentsRead: int,
+        ingestedParts: int = None
+    ) -> Dict[str, Any]:
+        """
+        Builds the graph for one window of segments. Progress is only saved
+        once the window is written, so a window that failed partway is
+        ingested again by the next poll; whatever it wrote is deleted first.
+        """
+        chunks = segments_to_chunks(segments, int(current_app.config['AUDIO_CHUNK_MAX_CHARACTERS']))
+
+        if len(chunks) == 0:
+            return state
+
+        graphDb_data_Access = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        # Positions are 1-based, this window's chunks start at nextPosition + 1
+        graphDb_data_Access.execute_query("""
+        MATCH (c:Chunk {noteId: $noteId})
+        WHERE c.position > $nextPosition
+        DETACH DELETE c
+        """, {'noteId': noteId, 'nextPosition': state['nextPosition']})
+
+        if state['nextPosition'] == 0:
+            graphDb_data_Access.create_source_node(sourceNode(
+                file_type='audio',
+                file_source='audio',
+                model=current_app.config['MODEL'],
+                courseId=state['courseId'],
+                userId=state['userId'],
+                fileName=state['fileName'],
+                created_at=datetime.now(),
+                noteId=noteId
+            ))
+
+        logging.info(f"Ingesting {len(chunks)} transcript chunks for note {noteId} from position {state['nextPosition']}")
+
+        processing_source(
+            graphDb_data_Access=graphDb_data_Access,
+            fileName=state['fileName'],
+            pages=None,
+            allowedNodes=[],
+            allowedRelationship=[],
+            userId=state['userId'],
+            courseId=state['courseId'],
+            noteId=noteId,
+            chunks=chunks,
+            startI=state['nextPosition']
+        )
+
+        text = " ".join(chunk.page_content for chunk in chunks)
+        state = {
+            **state,
+            'segmentsRead': segmentsRead,
+            'pendingSegments': [],
+            'nextPosition': state['nextPosition'] + len(chunks),
+            'transcript': f"{state['transcript']} {text}".strip()
+        }
+
+        TranscriptionService.save_progress(
+            noteId, segmentsRead, [], nextPosition=state['nextPosition'], transcript=state['transcript'],
+            ingestedParts=ingestedParts
+        )
+
+        return state
+
+    @staticmethod
+    def finish_stream(noteId: str, state: Dict[str, Any]) -> str:
+        if not TranscriptionService.transition(noteId, state['runpodJobId'], TranscriptionStatus.COMPLETED):
+            return TranscriptionService.get_state(noteId)['status']
+
+        TranscriptionService.hand_off(noteId, state)
+
+        logging.info(f"Streamed transcription for note {noteId} complete, {state['nextPosition']} chunks")
+
+        return TranscriptionStatus.COMPLETED
+
+    @staticmethod
+    def submit_queued_parts(noteId: str, keywords: str, parts: List[Dict[str, Any]]) -> None:
+        limit = int(current_app.config['AUDIO_SPLIT_MAX_PARALLEL'])
+        running = sum(1 for part in parts if part['status'] == 'submitted')
+
+        for part in parts:
+            if running >= limit:
+                break
+            if part['status'] != 'queued':
+                continue
+
+            part['runpodJobId'] = RunpodService.submit(fileName=part['fileName'], keywords=keywords)
+            part['status'] = 'submitted'
+            part['attempts'] += 1
+            running += 1
+
+            # Recorded per part, so a retry never submits a part twice
+            TranscriptionService.save_parts(noteId, parts)
+
+    @staticmethod
+    def save_parts(noteId: str, parts: List[Dict[str, Any]], ingestedParts: int = None) -> None:
+        graphAccess = graphDBdataAccess(current_app.config['NEO4J_GRAPH'])
+
+        graphAccess.execute_query("""
+        MATCH (t:Transcription {noteId: $noteId})
+        SET t.parts = $parts, t.ingestedParts = coalesce($ingestedParts, t.ingestedParts), t.updatedAt = $now
+        """, {'noteId': noteId, 'parts': json.dumps(parts), 'ingestedParts': ingestedParts, 'now': time.time()})
+
+    @staticmethod
+    def advance_parts(noteId: str, state: Dict[str, Any]) -> str:
+        """
+        One status request per running part, then tops the running parts up
+        to the fan-out limit. A failed part is retried once. In streaming
+        mode every finished prefix of parts is ingested straight away,
+        otherwise the stitched transcript goes to graph creation at the end.
+        """
+        runpodJobId = state['runpodJobId']
+        parts = state['parts']
+
+        for part in parts:
+            if part['status'] != 'submitted':
+                continue
+
+            response = RunpodService.get_status(part['runpodJobId'])
+            status = RUNPOD_TRANSITIONS.get(response.get('status'))
+
+            if status == TranscriptionStatus.COMPLETED:
+                part['segments'] = normalize_segments(response.get('output'))
+                part['status'] = 'done'
+            elif status == TranscriptionStatus.FAILED:
+                if part['attempts'] >= 2:
+                    TranscriptionService.save_parts(noteId, parts, state['ingestedParts'])
+                    return TranscriptionService.fail(noteId, runpodJobId, f"Part {part['index']} failed: {response.get('error') or response.get('status')}")
+                part['status'] = 'queued'
+
+        TranscriptionService.submit_queued_parts(noteId, state['keywords'], parts)
+
+        ingestedParts = state['ingestedParts']
+        done = 0
+        while done < len(parts) and parts[done]['status'] == 'done':
+            done += 1
+
+        TranscriptionService.save_parts(noteId, parts, ingestedParts)
+
+        if state['streaming'] and done > ingestedParts:
+            # Saved together with the window's nextPosition, so a failed window is retried as a whole
+            state = TranscriptionService.ingest_window(
+                noteId, state, stitch_parts(parts[ingestedParts:done]), 0, ingestedParts=done
+            )
+
+        if done < len(parts):
+            TranscriptionService.transition(noteId, runpodJobId, TranscriptionStatus.RUNNING)
+            return TranscriptionStatus.RUNNING
+
+        if state['streaming']:
+            return TranscriptionService.finish_stream(noteId, state)
+
+        rawText = " ".join((segment.get('text') or '').strip() for segment in stitch_parts(parts)).strip()
+        return TranscriptionService.complete(noteId, runpodJobId, rawText)
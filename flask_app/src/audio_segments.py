@@ -0,0 +1,70 @@
+from typing import Any, Dict, List
+
+from langchain.docstore.document import Document
+
+from flask_app.src.process_file import clean_file
+
+
+def normalize_segments(output: Any) -> List[Dict[str, Any]]:
+    """
+    Whisper output, a streamed item or a whole result, as a list of
+    {"text", "start", "end"} segments.
+    """
+    if output is None:
+        return []
+    if isinstance(output, list):
+        return [segment for item in output for segment in normalize_segments(item)]
+    if isinstance(output, dict) and 'data' in output:
+        return normalize_segments(output['data'])
+    if isinstance(output, dict) and 'output' in output:
+        return normalize_segments(output['output'])
+    if isinstance(output, dict) and 'text' in output:
+        return [output]
+    return []
+
+
+def segments_duration(segments: List[Dict[str, Any]]) -> float:
+    if len(segments) == 0:
+        return 0.0
+    return float(segments[-1].get('end') or 0) - float(segments[0].get('start') or 0)
+
+
+def segments_to_chunks(segments: List[Dict[str, Any]], max_characters: int) -> List[Document]:
+    """
+    Groups consecutive segments into chunks of up to max_characters, never
+    splitting a segment, so every chunk keeps the start and end time of
+    the audio it covers.
+    """
+    chunks = []
+    texts = []
+    length = 0
+    start = None
+    end = None
+
+    def emit():
+        chunks.append(Document(
+            page_content=" ".join(texts),
+            metadata={'start_time': start, 'end_time': end}
+        ))
+
+    for segment in segments:
+        text = (segment.get('text') or '').strip()
+        if not text:
+            continue
+
+        if texts and length + len(text) + 1 > max_characters:
+            emit()
+            texts, length, start = [], 0, None
+
+        if start is None:
+            start = segment.get('start')
+        end = segment.get('end')
+        texts.append(text)
+        length += len(text) + 1
+
+    if texts:
+        emit()
+
+    clean_file(chunks)
+
+    return chunks
@@ -0,0 +1,129 @@
+import io
+import logging
+import subprocess
+import wave
+from typing import Any, Dict, List
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.05
+
+
+def decode_audio(content: bytes) -> np.ndarray:
+    """
+    Decodes any format ffmpeg understands to 16 kHz mono 16-bit PCM,
+    which is also what Whisper resamples to.
+    """
+    process = subprocess.run(
+        ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', 'pipe:0',
+         '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+        input=content,
+        capture_output=True,
+        check=True
+    )
+    return np.frombuffer(process.stdout, dtype=np.int16)
+
+
+def encode_wav(samples: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def frame_energy(samples: np.ndarray) -> np.ndarray:
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    count = len(samples) // frame
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def find_cut_points(samples: np.ndarray, target_seconds: float, search_seconds: float) -> List[float]:
+    """
+    Cut times, in seconds, roughly every target_seconds. Each cut is moved
+    to the quietest frame within search_seconds of its target so it lands
+    in a pause rather than mid-word.
+    """
+    energy = frame_energy(samples)
+    duration = len(samples) / SAMPLE_RATE
+
+    cuts = []
+    target = target_seconds
+    while target < duration - target_seconds / 2:
+        low = max(0, int((target - search_seconds) / FRAME_SECONDS))
+        high = min(len(energy), int((target + search_seconds) / FRAME_SECONDS) + 1)
+        if high <= low:
+            break
+        cut = (low + int(np.argmin(energy[low:high]))) * FRAME_SECONDS
+        cuts.append(cut)
+        target = cut + target_seconds
+
+    return cuts
+
+
+def split_audio(
+    content: bytes,
+    target_seconds: float,
+    overlap_seconds: float,
+    search_seconds: float,
+    min_seconds: float
+) -> List[Dict[str, Any]]:
+    """
+    Splits audio at silences into parts of about target_seconds, each
+    padded by overlap_seconds / 2 into its neighbours. A part owns the time
+    between its own cuts, [ownStart, ownEnd), which stitch_parts uses to
+    drop the overlap again. Returns no parts for audio shorter than
+    min_seconds or that ffmpeg cannot decode, to be transcribed whole.
+    """
+    try:
+        samples = decode_audio(content)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.warning(f"Could not decode audio for splitting, transcribing it whole: {e}")
+        return []
+
+    duration = len(samples) / SAMPLE_RATE
+
+    if duration < min_seconds:
+        return []
+
+    bounds = [0.0] + find_cut_points(samples, target_seconds, search_seconds) + [duration]
+    pad = overlap_seconds / 2
+
+    parts = []
+    for i in range(len(bounds) - 1):
+        start = max(0.0, bounds[i] - pad)
+        end = min(duration, bounds[i + 1] + pad)
+        parts.append({
+            'index': i,
+            'start': start,
+            'end': end,
+            'ownStart': bounds[i],
+            'ownEnd': bounds[i + 1],
+            'last': i == len(bounds) - 2,
+            'wav': encode_wav(samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)])
+        })
+
+    logging.info(f"Split {duration:.0f}s of audio into {len(parts)} parts")
+
+    return parts
+
+
+def stitch_parts(parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Joins the parts' Whisper segments in order on the original timeline.
+    A segment is kept only by the part owning its midpoint, which removes
+    the text transcribed twice in the overlaps.
+    """
+    stitched = []
+    for part in sorted(parts, key=lambda part: part['index']):
+        for segment in part.get('segments') or []:
+            start = float(segment.get('start') or 0) + part['start']
+            end = float(segment.get('end') or 0) + part['start']
+            middle = (start + end) / 2
+            if part['ownStart'] <= middle and (middle < part['ownEnd'] or part['last']):
+                stitched.append({**segment, 'start': start, 'end': end})
+    return stitched
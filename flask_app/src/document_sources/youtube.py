@@ -1,19 +1,20 @@
-from langchain_community.document_loaders import YoutubeLoader
+from langchain.docstore.document import Document
 from pytube import YouTube
-from youtube_transcript_api import YouTubeTranscriptApi 
+from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
 import logging
+import threading
+from typing import Any, Dict, List
 from urllib.parse import urlparse,parse_qs
 
-def get_youtube_transcript(youtube_id):
-  try:
-    transcript_dict = YouTubeTranscriptApi.get_transcript(youtube_id)
-    transcript=''
-    for td in transcript_dict:
-      transcript += ''.join(td['text'])
-    return transcript
-  except Exception as e:
-    message = f"Youtube transcript is not available for youtube Id: {youtube_id}"
-    raise Exception(message)
+from flask_app.src.shared.youtube_cache import get_youtube_cache, serialize_youtube_source, deserialize_youtube_source
+
+TRANSCRIPT_LANGUAGES = ["en-US", "en-gb", "en-ca", "en-au","zh-CN", "zh-Hans", "zh-TW", "fr-FR","de-DE","it-IT","ja-JP","pt-BR","ru-RU","es-ES"]
+TRANSLATION_LANGUAGE = "en"
+
+# One fetch per video at a time within a worker, later callers wait for the cache.
+# Videos share a fixed set of striped locks so the set never grows.
+FETCH_LOCK_STRIPES = 64
+_fetch_locks = [threading.Lock() for _ in range(FETCH_LOCK_STRIPES)]
 
 
 def create_youtube_url(url):
@@ -27,17 +28,108 @@ def create_youtube_url(url):
     if pth:
       return you_tu_url + pth[-1].strip()
 
-  
-def get_documents_from_youtube(url):
+
+def get_youtube_video_id(url: str) -> str | None:
+    youtube_url = create_youtube_url(url.strip())
+    if youtube_url is None:
+      return None
+    video_id = parse_qs(urlparse(youtube_url).query).get('v')
+    return video_id[0] if video_id and video_id[0] else None
+
+
+def fetch_youtube_source(video_id: str) -> Dict[str, Any]:
+    """
+    The network part: one transcript request, translated to English like
+    YoutubeLoader did, and one metadata request. Missing metadata is not
+    fatal, the video id then stands in for the title.
+    """
+    transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
     try:
-      youtube_loader = YoutubeLoader.from_youtube_url(url, 
-                                                      language=["en-US", "en-gb", "en-ca", "en-au","zh-CN", "zh-Hans", "zh-TW", "fr-FR","de-DE","it-IT","ja-JP","pt-BR","ru-RU","es-ES"],
-                                                      translation = "en",
-                                                      add_video_info=True)
-      pages = youtube_loader.load()
-      file_name = YouTube(url).title
-      return file_name, pages
+      transcript = transcript_list.find_transcript(TRANSCRIPT_LANGUAGES)
+    except NoTranscriptFound:
+      transcript = transcript_list.find_transcript(["en"])
+
+    if not transcript.language_code.startswith(TRANSLATION_LANGUAGE):
+      transcript = transcript.translate(TRANSLATION_LANGUAGE)
+
+    pieces = [
+      {'text': piece['text'], 'start': piece.get('start'), 'duration': piece.get('duration')}
+      for piece in transcript.fetch()
+    ]
+
+    metadata = {'title': video_id}
+    try:
+      video = YouTube(f"https://www.youtube.com/watch?v={video_id}")
+      metadata = {
+        'title': video.title or video_id,
+        'description': video.description or "Unknown",
+        'view_count': video.views or 0,
+        'thumbnail_url': video.thumbnail_url or "Unknown",
+        'publish_date': video.publish_date.strftime("%Y-%m-%d %H:%M:%S") if video.publish_date else "Unknown",
+        'length': video.length or 0,
+        'author': video.author or "Unknown",
+      }
     except Exception as e:
-      error_message = str(e)
-      logging.exception(f'Exception in reading transcript from youtube:{error_message}')
-      raise Exception(error_message)  
+      logging.warning(f"Youtube metadata is not available for youtube Id: {video_id}: {e}")
+
+    return {
+      'videoId': video_id,
+      'language': transcript.language_code,
+      'transcript': pieces,
+      'metadata': metadata
+    }
+
+
+def get_youtube_source(url: str) -> Dict[str, Any]:
+    """
+    Transcript and metadata of a video, fetched at most once per video id
+    and shared through the on-disk cache by every note, course and worker.
+    Raises when the video has no usable transcript.
+    """
+    video_id = get_youtube_video_id(url)
+    if video_id is None:
+      raise Exception(f"Incoming URL is not a youtube URL: {url}")
+
+    cache = get_youtube_cache()
+    data = cache.get(video_id)
+    if data is not None:
+      return deserialize_youtube_source(data)
+
+    with _fetch_locks[hash(video_id) % FETCH_LOCK_STRIPES]:
+      data = cache.get(video_id)
+      if data is not None:
+        return deserialize_youtube_source(data)
+
+      try:
+        source = fetch_youtube_source(video_id)
+      except Exception as e:
+        logging.exception(f'Exception in reading transcript from youtube: {e}')
+        raise Exception(f"Youtube transcript is not available for youtube Id: {video_id}")
+
+      if len(youtube_source_text(source)) == 0:
+        raise Exception(f"Youtube transcript is not available for youtube Id: {video_id}")
+
+      cache.set(video_id, serialize_youtube_source(source))
+      logging.info(f"Fetched youtube source {video_id}, {len(source['transcript'])} transcript pieces")
+
+      return source
+
+
+def youtube_source_text(source: Dict[str, Any]) -> str:
+    return " ".join(piece['text'].strip(" ") for piece in source['transcript']).strip()
+
+
+def youtube_source_pages(source: Dict[str, Any]) -> List[Document]:
+    return [Document(
+      page_content=youtube_source_text(source),
+      metadata={'source': source['videoId'], **source['metadata']}
+    )]
+
+
+def get_youtube_transcript(youtube_id):
+  return youtube_source_text(get_youtube_source(create_youtube_url(youtube_id)))
+
+
+def get_documents_from_youtube(url):
+    source = get_youtube_source(url)
+    return source['metadata']['title'], youtube_source_pages(source)
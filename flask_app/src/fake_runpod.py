@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, List
+
+
+class FakeRunpodClient:
+    """
+    Answers the status requests RunpodService sends through
+    Endpoint.rp_client.get from the fake endpoint's jobs.
+    """
+
+    def __init__(self, endpoint: 'FakeRunpodEndpoint'):
+        self.endpoint = endpoint
+
+    def get(self, endpoint: str, timeout: int = 10, headers: Dict = None) -> Dict[str, Any]:
+        # Paths look like "<endpoint_id>/status/<job_id>" or "<endpoint_id>/stream/<job_id>"
+        _, route, job_id = endpoint.rsplit('/', 2)
+        if route == 'stream':
+            return self.endpoint.job_stream(job_id)
+        return self.endpoint.job_status(job_id)
+
+
+class FakeRunpodJob:
+    def __init__(self, endpoint: 'FakeRunpodEndpoint', job_id: str):
+        self.endpoint = endpoint
+        self.job_id = job_id
+
+    def status(self) -> str:
+        return self.endpoint.job_status(self.job_id)['status']
+
+
+class FakeRunpodEndpoint:
+    """
+    Local stand-in for runpod.Endpoint running the Whisper worker, for
+    development and tests without a GPU. Jobs stay IN_QUEUE, then
+    IN_PROGRESS, and complete (or fail) after delay seconds with output in
+    the Whisper worker's {"data": [{"text", "start", "end"}]} shape. While
+    in progress, /stream hands out the segments produced so far, each
+    one only once.
+
+    Jobs are kept in a SQLite file, so a job submitted by one gunicorn
+    worker can be polled from another or from the job worker process.
+    Set RUNPOD_FAKE=1 to use it in create_app.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint_id: str = 'fake-whisper',
+        delay: float = 2.0,
+        segments: List[Dict[str, Any]] = None,
+        fail: bool = False
+    ):
+        self.path = path
+        self.endpoint_id = endpoint_id
+        self.delay = delay
+        self.segments = segments if segments is not None else [
+            {'text': 'This is a fake transcript.', 'start': 0.0, 'end': 2.5},
+            {'text': 'It was produced by the local Runpod endpoint.', 'start': 2.5, 'end': 6.0},
+        ]
+        self.fail = fail
+        self.rp_client = FakeRunpodClient(self)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fake_runpod_jobs (
+                    id TEXT PRIMARY KEY,
+                    input TEXT NOT NULL,
+                    submitted REAL NOT NULL,
+                    streamed INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._initialized = True
+
+        return conn
+
+    def run(self, request_input: Dict[str, Any]) -> FakeRunpodJob:
+        job_id = f"fake-{uuid.uuid4()}"
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO fake_runpod_jobs (id, input, submitted) VALUES (?, ?, ?)",
+                (job_id, json.dumps(request_input), time.time())
+            )
+        finally:
+            conn.close()
+
+        return FakeRunpodJob(self, job_id)
+
+    def job_input(self, job_id: str) -> Dict[str, Any] | None:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT input FROM fake_runpod_jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+        return json.loads(row['input']) if row is not None else None
+
+    def _status(self, job_id: str, submitted: float | None) -> Dict[str, Any]:
+        if submitted is None:
+            return {'id': job_id, 'status': 'FAILED', 'error': 'Unknown job'}
+
+        elapsed = time.time() - submitted
+
+        if elapsed < self.delay / 2:
+            return {'id': job_id, 'status': 'IN_QUEUE'}
+        if elapsed < self.delay:
+            return {'id': job_id, 'status': 'IN_PROGRESS'}
+        if self.fail:
+            return {'id': job_id, 'status': 'FAILED', 'error': 'Fake failure'}
+
+        return {'id': job_id, 'status': 'COMPLETED', 'output': {'data': list(self.segments)}}
+
+    def job_status(self, job_id: str) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT submitted FROM fake_runpod_jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+        return self._status(job_id, row['submitted'] if row is not None else None)
+
+    def job_stream(self, job_id: str) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            # Claiming the streamed segments is one transaction across processes
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT submitted, streamed FROM fake_runpod_jobs WHERE id = ?", (job_id,)).fetchone()
+            status = self._status(job_id, row['submitted'] if row is not None else None)
+
+            if row is None or status['status'] == 'FAILED':
+                conn.execute("COMMIT")
+                return {'status': status['status'], 'stream': []}
+
+            # Segments become available evenly over the in-progress half of the delay
+            progress = (time.time() - row['submitted'] - self.delay / 2) / max(self.delay / 2, 1e-6)
+            available = max(0, min(len(self.segments), int(progress * len(self.segments))))
+            sent = row['streamed']
+
+            conn.execute(
+                "UPDATE fake_runpod_jobs SET streamed = ? WHERE id = ?",
+                (max(sent, available), job_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return {
+            'status': status['status'],
+            'stream': [{'output': segment} for segment in self.segments[sent:available]]
+        }
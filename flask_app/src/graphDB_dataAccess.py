@@ -3,6 +3,7 @@ import os
 from flask import current_app
 from langchain_community.graphs import Neo4jGraph
 from flask_app.src.entities.source_node import sourceNode
+from flask_app.services.GraphCacheService import GraphCacheService
 import json
 
 class graphDBdataAccess:
@@ -128,6 +129,34 @@ class graphDBdataAccess:
         if self.graph:
             return "Connection Successful"
 
+    def reset_note_graph(self, noteId):
+        """
+        Removes what an earlier, interrupted run for the note wrote, so a
+        retried ingestion job starts from scratch instead of adding a
+        second set of chunks. Concepts are shared and only lose their
+        membership of the note; course and user memberships may come from
+        other notes, so they are left alone.
+        """
+        chunks = self.graph.query("""
+            MATCH (c:Chunk {noteId: $noteId})
+            WITH c, c.courseId AS courseId, c.userId AS userId
+            DETACH DELETE c
+            RETURN DISTINCT courseId, userId
+            """, {"noteId": noteId})
+        self.graph.query("""
+            MATCH (d:Document {noteId: $noteId})
+            DETACH DELETE d
+            """, {"noteId": noteId})
+        self.graph.query("""
+            MATCH (:Concept)-[r:IN_NOTE]->(:Note {id: $noteId})
+            DELETE r
+            """, {"noteId": noteId})
+
+        # Cached graphs of the note's scopes included the deleted chunks and memberships
+        GraphCacheService.bump(noteId=noteId)
+        for scope in chunks:
+            GraphCacheService.bump(courseId=scope['courseId'], userId=scope['userId'])
+
     def execute_query(self, query, param=None):
         return self.graph.query(query, param)
 
@@ -0,0 +1,116 @@
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Tuple
+
+NODE_TYPES = ['Document', 'Chunk', 'Concept']
+
+# Node properties returned per type, besides id and communityId
+NODE_FIELDS = {
+    'Document': ('fileName',),
+    'Chunk': ('position',),
+    'Concept': ('conceptId', 'description'),
+}
+
+RELATED_PREFIX = "relatedNode"
+FIELD_NAMES = ('id', 'labels', 'fileName', 'position', 'conceptId', 'description', 'communityId')
+
+
+def resolve_columns(return_params: List[Tuple[str, str]]) -> Tuple[Dict[str, str], Dict[str, str], str | None]:
+    """
+    Maps each node field to its column alias, once per query, for the node
+    itself (nodeId, position, ...) and the related node (relatedNodeId,
+    relatedNodePosition, ...). Also returns the relationship type column.
+    """
+    aliases = {alias for _, alias in return_params}
+
+    def alias_for(field: str, related: bool) -> str | None:
+        if related:
+            alias = RELATED_PREFIX + field[0].upper() + field[1:]
+        elif field in ('id', 'labels'):
+            alias = "node" + field[0].upper() + field[1:]
+        else:
+            alias = field
+        return alias if alias in aliases else None
+
+    node_columns = {field: alias_for(field, related=False) for field in FIELD_NAMES}
+    related_columns = {field: alias_for(field, related=True) for field in FIELD_NAMES}
+    rel_type_column = "relType" if "relType" in aliases else None
+
+    return node_columns, related_columns, rel_type_column
+
+
+def assemble_graph(
+    records: List[Dict[str, Any]],
+    return_params: List[Tuple[str, str]]
+) -> Tuple[Dict[str, List[Dict]], List[Dict[str, Any]]]:
+    """
+    Builds the get-graph-for response in one pass over the id columns.
+    A node is typed and its properties read the first time its id is seen,
+    as the node or as the related node of a row. Rows seen later only fill
+    in a communityId that the first sighting could not provide.
+    """
+    node_columns, related_columns, rel_type_column = resolve_columns(return_params)
+
+    def column(alias: str | None) -> Iterable:
+        return [record.get(alias) for record in records] if alias is not None else repeat(None)
+
+    groups = {node_type: {} for node_type in NODE_TYPES}
+    seen: Dict[Any, Dict | None] = {}
+    relationships = []
+
+    def add(record: Dict[str, Any], columns: Dict[str, str]) -> None:
+        node_id = record.get(columns['id'])
+        labels = record.get(columns['labels'])
+
+        node_type = next((label for label in NODE_TYPES if label in labels), None) if labels is not None else None
+        if node_type is None:
+            seen[node_id] = None
+            return
+
+        info = {'id': node_id}
+        for field in NODE_FIELDS[node_type]:
+            info[field] = record.get(columns[field]) if columns[field] is not None else None
+        if columns['communityId'] is not None:
+            info['communityId'] = record.get(columns['communityId'])
+
+        seen[node_id] = info
+        groups[node_type][node_id] = info
+
+    def fill_community(record: Dict[str, Any], node_id: Any, columns: Dict[str, str]) -> None:
+        info = seen[node_id]
+        if info is not None and columns['communityId'] is not None and 'communityId' not in info:
+            info['communityId'] = record.get(columns['communityId'])
+
+    # Rows without an id or labels column are skipped, same for related nodes without an id
+    node_enabled = node_columns['id'] is not None and node_columns['labels'] is not None
+    related_enabled = related_columns['id'] is not None and related_columns['labels'] is not None
+    # Only when one side lacks the communityId column can a node be missing it after its first sighting
+    needs_fill = (node_columns['communityId'] is None) != (related_columns['communityId'] is None)
+
+    node_ids = column(node_columns['id'] if node_enabled else None)
+    related_ids = column(related_columns['id'])
+    rel_types = column(rel_type_column)
+
+    for record, node_id, related_id, rel_type in zip(records, node_ids, related_ids, rel_types):
+        if node_enabled:
+            if node_id not in seen:
+                add(record, node_columns)
+            elif needs_fill:
+                fill_community(record, node_id, node_columns)
+
+        if related_id is not None and related_enabled:
+            if related_id not in seen:
+                if record.get(related_columns['labels']) is not None:
+                    add(record, related_columns)
+            elif needs_fill:
+                fill_community(record, related_id, related_columns)
+
+        if node_enabled and related_id is not None and rel_type is not None:
+            relationships.append({
+                "start_node_id": node_id,
+                "relationship_type": rel_type,
+                "end_node_id": related_id
+            })
+
+    nodes = {node_type.lower() + 's': list(group.values()) for node_type, group in groups.items()}
+
+    return nodes, relationships
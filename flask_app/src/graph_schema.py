@@ -0,0 +1,166 @@
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import List, Tuple
+from langchain_community.graphs import Neo4jGraph
+
+from flask_app.src.shared.constants import EMBEDDING_DIMENSION, MEMBERSHIP_SCOPES
+
+SCHEMA_NAME = 'notello'
+
+# A crashed migration's lock expires after this long
+MIGRATION_LOCK_SECONDS = 3600
+MIGRATION_WAIT_SECONDS = 5
+
+# Ordered (version, statements) pairs. Append new versions, never edit applied ones.
+SCHEMA_MIGRATIONS: List[Tuple[int, List[str]]] = [
+    (1, [
+        f"""CREATE VECTOR INDEX `vector` IF NOT EXISTS FOR (c:Chunk) ON (c.embedding)
+        OPTIONS {{indexConfig: {{
+            `vector.dimensions`: {EMBEDDING_DIMENSION},
+            `vector.similarity_function`: 'cosine'
+        }}}}""",
+        f"""CREATE VECTOR INDEX `doc_embedding` IF NOT EXISTS FOR (d:Document) ON (d.embedding)
+        OPTIONS {{indexConfig: {{
+            `vector.dimensions`: {EMBEDDING_DIMENSION},
+            `vector.similarity_function`: 'cosine'
+        }}}}""",
+        "CREATE CONSTRAINT chunk_id_unique IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE",
+        "CREATE CONSTRAINT concept_id_unique IF NOT EXISTS FOR (c:Concept) REQUIRE c.id IS UNIQUE",
+        "CREATE CONSTRAINT document_noteId_unique IF NOT EXISTS FOR (d:Document) REQUIRE d.noteId IS UNIQUE",
+        "CREATE INDEX chunk_noteId IF NOT EXISTS FOR (c:Chunk) ON (c.noteId)",
+        "CREATE INDEX chunk_courseId IF NOT EXISTS FOR (c:Chunk) ON (c.courseId)",
+        "CREATE INDEX concept_noteId IF NOT EXISTS FOR (c:Concept) ON (c.noteId)",
+        "CREATE INDEX concept_courseId IF NOT EXISTS FOR (c:Concept) ON (c.courseId)",
+        "CREATE INDEX document_courseId IF NOT EXISTS FOR (d:Document) ON (d.courseId)",
+    ]),
+    # Concept noteId/courseId/userId lists become edges to indexed scope nodes
+    (2, [
+        f"CREATE CONSTRAINT {label.lower()}_id_unique IF NOT EXISTS FOR (s:{label}) REQUIRE s.id IS UNIQUE"
+        for label, _ in MEMBERSHIP_SCOPES.values()
+    ] + [
+        f"""MATCH (c:Concept) WHERE c.{key} IS NOT NULL
+        CALL {{
+            WITH c
+            UNWIND c.{key} AS scopeId
+            MERGE (s:{label} {{id: scopeId}})
+            MERGE (c)-[:{rel}]->(s)
+        }} IN TRANSACTIONS OF 1000 ROWS"""
+        for key, (label, rel) in MEMBERSHIP_SCOPES.items()
+    ]),
+    (3, [
+        "CREATE CONSTRAINT transcription_noteId_unique IF NOT EXISTS FOR (t:Transcription) REQUIRE t.noteId IS UNIQUE",
+    ]),
+    # Registry of processed YouTube videos, shared by all courses
+    (4, [
+        "CREATE CONSTRAINT youtubevideo_id_unique IF NOT EXISTS FOR (v:YoutubeVideo) REQUIRE v.id IS UNIQUE",
+    ]),
+    # Concept scope lists were replaced by membership edges in version 2, and
+    # range indexes never served `x IN c.courseId` lookups on them anyway
+    (5, [
+        "DROP INDEX concept_noteId IF EXISTS",
+        "DROP INDEX concept_courseId IF EXISTS",
+    ]),
+]
+
+
+def get_schema_version(graph: Neo4jGraph) -> int:
+    result = graph.query(
+        "MATCH (s:SchemaVersion {name: $name}) RETURN s.version AS version",
+        {"name": SCHEMA_NAME}
+    )
+
+    if len(result) == 0 or result[0]['version'] is None:
+        return 0
+
+    return int(result[0]['version'])
+
+
+def claim_schema_migration(graph: Neo4jGraph, owner: str, latest_version: int) -> bool:
+    """
+    Takes the migration lock on the (:SchemaVersion) node if the schema is
+    behind and nobody else holds an unexpired lock. The node lock makes the
+    check and the claim atomic, so of concurrent callers only one migrates.
+    """
+    now = time.time()
+
+    result = graph.query("""
+        MERGE (s:SchemaVersion {name: $name})
+        WITH s
+        CALL apoc.lock.nodes([s])
+        WITH s
+        WHERE coalesce(s.version, 0) < $latestVersion
+            AND (s.lockedBy IS NULL OR s.lockedUntil < $now)
+        SET s.lockedBy = $owner, s.lockedUntil = $now + $lockSeconds
+        RETURN s.lockedBy AS owner
+        """,
+        {"name": SCHEMA_NAME, "latestVersion": latest_version, "owner": owner,
+         "now": now, "lockSeconds": MIGRATION_LOCK_SECONDS}
+    )
+
+    return len(result) > 0
+
+
+def release_schema_migration(graph: Neo4jGraph, owner: str) -> None:
+    graph.query(
+        """
+        MATCH (s:SchemaVersion {name: $name}) WHERE s.lockedBy = $owner
+        REMOVE s.lockedBy, s.lockedUntil
+        """,
+        {"name": SCHEMA_NAME, "owner": owner}
+    )
+
+
+def apply_schema_migrations(graph: Neo4jGraph) -> int:
+    """
+    Bring the graph schema (indexes and constraints) up to the latest version.
+
+    Runs once per deployment, from gunicorn's on_starting hook through
+    `python -m flask_app.migrate`, before any app worker is started, so
+    request handlers never issue DDL. The applied version is stored on a
+    (:SchemaVersion) node, which makes repeat runs a single read. A second
+    deployment starting at the same time waits for the first to finish
+    instead of running the migrations, and their backfills, again.
+    """
+    latest_version = SCHEMA_MIGRATIONS[-1][0]
+    current_version = get_schema_version(graph)
+
+    if current_version >= latest_version:
+        logging.info(f"Graph schema is at version {current_version}")
+        return current_version
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4()}"
+
+    while not claim_schema_migration(graph, owner, latest_version):
+        current_version = get_schema_version(graph)
+        if current_version >= latest_version:
+            logging.info(f"Graph schema was migrated to version {current_version} by another process")
+            return current_version
+        logging.info("Waiting for another process to finish the graph schema migration")
+        time.sleep(MIGRATION_WAIT_SECONDS)
+
+    try:
+        current_version = get_schema_version(graph)
+
+        for version, statements in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+
+            logging.info(f"Applying graph schema version {version}")
+
+            for statement in statements:
+                graph.query(statement)
+
+            graph.query(
+                "MERGE (s:SchemaVersion {name: $name}) SET s.version = $version, s.appliedAt = datetime()",
+                {"name": SCHEMA_NAME, "version": version}
+            )
+            current_version = version
+    finally:
+        release_schema_migration(graph, owner)
+
+    logging.info(f"Graph schema is at version {current_version}")
+
+    return current_version
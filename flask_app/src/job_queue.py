@@ -0,0 +1,313 @@
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Tuple
+
+from flask import Flask
+
+
+class SqliteJobQueue:
+    """
+    Durable job queue on a local SQLite file shared by every worker process.
+
+    Jobs are claimed with a lease. A job whose lease runs out (the worker was
+    recycled or killed) is claimed again by the next free worker until it has
+    used up max_attempts. Only the worker holding the current claim can
+    complete or fail a job, so a run that lost its lease can't overwrite
+    the status of the run that replaced it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    args BLOB NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    error TEXT,
+                    worker TEXT,
+                    dedupe_key TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    run_after REAL NOT NULL,
+                    locked_until REAL
+                )
+            """)
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if 'dedupe_key' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN dedupe_key TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status)")
+            self._initialized = True
+
+        return conn
+
+    def enqueue(
+        self,
+        job_type: str,
+        args: Tuple,
+        priority: int,
+        max_attempts: int = 3,
+        delay: float = 0,
+        dedupe_key: str = None
+    ) -> str:
+        """
+        Add a job, runnable after delay seconds. If dedupe_key is given and a
+        queued job with the same key exists, no job is added and that job's
+        id is returned, which coalesces repeated requests into one run.
+        """
+        jobId = str(uuid.uuid4())
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            if dedupe_key is not None:
+                existing = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status = 'queued' LIMIT 1",
+                    (dedupe_key,)
+                ).fetchone()
+
+                if existing is not None:
+                    conn.execute("COMMIT")
+                    return existing['id']
+
+            conn.execute(
+                """
+                INSERT INTO jobs (id, type, priority, args, status, max_attempts, dedupe_key, created_at, updated_at, run_after)
+                VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)
+                """,
+                (jobId, job_type, priority, pickle.dumps(args), max_attempts, dedupe_key, now, now, now + delay)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return jobId
+
+    def claim(self, worker: str, lease_seconds: float) -> Tuple[str, str, Tuple] | None:
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = 'Lease expired on final attempt', updated_at = ?
+                WHERE status = 'running' AND locked_until < ? AND attempts >= max_attempts
+                """,
+                (now, now)
+            )
+
+            row = conn.execute(
+                """
+                SELECT id, type, args FROM jobs
+                WHERE (status = 'queued' AND run_after <= ?)
+                   OR (status = 'running' AND locked_until < ?)
+                ORDER BY priority ASC, created_at ASC
+                LIMIT 1
+                """,
+                (now, now)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?,
+                    locked_until = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (worker, now + lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+
+            return row['id'], row['type'], pickle.loads(row['args'])
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, jobIds, lease_seconds: float) -> None:
+        if len(jobIds) == 0:
+            return
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE jobs SET locked_until = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                [(now + lease_seconds, now, jobId) for jobId in jobIds]
+            )
+        finally:
+            conn.close()
+
+    def complete(self, jobId: str, worker: str) -> bool:
+        """
+        Returns False if worker no longer holds the job's claim.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'complete', locked_until = NULL, updated_at = ?, args = ?
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (time.time(), pickle.dumps(()), jobId, worker)
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def fail(self, jobId: str, worker: str, error: str, retry_delay: float) -> bool:
+        """
+        Returns False if worker no longer holds the job's claim.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET
+                    status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                    run_after = ?, locked_until = NULL, error = ?, updated_at = ?
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (now + retry_delay, error, now, jobId, worker)
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def get(self, jobId: str) -> Dict[str, Any] | None:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """
+                SELECT id, type, priority, status, attempts, max_attempts, error, created_at, updated_at
+                FROM jobs WHERE id = ?
+                """,
+                (jobId,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        return dict(row) if row is not None else None
+
+
+class JobWorkerPool:
+    """
+    Fixed number of threads that run jobs from the queue inside an app context.
+    Runs in the job worker process (flask_app.worker), not in the gunicorn
+    workers serving requests.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        queue: SqliteJobQueue,
+        resolve: Callable[[str], Callable],
+        size: int,
+        lease_seconds: float,
+        poll_interval: float
+    ):
+        self.app = app
+        self.queue = queue
+        self.resolve = resolve
+        self.size = size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = threading.Event()
+        self._running: Dict[str, str] = {}
+        self._running_lock = threading.Lock()
+        self._threads = []
+
+    def start(self) -> None:
+        for i in range(self.size):
+            thread = threading.Thread(target=self._work, args=(f"{self.worker_prefix}:{i}",), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+        logging.info(f"Started {self.size} job workers for {self.worker_prefix}")
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            with self._running_lock:
+                jobIds = list(self._running.keys())
+            try:
+                self.queue.heartbeat(jobIds, self.lease_seconds)
+            except Exception as e:
+                logging.exception(f"Job heartbeat failed: {e}")
+
+    def _work(self, worker: str) -> None:
+        while True:
+            try:
+                claimed = self.queue.claim(worker, self.lease_seconds)
+            except Exception as e:
+                logging.exception(f"Job claim failed: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            jobId, job_type, args = claimed
+
+            with self._running_lock:
+                self._running[jobId] = job_type
+
+            try:
+                logging.info(f"Running job {jobId} of type {job_type} on {worker}")
+                with self.app.app_context():
+                    self.resolve(job_type)(*args)
+                if not self.queue.complete(jobId, worker):
+                    logging.warning(f"Job {jobId} of type {job_type} finished on {worker} after its lease was taken over")
+            except Exception as e:
+                logging.exception(f"Job {jobId} of type {job_type} failed: {e}")
+                if not self.queue.fail(jobId, worker, error=str(e), retry_delay=30):
+                    logging.warning(f"Job {jobId} of type {job_type} failed on {worker} after its lease was taken over")
+            finally:
+                with self._running_lock:
+                    self._running.pop(jobId, None)
@@ -0,0 +1,282 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Tuple
+
+from flask import current_app
+
+# Rough size of the LLMGraphTransformer system prompt and its JSON output
+PROMPT_OVERHEAD_TOKENS = 1000
+
+# After a 429 nobody sharing the budget sends a request for this long
+RATE_LIMIT_PAUSE_SECONDS = 5
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + PROMPT_OVERHEAD_TOKENS
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    return getattr(e, 'status_code', None) == 429 or type(e).__name__ == 'RateLimitError'
+
+
+def is_transient_error(e: Exception) -> bool:
+    return is_rate_limit_error(e) \
+        or getattr(e, 'status_code', None) in (500, 502, 503, 504) \
+        or type(e).__name__ in ('APITimeoutError', 'APIConnectionError')
+
+
+class LocalRateLimiter:
+    """
+    Request and token buckets refilled continuously over a one minute window.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _refill(self, state, now: float):
+        if state is None:
+            return {'requests': float(self.requests_per_minute), 'tokens': float(self.tokens_per_minute), 'at': now, 'pausedUntil': 0.0}
+
+        elapsed = max(0.0, now - state['at'])
+        return {
+            'requests': min(self.requests_per_minute, state['requests'] + elapsed * self.requests_per_minute / 60),
+            'tokens': min(self.tokens_per_minute, state['tokens'] + elapsed * self.tokens_per_minute / 60),
+            'at': now,
+            'pausedUntil': state.get('pausedUntil', 0.0)
+        }
+
+    def _consume(self, state, tokens: int, now: float) -> Tuple[dict, float]:
+        """Returns the new state and how long to wait, 0 if the request was admitted."""
+        state = self._refill(state, now)
+        tokens = min(tokens, self.tokens_per_minute)
+
+        if state['pausedUntil'] > now:
+            return state, state['pausedUntil'] - now
+
+        if state['requests'] >= 1 and state['tokens'] >= tokens:
+            state['requests'] -= 1
+            state['tokens'] -= tokens
+            return state, 0.0
+
+        request_wait = max(0.0, 1 - state['requests']) * 60 / self.requests_per_minute
+        token_wait = max(0.0, tokens - state['tokens']) * 60 / self.tokens_per_minute
+        return state, max(request_wait, token_wait, 0.01)
+
+    def _penalize(self, state, now: float) -> dict:
+        """
+        The API disagrees with our budget: empty the buckets and pause, so
+        every caller backs off, not just the one that got the 429.
+        """
+        state = self._refill(state, now)
+        state['requests'] = 0.0
+        state['tokens'] = 0.0
+        state['pausedUntil'] = max(state['pausedUntil'], now + RATE_LIMIT_PAUSE_SECONDS)
+        return state
+
+    def try_consume(self, tokens: int) -> float:
+        with self._lock:
+            self._state, wait = self._consume(self._state, tokens, time.time())
+            return wait
+
+    def rate_limited(self) -> None:
+        with self._lock:
+            self._state = self._penalize(self._state, time.time())
+
+
+class FileRateLimiter(LocalRateLimiter):
+    """
+    Same buckets, kept in a small JSON file under an exclusive lock so every
+    worker process on the host draws from one budget.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, path: str):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _update(self, update: Callable[[dict, float], Tuple[dict, Any]]) -> Any:
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                try:
+                    state = json.loads(content) if content else None
+                except ValueError:
+                    state = None
+
+                state, result = update(state, time.time())
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def try_consume(self, tokens: int) -> float:
+        return self._update(lambda state, now: self._consume(state, tokens, now))
+
+    def rate_limited(self) -> None:
+        self._update(lambda state, now: (self._penalize(state, now), None))
+
+
+class LLMScheduler:
+    """
+    Meters LLM calls for the whole process.
+
+    Callers wait in one queue per fairness key (usually the noteId) and slots
+    are granted round-robin across keys, so a large note cannot starve small
+    ones. A call also needs request and token budget from the rate limiter.
+    A 429 empties and pauses the budget shared by every process. The
+    concurrency limit is halved on every 429 as well, shrinks by one on a
+    response slower than target_latency and grows by one after a run of
+    fast successes.
+    """
+
+    def __init__(
+        self,
+        rate_limiter: LocalRateLimiter,
+        max_concurrency: int,
+        min_concurrency: int,
+        target_latency: float,
+        max_retries: int = 5
+    ):
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+        self._waiting: OrderedDict[str, deque] = OrderedDict()
+
+    def _is_next(self, key: str, ticket: object) -> bool:
+        first_key = next(iter(self._waiting))
+        return first_key == key and self._waiting[key][0] is ticket
+
+    def acquire(self, key: str, tokens: int) -> None:
+        ticket = object()
+
+        with self._condition:
+            self._waiting.setdefault(key, deque()).append(ticket)
+
+            try:
+                while True:
+                    if self._is_next(key, ticket) and self.in_flight < self.limit:
+                        # The budget may sit behind a cross-process file lock, don't
+                        # hold up release() and the other waiters meanwhile. Only
+                        # the head of the queue gets here, so nobody overtakes it.
+                        self._condition.release()
+                        try:
+                            wait = self.rate_limiter.try_consume(tokens)
+                        finally:
+                            self._condition.acquire()
+                        if wait == 0:
+                            break
+                        self._condition.wait(timeout=wait)
+                    else:
+                        self._condition.wait(timeout=1)
+            except BaseException:
+                self._remove(key, ticket)
+                self._condition.notify_all()
+                raise
+
+            self._remove(key, ticket)
+            # Round robin, this key goes behind every other waiting key
+            if key in self._waiting:
+                self._waiting.move_to_end(key)
+            self.in_flight += 1
+            self._condition.notify_all()
+
+    def _remove(self, key: str, ticket: object) -> None:
+        queue = self._waiting.get(key)
+        if queue is None:
+            return
+        if ticket in queue:
+            queue.remove(ticket)
+        if len(queue) == 0:
+            del self._waiting[key]
+
+    def release(self, latency: float, rate_limited: bool) -> None:
+        if rate_limited:
+            # Shared with every process using the same budget
+            self.rate_limiter.rate_limited()
+
+        with self._condition:
+            self.in_flight -= 1
+
+            if rate_limited:
+                self.limit = max(self.min_concurrency, self.limit // 2)
+                self._successes = 0
+                logging.warning(f"LLM rate limited, concurrency limit now {self.limit}")
+            elif latency <= self.target_latency:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            else:
+                # Slow responses mean the upstream is saturated, back off gently
+                self.limit = max(self.min_concurrency, self.limit - 1)
+                self._successes = 0
+
+            self._condition.notify_all()
+
+    def run(self, key: str, tokens: int, fn: Callable, *args) -> Any:
+        """
+        Call fn once a slot is granted. Rate limit and transient API errors
+        are retried with exponential backoff, re-queueing behind other keys.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(key, tokens)
+            start = time.time()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.release(time.time() - start, is_rate_limit_error(e))
+                if not is_transient_error(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(min(60, 2 ** attempt))
+                continue
+
+            self.release(time.time() - start, False)
+            return result
+
+
+_llm_scheduler: LLMScheduler | None = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        requests_per_minute = int(current_app.config['LLM_REQUESTS_PER_MINUTE'])
+        tokens_per_minute = int(current_app.config['LLM_TOKENS_PER_MINUTE'])
+        path = current_app.config['LLM_RATE_LIMIT_PATH']
+
+        if path:
+            rate_limiter = FileRateLimiter(requests_per_minute, tokens_per_minute, path)
+        else:
+            rate_limiter = LocalRateLimiter(requests_per_minute, tokens_per_minute)
+
+        _llm_scheduler = LLMScheduler(
+            rate_limiter=rate_limiter,
+            max_concurrency=int(current_app.config['LLM_MAX_CONCURRENCY']),
+            min_concurrency=int(current_app.config['LLM_MIN_CONCURRENCY']),
+            target_latency=float(current_app.config['LLM_TARGET_LATENCY_SECONDS'])
+        )
+    return _llm_scheduler
@@ -4,11 +4,13 @@ import logging
 from flask_app.src.create_chunks import CreateChunksofDocument
 from flask_app.src.entities.source_node import sourceNode
 from flask_app.src.graphDB_dataAccess import graphDBdataAccess
-from flask_app.src.make_relationships import create_relation_between_chunks, merge_relationship_between_chunk_and_entities, update_embedding_create_vector_index
+from flask_app.src.make_relationships import create_chunks_with_embeddings, merge_relationship_between_chunk_and_entities
 from flask_app.src.openAI_llm import get_graph_from_OpenAI
 from flask_app.src.shared.common_fn import get_chunk_and_graphDocument, update_graph_documents
 from flask_app.services.SupabaseService import SupabaseService
+from flask_app.services.GraphCacheService import GraphCacheService
 from flask_app.src.process_file import clean_file
+from flask_app.src.pipeline import run_pipeline
 
 from flask import current_app
 
@@ -20,7 +22,9 @@ def processing_source(
       allowedRelationship,
       userId,
       courseId,
-      noteId
+      noteId,
+      chunks = None,
+      startI = 0
       ):
   """
    Extracts a Neo4jGraph from a PDF file based on the model.
@@ -39,45 +43,79 @@ def processing_source(
   """
   start_time = datetime.now()
     
-  clean_file(pages)
-    
-  logging.info("Break down file into chunks")
+  # Streamed audio arrives already chunked, one window at a time starting at position startI
+  if chunks is None:
+    clean_file(pages)
+      
+    logging.info("Break down file into chunks")
 
-  create_chunks_obj = CreateChunksofDocument(pages, fileName)
-  chunks = create_chunks_obj.split_file_into_chunks()
+    create_chunks_obj = CreateChunksofDocument(pages, fileName)
+    chunks = create_chunks_obj.split_file_into_chunks()
 
   obj_source_node = sourceNode(
     status = "Processing",
     fileName = fileName,
     noteId = noteId,
-    total_pages = len(pages),
-    total_chunks = len(chunks),
+    total_pages = len(pages) if pages is not None else None,
+    total_chunks = startI + len(chunks),
     model = current_app.config['MODEL'],
   )
   graphDb_data_Access.update_source_node(obj_source_node)
 
-  SupabaseService.update_note(noteId, 'graphStatus', '1')
+  if startI == 0:
+    SupabaseService.update_note(noteId, 'graphStatus', '1')
   
   logging.info('Update the status as Processing')
   updateGraphChunkProcessed = int(current_app.config['UPDATE_GRAPH_CHUNKS_PROCESSED'])
-  for i in range(0, len(chunks), updateGraphChunkProcessed):
-    select_chunks_upto = min(i + updateGraphChunkProcessed, len(chunks))
-
-    logging.info(f'Selected Chunks upto: {select_chunks_upto}')
 
-    selected_chunks = chunks[i : select_chunks_upto]
+  batches = [
+    (startI + i, chunks[i : min(i + updateGraphChunkProcessed, len(chunks))])
+    for i in range(0, len(chunks), updateGraphChunkProcessed)
+  ]
 
-    process_chunks(
-      chunks=selected_chunks, 
-      allowedNodes=allowedNodes,
-      allowedRelationship=allowedRelationship, 
+  def prepare(batch):
+    startI, selected_chunks = batch
+    logging.info(f'Selected Chunks upto: {startI + len(selected_chunks)}')
+    return startI, selected_chunks, prepare_chunks(
+      chunks=selected_chunks,
       noteId=noteId,
       courseId=courseId,
       userId=userId,
-      startI=i
+      startI=startI
+    )
+
+  def extract(prepared):
+    startI, selected_chunks, chunkId_chunkDoc_list = prepared
+    graph_documents = extract_chunks(
+      chunkId_chunkDoc_list=chunkId_chunkDoc_list,
+      allowedNodes=allowedNodes,
+      allowedRelationship=allowedRelationship,
+      noteId=noteId
     )
+    return startI, selected_chunks, chunkId_chunkDoc_list, graph_documents
 
-    SupabaseService.update_note(noteId, 'graphStatus', str(select_chunks_upto))
+  def write(extracted):
+    startI, selected_chunks, chunkId_chunkDoc_list, graph_documents = extracted
+    write_chunk_graph(
+      chunkId_chunkDoc_list=chunkId_chunkDoc_list,
+      graph_documents=graph_documents,
+      noteId=noteId,
+      courseId=courseId,
+      userId=userId
+    )
+    GraphCacheService.bump(noteId=noteId, courseId=courseId, userId=userId)
+    SupabaseService.update_note(noteId, 'graphStatus', str(startI + len(selected_chunks)))
+
+  # Batches overlap across stages, graph writes stay sequential and in order
+  run_pipeline(
+    items=batches,
+    stages=[
+      (prepare, int(current_app.config['PIPELINE_PREPARE_WORKERS'])),
+      (extract, int(current_app.config['PIPELINE_EXTRACT_WORKERS'])),
+    ],
+    sink=write,
+    max_in_flight=int(current_app.config['PIPELINE_MAX_IN_FLIGHT'])
+  )
 
   end_time = datetime.now()
   processed_time = end_time - start_time
@@ -89,22 +127,20 @@ def processing_source(
     processing_time = processed_time,
   )
   graphDb_data_Access.update_source_node(obj_source_node)
+  GraphCacheService.bump(noteId=noteId, courseId=courseId, userId=userId)
   
   logging.info('Updated the nodeCount and relCount properties in Document node')
   logging.info(f'file:{fileName} extraction has been completed')
 
-def process_chunks(
-    chunks, 
-    allowedNodes,
-    allowedRelationship, 
+def prepare_chunks(
+    chunks,
     noteId,
     courseId,
     userId,
     startI
 ):
-
-  # Creates the first, NEXT_CHUNK relationship between chunks
-  chunkId_chunkDoc_list = create_relation_between_chunks(
+  # Creates the chunks with embeddings and the first, NEXT_CHUNK relationship between chunks
+  return create_chunks_with_embeddings(
      noteId=noteId,
      courseId=courseId,
      userId=userId,
@@ -112,21 +148,29 @@ def process_chunks(
      startI=startI
   )
 
-  # Create vector index and update chunk node with embedding
-  update_embedding_create_vector_index(
-    chunkId_chunkDoc_list=chunkId_chunkDoc_list, 
-    noteId=noteId
-  )
-
+def extract_chunks(
+    chunkId_chunkDoc_list,
+    allowedNodes,
+    allowedRelationship,
+    noteId
+):
   logging.info("Get graph document list from models")
 
   # Generates graph documents from chunks
-  graph_documents = get_graph_from_OpenAI(
+  return get_graph_from_OpenAI(
     chunkId_chunkDoc_list,
     allowedNodes,
-    allowedRelationship
+    allowedRelationship,
+    fairnessKey=noteId
   )
 
+def write_chunk_graph(
+    chunkId_chunkDoc_list,
+    graph_documents,
+    noteId,
+    courseId,
+    userId
+):
   # Saves graph documents in Neo4j
   update_graph_documents(
     graph_document_list=graph_documents,
@@ -142,4 +186,36 @@ def process_chunks(
 
   merge_relationship_between_chunk_and_entities(
     graph_documents_chunk_chunk_Id=chunks_and_graphDocuments_list
-  )
\ No newline at end of file
+  )
+
+def process_chunks(
+    chunks, 
+    allowedNodes,
+    allowedRelationship, 
+    noteId,
+    courseId,
+    userId,
+    startI
+):
+  chunkId_chunkDoc_list = prepare_chunks(
+    chunks=chunks,
+    noteId=noteId,
+    courseId=courseId,
+    userId=userId,
+    startI=startI
+  )
+
+  graph_documents = extract_chunks(
+    chunkId_chunkDoc_list=chunkId_chunkDoc_list,
+    allowedNodes=allowedNodes,
+    allowedRelationship=allowedRelationship,
+    noteId=noteId
+  )
+
+  write_chunk_graph(
+    chunkId_chunkDoc_list=chunkId_chunkDoc_list,
+    graph_documents=graph_documents,
+    noteId=noteId,
+    courseId=courseId,
+    userId=userId
+  )
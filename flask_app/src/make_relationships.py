@@ -1,4 +1,5 @@
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from langchain.docstore.document import Document
 from flask_app.src.shared.common_fn import load_embedding_model
 import logging
@@ -29,94 +30,84 @@ def merge_relationship_between_chunk_and_entities(graph_documents_chunk_chunk_Id
         current_app.config['NEO4J_GRAPH'].query(unwind_query, params={"batch_data": batch_data})
 
     
-def update_embedding_create_vector_index(chunkId_chunkDoc_list, noteId):
+def embed_texts_in_batches(embeddings, texts: List[str], batch_size: int, max_workers: int) -> List[List[float]]:
+    """
+    Embed texts through embed_documents in size-bounded batches.
+
+    Batches are sent concurrently, up to max_workers at a time, and the
+    returned vectors are in the same order as the input texts.
+    """
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    if len(batches) == 0:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+        results = list(executor.map(embeddings.embed_documents, batches))
+
+    return [vector for batch in results for vector in batch]
+
+def embed_chunks(chunkId_chunkDoc_list) -> List[List[float]]:
     embeddings, dimension = load_embedding_model()
     logging.info(f'embedding model:{embeddings} and dimesion:{dimension}')
-    data_for_query = []
-    logging.info(f"update embedding and vector index for chunks")
-    for row in chunkId_chunkDoc_list:
-
-        embeddings_arr = embeddings.embed_query(row['chunk_doc'].page_content)
 
-        data_for_query.append({
-            "chunkId": row['chunk_id'],
-            "embeddings": embeddings_arr
-        })
+    return embed_texts_in_batches(
+        embeddings=embeddings,
+        texts=[row['chunk_doc'].page_content for row in chunkId_chunkDoc_list],
+        batch_size=int(current_app.config['EMBEDDING_BATCH_SIZE']),
+        max_workers=int(current_app.config['EMBEDDING_MAX_WORKERS'])
+    )
 
-        current_app.config['NEO4J_GRAPH'].query("""CREATE VECTOR INDEX `vector` if not exists for (c:Chunk) on (c.embedding)
-                        OPTIONS {indexConfig: {
-                        `vector.dimensions`: $dimensions,
-                        `vector.similarity_function`: 'cosine'
-                        }}
-                    """,
-                    {
-                        "dimensions" : dimension
-                    }
-                    )
-    
-    query_to_create_embedding = """
-        UNWIND $data AS row
-        MATCH (d:Document {noteId: $noteId})
-        MERGE (c:Chunk {id: row.chunkId})
-        SET c.embedding = row.embeddings
-        MERGE (c)-[r:HAS_DOCUMENT {type: 'PART_OF'}]->(d)
-    """       
-    current_app.config['NEO4J_GRAPH'].query(query_to_create_embedding, params={"noteId":noteId, "data":data_for_query})
-    
-def create_relation_between_chunks(
+def create_chunks_with_embeddings(
         noteId, 
         courseId, 
         userId, 
         chunks: List[Document],
         startI
         )->list:
-    logging.info("creating FIRST_CHUNK and NEXT_CHUNK relationships between chunks")
+    """
+    Writes a batch of chunks in one statement: the Chunk nodes with their
+    embeddings, the PART_OF edge to the Document and the FIRST_CHUNK /
+    NEXT_CHUNK chain.
+    """
+    logging.info("creating chunks with embeddings, FIRST_CHUNK and NEXT_CHUNK relationships")
     current_chunk_id = ""
     lst_chunks_including_hash = []
     batch_data = []
-    relationships = []
     for i, chunk in enumerate(chunks):
         realI = startI + i
         previous_chunk_id = current_chunk_id
         current_chunk_id = str(uuid.uuid4())
-        if realI == 0:
-            firstChunk = True
-        else:
-            firstChunk = False  
-        metadata = {"position": realI + 1,"length": len(chunk.page_content)}
-        chunk_document = Document(
-            page_content=chunk.page_content, metadata=metadata
-        )
         
         chunk_data = {
             "id": current_chunk_id,
-            "pg_content": chunk_document.page_content,
+            "pg_content": chunk.page_content,
             "position": realI + 1,
-            "length": chunk_document.metadata["length"],
+            "length": len(chunk.page_content),
             "noteId": noteId,
             "courseId": courseId,
             "userId": userId,
             "previous_id" : previous_chunk_id,
+            "first": realI == 0,
         }
         
         if 'page_number' in chunk.metadata:
             chunk_data['page_number'] = chunk.metadata['page_number']
+
+        # Audio transcripts keep the time range each chunk was spoken in
+        if 'start_time' in chunk.metadata:
+            chunk_data['start_time'] = chunk.metadata['start_time']
+            chunk_data['end_time'] = chunk.metadata['end_time']
             
         batch_data.append(chunk_data)
         
         lst_chunks_including_hash.append({'chunk_id': current_chunk_id, 'chunk_doc': chunk})
-        
-        # create relationships between chunks
-        if firstChunk:
-            relationships.append({"type": "FIRST_CHUNK", "chunk_id": current_chunk_id})
-        else:
-            relationships.append({
-                "type": "NEXT_CHUNK",
-                "previous_chunk_id": previous_chunk_id,
-                "current_chunk_id": current_chunk_id
-            })
+
+    for chunk_data, embedding in zip(batch_data, embed_chunks(lst_chunks_including_hash)):
+        chunk_data['embedding'] = embedding
           
-    query_to_create_chunk_and_PART_OF_relation = """
+    query_to_create_chunks = """
+        OPTIONAL MATCH (d:Document {noteId: $noteId})
         UNWIND $batch_data AS data
         MERGE (c:Chunk {id: data.id})
         SET 
@@ -125,38 +116,21 @@ def create_relation_between_chunks(
         c.length = data.length, 
         c.noteId = data.noteId,
         c.courseId = data.courseId,
-        c.userId = data.userId
-
-        WITH data, c
-        WHERE data.page_number IS NOT NULL
-        SET c.page_number = data.page_number
-        WITH data, c
-        WHERE data.page_number IS NOT NULL
-        SET c.page_number = data.page_number
-        WITH data, c
-        MATCH (d:Document {noteId: data.noteId})
-        MERGE (c)-[r:HAS_DOCUMENT {type: 'PART_OF'}]->(d)
-    """
-    current_app.config['NEO4J_GRAPH'].query(query_to_create_chunk_and_PART_OF_relation, params={"batch_data": batch_data})
-    
-    query_to_create_FIRST_relation = """ 
-        UNWIND $relationships AS relationship
-        MATCH (d:Document {noteId: $noteId})
-        MATCH (c:Chunk {id: relationship.chunk_id})
-        FOREACH(r IN CASE WHEN relationship.type = 'FIRST_CHUNK' THEN [1] ELSE [] END |
+        c.userId = data.userId,
+        c.embedding = data.embedding
+        FOREACH(_ IN CASE WHEN data.page_number IS NOT NULL THEN [1] ELSE [] END |
+                SET c.page_number = data.page_number)
+        FOREACH(_ IN CASE WHEN data.start_time IS NOT NULL THEN [1] ELSE [] END |
+                SET c.start_time = data.start_time, c.end_time = data.end_time)
+        FOREACH(_ IN CASE WHEN d IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (c)-[:HAS_DOCUMENT {type: 'PART_OF'}]->(d))
+        FOREACH(_ IN CASE WHEN d IS NOT NULL AND data.first THEN [1] ELSE [] END |
                 MERGE (d)-[:HAS_CHUNK {type: 'FIRST_CHUNK'}]->(c))
-        """
-    current_app.config['NEO4J_GRAPH'].query(query_to_create_FIRST_relation, params={"noteId": noteId, "relationships": relationships})   
-    
-    query_to_create_NEXT_CHUNK_relation = """ 
-        UNWIND $relationships AS relationship
-        MATCH (c:Chunk {id: relationship.current_chunk_id})
-        WITH c, relationship
-        MATCH (pc:Chunk {id: relationship.previous_chunk_id})
-        FOREACH(r IN CASE WHEN relationship.type = 'NEXT_CHUNK' THEN [1] ELSE [] END |
+        WITH c, data
+        OPTIONAL MATCH (pc:Chunk {id: data.previous_id})
+        FOREACH(_ IN CASE WHEN pc IS NOT NULL THEN [1] ELSE [] END |
                 MERGE (c)<-[:HAS_CHUNK {type: 'NEXT_CHUNK'}]-(pc))
-        """
-    current_app.config['NEO4J_GRAPH'].query(query_to_create_NEXT_CHUNK_relation, params={"relationships": relationships})   
+    """
+    current_app.config['NEO4J_GRAPH'].query(query_to_create_chunks, params={"noteId": noteId, "batch_data": batch_data})
     
     return lst_chunks_including_hash
-
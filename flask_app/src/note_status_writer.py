@@ -0,0 +1,97 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+# Field values after which the note will not change again for a while
+TERMINAL_VALUES = {
+    'graphStatus': {'complete', 'error', 'already-exists'},
+    'contentStatus': {'complete', 'error'},
+}
+
+MAX_FLUSH_FAILURES = 3
+
+
+def is_terminal(fields: Dict[str, Any]) -> bool:
+    return any(fields.get(key) in values for key, values in TERMINAL_VALUES.items())
+
+
+class CoalescingNoteWriter:
+    """
+    Merges note field updates per note and writes each note's pending fields
+    as one update. Pending notes are flushed every interval seconds by a
+    background thread, and straight away on the caller's thread when an
+    update reaches a terminal status, so a finished job has written it.
+
+    A failed terminal write raises on the caller's thread, so the job is
+    retried, and stays pending until it succeeds. Only updates without a
+    terminal status are dropped after MAX_FLUSH_FAILURES failed writes.
+    """
+
+    def __init__(self, write: Callable[[str, Dict[str, Any]], Any], interval: float):
+        self.write = write
+        self.interval = interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Held for a whole flush so an older batch can't land after a newer one
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def update(self, noteId: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.setdefault(noteId, {}).update(fields)
+            self._start()
+
+        if is_terminal(fields):
+            self.flush(noteId, raise_errors=True)
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self, noteId: str = None, raise_errors: bool = False) -> None:
+        error = None
+
+        with self._flush_lock:
+            with self._lock:
+                if noteId is None:
+                    batch, self._pending = self._pending, {}
+                elif noteId in self._pending:
+                    batch = {noteId: self._pending.pop(noteId)}
+                else:
+                    batch = {}
+
+            for pendingId, fields in batch.items():
+                try:
+                    self.write(pendingId, fields)
+                    with self._lock:
+                        self._failures.pop(pendingId, None)
+                except Exception as e:
+                    logging.exception(f"Failed to write note {pendingId} fields {list(fields.keys())}: {e}")
+                    self._requeue(pendingId, fields)
+                    error = e
+
+        if raise_errors and error is not None:
+            raise error
+
+    def _requeue(self, noteId: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            failures = self._failures.get(noteId, 0) + 1
+            # A lost terminal status would leave the note processing forever, keep retrying it
+            if failures >= MAX_FLUSH_FAILURES and not is_terminal(fields):
+                self._failures.pop(noteId, None)
+                logging.error(f"Dropping note {noteId} update after {failures} failed writes")
+                return
+
+            self._failures[noteId] = failures
+            # Newer values for the same fields win over the failed ones
+            self._pending[noteId] = {**fields, **self._pending.get(noteId, {})}
@@ -4,38 +4,66 @@ from concurrent.futures import ThreadPoolExecutor
 from langchain_experimental.graph_transformers import LLMGraphTransformer
 
 from flask_app.src.shared.common_fn import get_combined_chunks, get_llm
+from flask_app.src.llm_scheduler import estimate_tokens, get_llm_scheduler
+from flask_app.src.shared.extraction_cache import deserialize_graph_document, extraction_cache_key, get_extraction_cache, serialize_graph_document
 
 logging.basicConfig(format='%(asctime)s - %(message)s',level='INFO')
 
 from flask import current_app
 
-def get_graph_from_OpenAI(chunkId_chunkDoc_list, allowedNodes, allowedRelationship):
-    futures=[]
+def get_graph_from_OpenAI(chunkId_chunkDoc_list, allowedNodes, allowedRelationship, fairnessKey='default'):
+    futures={}
     graph_document_list=[]
 
     combined_chunk_document_list = get_combined_chunks(chunkId_chunkDoc_list)
 
-    llm = get_llm(current_app.config['MODEL'])
+    model = current_app.config['MODEL']
+    allowed_nodes = ['Concept']
+    node_properties = ["description"]
+
+    cache = get_extraction_cache()
+    keys = [
+        extraction_cache_key(model, allowed_nodes, allowedRelationship, node_properties, chunk.page_content)
+        for chunk in combined_chunk_document_list
+    ]
+    cached = cache.get_many(keys)
+
+    uncached_chunks = []
+    for key, chunk in zip(keys, combined_chunk_document_list):
+        if key in cached:
+            graph_document_list.append(deserialize_graph_document(cached[key], chunk))
+        else:
+            uncached_chunks.append((key, chunk))
+
+    logging.info(f"Extraction cache: {len(combined_chunk_document_list) - len(uncached_chunks)} hits, {len(uncached_chunks)} misses")
+
+    if len(uncached_chunks) == 0:
+        return graph_document_list
+
+    llm = get_llm(model)
     llm_transformer = LLMGraphTransformer(
         llm=llm, 
-        allowed_nodes=['Concept'], 
+        allowed_nodes=allowed_nodes, 
         allowed_relationships=allowedRelationship,
-        node_properties=["description"]
+        node_properties=node_properties
         )
     
+    # Actual LLM concurrency and rate are governed by the shared scheduler
+    scheduler = get_llm_scheduler()
+
     with ThreadPoolExecutor(max_workers=10) as executor:
-        for chunk in combined_chunk_document_list:
-            futures.append(
-                executor.submit(
+        for key, chunk in uncached_chunks:
+            futures[executor.submit(
+                    scheduler.run,
+                    fairnessKey,
+                    estimate_tokens(chunk.page_content),
                     llm_transformer.convert_to_graph_documents,
                     [chunk]
-                ))
+                )] = key
         
-        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+        for future in concurrent.futures.as_completed(futures):
             graph_document = future.result()
-            graph_document_list.append(graph_document[0])   
+            graph_document_list.append(graph_document[0])
+            cache.set(futures[future], serialize_graph_document(graph_document[0]))
 
     return graph_document_list        
-        
-    
-    
@@ -0,0 +1,81 @@
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Tuple
+
+from flask import current_app
+
+
+def _with_app_context(app, fn: Callable) -> Callable:
+    def run(item):
+        with app.app_context():
+            return fn(item)
+    return run
+
+
+def _then(previous: Future, executor: ThreadPoolExecutor, fn: Callable) -> Future:
+    out = Future()
+
+    def resolve(done: Future):
+        if done.cancelled():
+            out.cancel()
+        elif done.exception() is not None:
+            out.set_exception(done.exception())
+        else:
+            out.set_result(done.result())
+
+    def forward(done: Future):
+        if done.cancelled() or done.exception() is not None:
+            resolve(done)
+            return
+        try:
+            following = executor.submit(fn, done.result())
+        except RuntimeError as e:
+            # Executor already shut down because the pipeline is aborting
+            out.set_exception(e)
+            return
+        following.add_done_callback(resolve)
+
+    previous.add_done_callback(forward)
+    return out
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    stages: List[Tuple[Callable, int]],
+    sink: Callable,
+    max_in_flight: int
+) -> None:
+    """
+    Run every item through the stages, then hand it to sink in input order.
+
+    Each stage has its own pool of the given size, so item N+1 can be in an
+    early stage while item N is still in a later one. At most max_in_flight
+    items are between the first stage and sink at any time. sink runs on the
+    calling thread, one item at a time, so writes keep the sequential order.
+    The first exception from any stage is raised from here.
+    """
+    app = current_app._get_current_object()
+
+    executors = [ThreadPoolExecutor(max_workers=max(1, workers)) for _, workers in stages]
+    wrapped = [_with_app_context(app, fn) for fn, _ in stages]
+    pending = deque()
+
+    try:
+        for item in items:
+            while len(pending) >= max(1, max_in_flight):
+                sink(pending.popleft().result())
+
+            future = executors[0].submit(wrapped[0], item)
+            for executor, fn in zip(executors[1:], wrapped[1:]):
+                future = _then(future, executor, fn)
+            pending.append(future)
+
+        while pending:
+            sink(pending.popleft().result())
+    except Exception:
+        logging.exception("Pipeline aborted, cancelling pending items")
+        raise
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,133 @@
+import logging
+import math
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Generator, List, Tuple
+
+from flask import current_app
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.pydantic_v1 import BaseModel, Field
+
+from flask_app.src.shared.common_fn import get_llm
+from flask_app.src.llm_scheduler import estimate_tokens, get_llm_scheduler
+
+MAX_CHUNK_CHARACTERS = 1500
+
+
+class GeneratedAnswer(BaseModel):
+    label: str = Field(description="Answer option shown to the student")
+    correct: bool = Field(description="Whether this option is correct")
+    explanation: str = Field(description="Why this option is correct or incorrect")
+
+
+class GeneratedQuestion(BaseModel):
+    question: str = Field(description="The question text")
+    topics: List[str] = Field(description="Concepts from the context this question tests")
+    answers: List[GeneratedAnswer] = Field(description="Four answer options, exactly one correct")
+
+
+class GeneratedQuestionBatch(BaseModel):
+    questions: List[GeneratedQuestion]
+
+
+QUIZ_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You write multiple choice quiz questions for students from their course notes. "
+     "Only use facts from the given context. Each question has four answer options, "
+     "exactly one of them correct, and every option has a short explanation. "
+     "Difficulty is {difficulty} on a scale of 1 (recall) to 5 (synthesis across concepts)."),
+    ("human",
+     "Write {count} distinct questions.\n\n"
+     "Concepts:\n{concepts}\n\n"
+     "Relationships:\n{relationships}\n\n"
+     "Excerpts:\n{chunks}")
+])
+
+
+def split_topic_graph(topic_graph: Dict[str, Any], numQuestions: int, batchSize: int) -> List[Dict[str, Any]]:
+    """
+    Splits the topic graph into one batch per batchSize questions. Concepts
+    are grouped by community, so batches cover disjoint concepts and mostly
+    disjoint communities, and each batch carries the relationships inside
+    its concepts and a share of the excerpts.
+    """
+    batch_count = max(1, math.ceil(numQuestions / max(1, batchSize)))
+    community_rank = {c['communityId']: i for i, c in enumerate(topic_graph.get('communities', []))}
+
+    concepts = sorted(
+        topic_graph.get('concepts', []),
+        key=lambda concept: community_rank.get(concept['communityId'], len(community_rank))
+    )
+    chunks = topic_graph.get('chunks', [])
+
+    batch_count = min(batch_count, max(1, len(concepts), len(chunks)))
+    # Spread evenly, so every batch gets a concept while there are enough to go round
+    per_batch, extra = divmod(len(concepts), batch_count)
+
+    batches = []
+    start = 0
+    for i in range(batch_count):
+        end = start + per_batch + (1 if i < extra else 0)
+        batch_concepts = concepts[start:end]
+        start = end
+        names = {concept['conceptId'] for concept in batch_concepts}
+        batches.append({
+            'count': numQuestions // batch_count + (1 if i < numQuestions % batch_count else 0),
+            'concepts': batch_concepts,
+            'relationships': [
+                rel for rel in topic_graph.get('relationships', [])
+                if rel['source'] in names and rel['target'] in names
+            ],
+            'chunks': chunks[i::batch_count] if len(chunks) >= batch_count else chunks
+        })
+
+    return batches
+
+
+def format_batch(batch: Dict[str, Any], difficulty: int) -> Dict[str, Any]:
+    return {
+        'difficulty': difficulty,
+        'count': batch['count'],
+        'concepts': "\n".join(
+            f"- {concept['conceptId']}: {concept.get('description') or ''}" for concept in batch['concepts']
+        ) or "(none)",
+        'relationships': "\n".join(
+            f"- {rel['source']} {rel['type']} {rel['target']}" for rel in batch['relationships']
+        ) or "(none)",
+        'chunks': "\n\n".join(
+            (chunk.get('text') or '')[:MAX_CHUNK_CHARACTERS] for chunk in batch['chunks']
+        ) or "(none)"
+    }
+
+
+def generate_questions_from_OpenAI(
+    batches: List[Dict[str, Any]],
+    difficulty: int,
+    fairnessKey: str = 'default'
+) -> Generator[Tuple[int, List[GeneratedQuestion]], None, None]:
+    """
+    Runs every batch as its own structured output call through the shared
+    LLM scheduler and yields (batch index, questions) as each one finishes.
+    """
+    llm = get_llm(current_app.config['MODEL'])
+    chain = QUIZ_PROMPT | llm.with_structured_output(GeneratedQuestionBatch)
+
+    scheduler = get_llm_scheduler()
+    max_workers = max(1, min(len(batches), int(current_app.config['LLM_MAX_CONCURRENCY'])))
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, batch in enumerate(batches):
+            inputs = format_batch(batch, difficulty)
+            tokens = estimate_tokens(inputs['concepts'] + inputs['relationships'] + inputs['chunks'])
+            futures[executor.submit(scheduler.run, fairnessKey, tokens, chain.invoke, inputs)] = i
+
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result: GeneratedQuestionBatch = future.result()
+                i = futures[future]
+                logging.info(f"Generated {len(result.questions)} of {batches[i]['count']} questions for batch {i}")
+                yield i, result.questions[:batches[i]['count']]
+        finally:
+            for future in futures:
+                future.cancel()
@@ -7,6 +7,9 @@ from langchain.docstore.document import Document
 from langchain_community.graphs import Neo4jGraph
 from langchain_community.graphs.graph_document import GraphDocument
 from flask_app.src.graphDB_dataAccess import graphDBdataAccess
+from flask_app.services.GraphCacheService import GraphCacheService
+from flask_app.src.shared.constants import EMBEDDING_DIMENSION
+from flask_app.src.shared.embedding_cache import CachedEmbeddings, get_embedding_cache
 from typing import List, Union
 
 
@@ -63,11 +66,18 @@ def create_graph_database_connection(uri, userName, password, database):
 
 
 def load_embedding_model():
-  embeddings = OpenAIEmbeddings()
-  dimension = 1536
+  openai_embeddings = OpenAIEmbeddings()
+  embeddings = CachedEmbeddings(
+    embeddings=openai_embeddings,
+    model=openai_embeddings.model,
+    cache=get_embedding_cache()
+  )
+  dimension = EMBEDDING_DIMENSION
   logging.info(f"Embedding: Using OpenAI Embeddings , Dimension:{dimension}")
   return embeddings, dimension
 
+SCOPE_PARAM = "CASE WHEN scope:Note THEN 'noteId' WHEN scope:Course THEN 'courseId' ELSE 'userId' END"
+
 def update_graph_documents(
     graph_document_list: List[GraphDocument], 
     noteId: str = None, 
@@ -103,43 +113,41 @@ def update_graph_documents(
                 "type": relationship.type
             })
 
+    # Membership is an edge per scope so appends are O(1) and lookups use the scope node index
     node_query = """
     UNWIND $nodes AS node
     MERGE (n:Concept {id: node.id})
-    ON CREATE SET 
-        n.id = node.id,
-        n.type = node.type,
-        n.noteId = CASE WHEN node.noteId IS NOT NULL THEN [node.noteId] ELSE [] END,
-        n.courseId = CASE WHEN node.courseId IS NOT NULL THEN [node.courseId] ELSE [] END,
-        n.userId = CASE WHEN node.userId IS NOT NULL THEN [node.userId] ELSE [] END
-    ON MATCH SET
-        n.type = node.type,
-        n.noteId = CASE 
-            WHEN node.noteId IS NOT NULL AND NOT node.noteId IN n.noteId 
-            THEN n.noteId + [node.noteId] 
-            ELSE n.noteId 
-        END,
-        n.courseId = CASE 
-            WHEN node.courseId IS NOT NULL AND NOT node.courseId IN n.courseId 
-            THEN n.courseId + [node.courseId] 
-            ELSE n.courseId 
-        END,
-        n.userId = CASE 
-            WHEN node.userId IS NOT NULL AND NOT node.userId IN n.userId 
-            THEN n.userId + [node.userId] 
-            ELSE n.userId 
-        END
+    SET n.type = node.type
+    FOREACH(_ IN CASE WHEN node.noteId IS NOT NULL THEN [1] ELSE [] END |
+        MERGE (note:Note {id: node.noteId})
+        MERGE (n)-[:IN_NOTE]->(note))
+    FOREACH(_ IN CASE WHEN node.courseId IS NOT NULL THEN [1] ELSE [] END |
+        MERGE (course:Course {id: node.courseId})
+        MERGE (n)-[:IN_COURSE]->(course))
+    FOREACH(_ IN CASE WHEN node.userId IS NOT NULL THEN [1] ELSE [] END |
+        MERGE (user:User {id: node.userId})
+        MERGE (n)-[:IN_USER]->(user))
+    WITH DISTINCT n
+    MATCH (n)-[:IN_NOTE|IN_COURSE|IN_USER]->(scope)
+    RETURN DISTINCT """ + SCOPE_PARAM + """ AS param, scope.id AS id
     """
 
+    # A RELATED edge shows up in every scope that contains both of its endpoints
     relationship_query = """
     UNWIND $relationships AS rel
     MATCH (source:Concept {id: rel.source})
     MATCH (target:Concept {id: rel.target})
     MERGE (source)-[r:RELATED {type: rel.type}]->(target)
+    WITH DISTINCT source, target
+    MATCH (source)-[:IN_NOTE|IN_COURSE|IN_USER]->(scope)<-[:IN_NOTE|IN_COURSE|IN_USER]-(target)
+    RETURN DISTINCT """ + SCOPE_PARAM + """ AS param, scope.id AS id
     """
 
-    graphDb_data_Access.execute_query(node_query, {"nodes": nodes_data})
-    graphDb_data_Access.execute_query(relationship_query, {"relationships": relationships_data})
+    scopes = graphDb_data_Access.execute_query(node_query, {"nodes": nodes_data})
+    scopes += graphDb_data_Access.execute_query(relationship_query, {"relationships": relationships_data})
+
+    # Concepts are shared, so the writes can change graphs of other notes, courses and users
+    GraphCacheService.bump_scopes(scopes)
    
 def close_db_connection(graph, api_name):
   if not graph._driver._closed:
@@ -147,9 +155,11 @@ def close_db_connection(graph, api_name):
     graph._driver.close()   
       
 def get_llm(model_version:str) :
+  # Retries are handled by the LLM scheduler so 429s back off globally
   llm = ChatOpenAI(api_key=os.environ.get('OPENAI_KEY'), 
                         model=model_version, 
-                        temperature=0) 
+                        temperature=0,
+                        max_retries=0) 
   logging.info(f"Model created : Model Version: {model_version}")
   return llm
   
@@ -2,4 +2,13 @@ MODEL_VERSIONS = {
         "OpenAI GPT 4o":"gpt-4o"
 }
 OPENAI_MODELS = ["OpenAI GPT 3.5", "OpenAI GPT 4o"]
-GEMINI_MODELS = ["Gemini 1.0 Pro", "Gemini 1.5 Pro"]
\ No newline at end of file
+GEMINI_MODELS = ["Gemini 1.0 Pro", "Gemini 1.5 Pro"]
+EMBEDDING_DIMENSION = 1536
+
+# Concept membership is stored as an edge to one scope node per id,
+# e.g. (:Concept)-[:IN_COURSE]->(:Course {id: courseId})
+MEMBERSHIP_SCOPES = {
+    "noteId": ("Note", "IN_NOTE"),
+    "courseId": ("Course", "IN_COURSE"),
+    "userId": ("User", "IN_USER"),
+}
@@ -0,0 +1,144 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+
+class SqliteLRUCache:
+    """
+    Bounded key/value store on a local SQLite file.
+
+    The file is shared by every gunicorn worker on the host, entries are
+    evicted least-recently-used first once max_entries is exceeded, and
+    hit/miss counters are persisted next to the data so they cover all workers.
+    """
+
+    def __init__(self, path: str, max_entries: int, table: str):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not be shared across a fork (gunicorn preload)
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    name TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO cache_stats (name) VALUES (?)", (self.table,))
+            conn.commit()
+
+            self._conn = conn
+            self._pid = os.getpid()
+
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if len(keys) == 0:
+            return {}
+
+        unique_keys = list(dict.fromkeys(keys))
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                found = {}
+
+                # Stay under SQLite's bound parameter limit
+                for i in range(0, len(unique_keys), 500):
+                    batch = unique_keys[i : i + 500]
+                    placeholders = ", ".join("?" for _ in batch)
+                    rows = conn.execute(
+                        f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})",
+                        batch
+                    ).fetchall()
+                    found.update(rows)
+
+                if found:
+                    conn.executemany(
+                        f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                        [(time.time(), key) for key in found]
+                    )
+
+                hits = sum(1 for key in keys if key in found)
+                conn.execute(
+                    "UPDATE cache_stats SET hits = hits + ?, misses = misses + ? WHERE name = ?",
+                    (hits, len(keys) - hits, self.table)
+                )
+                conn.commit()
+
+                return found
+        except sqlite3.Error as e:
+            logging.exception(f"Cache read failed for {self.table}: {e}")
+            return {}
+
+    def get(self, key: str) -> bytes | None:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, bytes]) -> None:
+        if len(items) == 0:
+            return
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                now = time.time()
+
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, last_used) VALUES (?, ?, ?)",
+                    [(key, value, now) for key, value in items.items()]
+                )
+
+                count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+                if count > self.max_entries:
+                    conn.execute(f"""
+                        DELETE FROM {self.table} WHERE key IN (
+                            SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?
+                        )
+                    """, (count - self.max_entries,))
+
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.exception(f"Cache write failed for {self.table}: {e}")
+
+    def set(self, key: str, value: bytes) -> None:
+        self.set_many({key: value})
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            hits, misses = conn.execute(
+                "SELECT hits, misses FROM cache_stats WHERE name = ?", (self.table,)
+            ).fetchone()
+            entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'entries': entries,
+            'maxEntries': self.max_entries
+        }
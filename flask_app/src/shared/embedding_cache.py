@@ -0,0 +1,68 @@
+import hashlib
+import logging
+from array import array
+from typing import List
+
+from flask import current_app
+from langchain_core.embeddings import Embeddings
+
+from flask_app.src.shared.disk_cache import SqliteLRUCache
+
+_embedding_cache: SqliteLRUCache | None = None
+
+
+def get_embedding_cache() -> SqliteLRUCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = SqliteLRUCache(
+            path=current_app.config['EMBEDDING_CACHE_PATH'],
+            max_entries=int(current_app.config['EMBEDDING_CACHE_MAX_ENTRIES']),
+            table='embeddings'
+        )
+    return _embedding_cache
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return f"{model}:{digest}"
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings client so identical text, normalized for whitespace,
+    is only ever sent to the embedding API once per model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: SqliteLRUCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = {
+                key: array('f', vector).tobytes()
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            self.cache.set_many(computed)
+            cached.update(computed)
+
+        logging.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+
+        return [array('f', cached[key]).tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import zlib
+from typing import List
+
+from flask import current_app
+from langchain.docstore.document import Document
+from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+
+from flask_app.src.shared.disk_cache import SqliteLRUCache
+from flask_app.src.shared.embedding_cache import normalize_text
+
+_extraction_cache: SqliteLRUCache | None = None
+
+
+def get_extraction_cache() -> SqliteLRUCache:
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = SqliteLRUCache(
+            path=current_app.config['EXTRACTION_CACHE_PATH'],
+            max_entries=int(current_app.config['EXTRACTION_CACHE_MAX_ENTRIES']),
+            table='graph_documents'
+        )
+    return _extraction_cache
+
+
+def extraction_cache_key(
+    model: str,
+    allowed_nodes: List[str],
+    allowed_relationships: List[str],
+    node_properties: List[str],
+    text: str
+) -> str:
+    schema = json.dumps([model, sorted(allowed_nodes), sorted(allowed_relationships), sorted(node_properties)])
+    digest = hashlib.sha256(f"{schema}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+    return f"{model}:{digest}"
+
+
+def serialize_graph_document(graph_document: GraphDocument) -> bytes:
+    """
+    Nodes are stored once as [id, type, properties] and relationships refer to
+    them by position, then the whole payload is zlib compressed.
+    """
+    nodes = []
+    node_index = {}
+
+    def index_of(node: Node) -> int:
+        key = (node.id, node.type)
+        if key not in node_index:
+            node_index[key] = len(nodes)
+            nodes.append([node.id, node.type, node.properties or {}])
+        return node_index[key]
+
+    for node in graph_document.nodes:
+        index_of(node)
+
+    # Only nodes returned by the LLM are part of graph_document.nodes, counted
+    # after de-duplication so endpoint-only nodes never come back as nodes
+    node_count = len(nodes)
+
+    relationships = [
+        [index_of(rel.source), index_of(rel.target), rel.type, rel.properties or {}]
+        for rel in graph_document.relationships
+    ]
+
+    payload = {'n': nodes, 'c': node_count, 'r': relationships}
+
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+def deserialize_graph_document(data: bytes, source: Document) -> GraphDocument:
+    payload = json.loads(zlib.decompress(data))
+
+    nodes = [Node(id=id, type=type, properties=properties) for id, type, properties in payload['n']]
+
+    relationships = [
+        Relationship(source=nodes[source_i], target=nodes[target_i], type=type, properties=properties)
+        for source_i, target_i, type, properties in payload['r']
+    ]
+
+    return GraphDocument(nodes=nodes[:payload['c']], relationships=relationships, source=source)
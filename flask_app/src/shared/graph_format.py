@@ -0,0 +1,70 @@
+from typing import Any, Dict, List
+
+import orjson
+
+COMPACT_GRAPH_MIMETYPE = 'application/vnd.notello.graph.columnar+json'
+COMPACT_GRAPH_FORMAT = 'columnar-v1'
+
+# Per node type, the columns after id, and which of them go through the string table
+NODE_COLUMNS = {
+    'documents': (['fileName', 'communityId'], {'communityId'}),
+    'chunks': (['position', 'communityId'], {'communityId'}),
+    'concepts': (['conceptId', 'description', 'communityId'], {'communityId'}),
+}
+
+
+class StringTable:
+    """
+    Interns repeated values so each one is sent once and referenced by index.
+    None is encoded as -1.
+    """
+
+    def __init__(self):
+        self.strings: List[Any] = []
+        self._index: Dict[Any, int] = {}
+
+    def intern(self, value: Any) -> int:
+        if value is None:
+            return -1
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def to_columnar(nodes: Dict[str, List[Dict]], relationships: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turns the get-graph-for response into parallel arrays per node type and
+    for relationships. Node labels are implied by the group, relationship
+    types and community ids are indices into the shared strings table.
+    """
+    table = StringTable()
+    payload: Dict[str, Any] = {'format': COMPACT_GRAPH_FORMAT}
+
+    for node_type, (columns, interned) in NODE_COLUMNS.items():
+        group = nodes.get(node_type, [])
+        out = {'id': [node['id'] for node in group]}
+        for column in columns:
+            if column in interned:
+                out[column] = [table.intern(node.get(column)) for node in group]
+            else:
+                out[column] = [node.get(column) for node in group]
+        payload[node_type] = out
+
+    payload['relationships'] = {
+        'start': [rel['start_node_id'] for rel in relationships],
+        'type': [table.intern(rel['relationship_type']) for rel in relationships],
+        'end': [rel['end_node_id'] for rel in relationships],
+    }
+    payload['strings'] = table.strings
+
+    return payload
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload)
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data)
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import threading
+import uuid
+
+
+class GraphVersionStore:
+    """
+    Monotonic version counter per graph scope (e.g. "courseId:<id>"), kept in
+    a local SQLite file so a bump in one worker is seen by all of them.
+
+    Counters restart at 0 when the file is lost, so the file also keeps a
+    random epoch created with the table. Anything derived from a version
+    (ETags) must include the epoch to stay unique across such resets.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._epoch = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS graph_versions (
+                    scope TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS graph_version_epoch (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    epoch TEXT NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO graph_version_epoch (id, epoch) VALUES (0, ?)",
+                (uuid.uuid4().hex[:12],)
+            )
+            conn.commit()
+
+            self._epoch = conn.execute("SELECT epoch FROM graph_version_epoch WHERE id = 0").fetchone()[0]
+            self._conn = conn
+            self._pid = os.getpid()
+
+        return self._conn
+
+    def epoch(self) -> str:
+        with self._lock:
+            self._connection()
+            return self._epoch
+
+    def get(self, scope: str) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT version FROM graph_versions WHERE scope = ?", (scope,)
+            ).fetchone()
+
+        return row[0] if row is not None else 0
+
+    def bump(self, *scopes: str) -> None:
+        # Errors propagate: a write whose bump failed must not leave stale cached graphs behind
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                """
+                INSERT INTO graph_versions (scope, version) VALUES (?, 1)
+                ON CONFLICT(scope) DO UPDATE SET version = version + 1
+                """,
+                [(scope,) for scope in scopes]
+            )
+            conn.commit()
@@ -0,0 +1,28 @@
+import json
+import zlib
+from typing import Any, Dict
+
+from flask import current_app
+
+from flask_app.src.shared.disk_cache import SqliteLRUCache
+
+_youtube_cache: SqliteLRUCache | None = None
+
+
+def get_youtube_cache() -> SqliteLRUCache:
+    global _youtube_cache
+    if _youtube_cache is None:
+        _youtube_cache = SqliteLRUCache(
+            path=current_app.config['YOUTUBE_CACHE_PATH'],
+            max_entries=int(current_app.config['YOUTUBE_CACHE_MAX_ENTRIES']),
+            table='youtube_sources'
+        )
+    return _youtube_cache
+
+
+def serialize_youtube_source(source: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(source, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def deserialize_youtube_source(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
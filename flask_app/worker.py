@@ -0,0 +1,33 @@
+import logging
+import signal
+import sys
+
+from . import create_app
+
+# Runs the job worker pool in its own process: python -m flask_app.worker
+# gunicorn_config.on_starting starts one next to the request workers
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(message)s', level='INFO')
+
+    app = create_app()
+
+    # The services read current_app when imported
+    with app.app_context():
+        from .services.JobService import JobService
+        from .services.SupabaseService import SupabaseService
+
+    def on_sigterm(signum, frame):
+        # atexit does not run on SIGTERM, write pending note statuses before exiting.
+        # Jobs still running are claimed again once their leases run out.
+        logging.info("Job worker stopping, flushing note updates")
+        SupabaseService.flush_note_updates()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+    pool = JobService.start_workers(app)
+
+    if pool is None:
+        logging.error("JOB_WORKER_THREADS is 0, no job workers to run")
+    else:
+        pool.join()
@@ -1,3 +1,61 @@
+import subprocess
+import sys
+import threading
+
 bind = "0.0.0.0:8000"
 workers = 4
-timeout = 600
\ No newline at end of file
+timeout = 600
+
+JOB_WORKER_RESTART_SECONDS = 5
+JOB_WORKER_STOP_SECONDS = 30
+
+_job_worker = None
+_job_worker_lock = threading.Lock()
+_stopping = threading.Event()
+
+
+def _supervise_job_worker(server):
+    global _job_worker
+
+    # Restarts the job worker process whenever it dies, until gunicorn exits
+    while True:
+        with _job_worker_lock:
+            if _stopping.is_set():
+                return
+            _job_worker = subprocess.Popen([sys.executable, '-m', 'flask_app.worker'])
+            server.log.info(f"Started job worker process {_job_worker.pid}")
+
+        code = _job_worker.wait()
+
+        if _stopping.is_set():
+            return
+
+        server.log.error(f"Job worker process exited with {code}, restarting in {JOB_WORKER_RESTART_SECONDS}s")
+        _stopping.wait(JOB_WORKER_RESTART_SECONDS)
+
+
+def on_starting(server):
+    # Schema migrations run once, in their own process, so neither the DDL nor
+    # a Neo4j connection is shared with the app workers forked afterwards
+    subprocess.run([sys.executable, '-m', 'flask_app.migrate'], check=True)
+
+    # Ingestion runs in a separate, supervised job worker process, not in the request workers
+    threading.Thread(target=_supervise_job_worker, args=(server,), daemon=True).start()
+
+
+def on_exit(server):
+    with _job_worker_lock:
+        _stopping.set()
+        job_worker = _job_worker
+
+    if job_worker is None or job_worker.poll() is not None:
+        return
+
+    # SIGTERM lets the worker flush pending note updates, running jobs are retried after their leases expire
+    job_worker.terminate()
+    try:
+        job_worker.wait(timeout=JOB_WORKER_STOP_SECONDS)
+    except subprocess.TimeoutExpired:
+        server.log.warning(f"Job worker process {job_worker.pid} did not stop, killing it")
+        job_worker.kill()
+        job_worker.wait()
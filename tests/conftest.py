@@ -0,0 +1,9 @@
+import sys
+import types
+from pathlib import Path
+
+# Importing the flask_app package runs create_app's imports, which connect to
+# Supabase and Neo4j. Tests import its modules through a bare package instead.
+_package = types.ModuleType('flask_app')
+_package.__path__ = [str(Path(__file__).resolve().parent.parent / 'flask_app')]
+sys.modules.setdefault('flask_app', _package)
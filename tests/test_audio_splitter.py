@@ -0,0 +1,54 @@
+import numpy as np
+
+from flask_app.src.audio_splitter import SAMPLE_RATE, find_cut_points, stitch_parts
+
+
+def test_cuts_land_in_the_quietest_frame_near_each_target():
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-8000, 8000, size=SAMPLE_RATE * 30).astype(np.int16)
+    # Pauses a little off the 10s and 20s targets, within the search window
+    for pause in (9.0, 21.0):
+        samples[int(pause * SAMPLE_RATE):int((pause + 0.3) * SAMPLE_RATE)] = 0
+
+    cuts = find_cut_points(samples, target_seconds=10, search_seconds=2)
+
+    assert len(cuts) == 2
+    assert 9.0 <= cuts[0] < 9.3
+    assert 21.0 <= cuts[1] < 21.3
+
+
+def test_short_audio_has_no_cuts():
+    samples = np.ones(SAMPLE_RATE * 12, dtype=np.int16)
+
+    assert find_cut_points(samples, target_seconds=10, search_seconds=2) == []
+
+
+def test_overlap_is_kept_once_by_the_part_owning_each_segment_midpoint():
+    parts = [
+        {
+            'index': 1, 'start': 9.5, 'end': 20.0, 'ownStart': 10.0, 'ownEnd': 20.0, 'last': True,
+            'segments': [
+                # Times are relative to the part's start
+                {'text': 'overlap one', 'start': 0.1, 'end': 0.7},
+                {'text': 'overlap two', 'start': 0.6, 'end': 0.9},
+                {'text': 'tail', 'start': 9.8, 'end': 10.5},
+            ],
+        },
+        {
+            'index': 0, 'start': 0.0, 'end': 10.5, 'ownStart': 0.0, 'ownEnd': 10.0, 'last': False,
+            'segments': [
+                {'text': 'head', 'start': 0.0, 'end': 1.0},
+                {'text': 'overlap one', 'start': 9.6, 'end': 10.2},
+                {'text': 'overlap two', 'start': 10.1, 'end': 10.4},
+            ],
+        },
+    ]
+
+    stitched = stitch_parts(parts)
+
+    assert [(segment['text'], segment['start'], segment['end']) for segment in stitched] == [
+        ('head', 0.0, 1.0),
+        ('overlap one', 9.6, 10.2),
+        ('overlap two', 10.1, 10.4),
+        ('tail', 19.3, 20.0),
+    ]
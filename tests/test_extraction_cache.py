@@ -0,0 +1,54 @@
+from langchain.docstore.document import Document
+from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+
+from flask_app.src.shared.extraction_cache import deserialize_graph_document, serialize_graph_document
+
+
+def as_tuples(graph_document):
+    nodes = [(node.id, node.type) for node in graph_document.nodes]
+    relationships = [
+        (rel.source.id, rel.target.id, rel.type) for rel in graph_document.relationships
+    ]
+    return nodes, relationships
+
+
+def test_round_trip_keeps_nodes_and_relationships():
+    source = Document(page_content='Photosynthesis makes glucose.')
+    plant = Node(id='Photosynthesis', type='Process', properties={'description': 'Light to sugar'})
+    glucose = Node(id='Glucose', type='Molecule')
+    graph_document = GraphDocument(
+        nodes=[plant, glucose],
+        relationships=[Relationship(source=plant, target=glucose, type='PRODUCES')],
+        source=source
+    )
+
+    restored = deserialize_graph_document(serialize_graph_document(graph_document), source)
+
+    assert as_tuples(restored) == as_tuples(graph_document)
+    assert restored.nodes[0].properties == {'description': 'Light to sugar'}
+    assert restored.source == source
+
+
+def test_duplicate_nodes_do_not_pull_in_relationship_endpoints():
+    source = Document(page_content='Mitochondria produce ATP for the cell.')
+    mitochondria = Node(id='Mitochondria', type='Organelle')
+    atp = Node(id='ATP', type='Molecule')
+    cell = Node(id='Cell', type='Structure')
+    graph_document = GraphDocument(
+        # The model repeated a node; Cell only appears as a relationship endpoint
+        nodes=[mitochondria, atp, Node(id='Mitochondria', type='Organelle')],
+        relationships=[
+            Relationship(source=mitochondria, target=atp, type='PRODUCES'),
+            Relationship(source=mitochondria, target=cell, type='PART_OF'),
+        ],
+        source=source
+    )
+
+    restored = deserialize_graph_document(serialize_graph_document(graph_document), source)
+
+    nodes, relationships = as_tuples(restored)
+    assert nodes == [('Mitochondria', 'Organelle'), ('ATP', 'Molecule')]
+    assert relationships == [
+        ('Mitochondria', 'ATP', 'PRODUCES'),
+        ('Mitochondria', 'Cell', 'PART_OF'),
+    ]
@@ -0,0 +1,74 @@
+import time
+
+from flask_app.src import fake_runpod
+
+SEGMENTS = [
+    {'text': 'First segment.', 'start': 0.0, 'end': 1.0},
+    {'text': 'Second segment.', 'start': 1.0, 'end': 2.0},
+]
+
+
+def poll_until_final(endpoint, job_id, timeout=5.0):
+    statuses = []
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        # The same request RunpodService.get_status sends
+        response = endpoint.rp_client.get(f"{endpoint.endpoint_id}/status/{job_id}")
+        if not statuses or statuses[-1] != response['status']:
+            statuses.append(response['status'])
+        if response['status'] in ('COMPLETED', 'FAILED'):
+            return statuses, response
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish, statuses: {statuses}")
+
+
+def test_job_submitted_in_one_worker_completes_when_polled_from_another(tmp_path):
+    path = str(tmp_path / 'fake_runpod.sqlite3')
+    web_worker = fake_runpod.FakeRunpodEndpoint(path, delay=0.3, segments=SEGMENTS)
+    job_worker = fake_runpod.FakeRunpodEndpoint(path, delay=0.3, segments=SEGMENTS)
+
+    job = web_worker.run({'input': {'id': 'note-1'}, 'webhook': None})
+
+    statuses, response = poll_until_final(job_worker, job.job_id)
+
+    assert statuses == ['IN_QUEUE', 'IN_PROGRESS', 'COMPLETED']
+    assert response['output'] == {'data': SEGMENTS}
+    assert job_worker.job_input(job.job_id) == {'input': {'id': 'note-1'}, 'webhook': None}
+
+
+def test_failing_endpoint_reports_failed(tmp_path):
+    endpoint = fake_runpod.FakeRunpodEndpoint(str(tmp_path / 'fake_runpod.sqlite3'), delay=0.1, fail=True)
+
+    job = endpoint.run({'input': {'id': 'note-2'}})
+
+    statuses, response = poll_until_final(endpoint, job.job_id)
+
+    assert statuses[-1] == 'FAILED'
+    assert response['error'] == 'Fake failure'
+
+
+def test_unknown_job_is_failed(tmp_path):
+    endpoint = fake_runpod.FakeRunpodEndpoint(str(tmp_path / 'fake_runpod.sqlite3'))
+
+    assert endpoint.rp_client.get(f"{endpoint.endpoint_id}/status/missing")['status'] == 'FAILED'
+
+
+def test_stream_hands_out_each_segment_once_across_workers(tmp_path):
+    path = str(tmp_path / 'fake_runpod.sqlite3')
+    first = fake_runpod.FakeRunpodEndpoint(path, delay=0.3, segments=SEGMENTS)
+    second = fake_runpod.FakeRunpodEndpoint(path, delay=0.3, segments=SEGMENTS)
+
+    job = first.run({'input': {'id': 'note-3'}})
+
+    streamed = []
+    deadline = time.time() + 5
+    status = None
+    while status != 'COMPLETED' and time.time() < deadline:
+        for endpoint in (first, second):
+            response = endpoint.rp_client.get(f"{endpoint.endpoint_id}/stream/{job.job_id}")
+            streamed += [item['output'] for item in response['stream']]
+            status = response['status']
+        time.sleep(0.02)
+
+    assert status == 'COMPLETED'
+    assert streamed == SEGMENTS
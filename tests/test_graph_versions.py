@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from flask_app.src.shared.graph_versions import GraphVersionStore
+
+
+def test_versions_start_at_zero_and_bump_per_scope(tmp_path):
+    store = GraphVersionStore(str(tmp_path / 'graph_cache.sqlite3'))
+
+    assert store.get('noteId:a') == 0
+
+    store.bump('noteId:a', 'courseId:c')
+    store.bump('noteId:a')
+
+    assert store.get('noteId:a') == 2
+    assert store.get('courseId:c') == 1
+    assert store.get('userId:u') == 0
+
+
+def test_bumps_and_epoch_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / 'graph_cache.sqlite3')
+    web_worker = GraphVersionStore(path)
+    job_worker = GraphVersionStore(path)
+
+    job_worker.bump('courseId:c')
+
+    assert web_worker.get('courseId:c') == 1
+    assert web_worker.epoch() == job_worker.epoch()
+
+
+def test_epoch_changes_when_the_file_is_recreated(tmp_path):
+    path = tmp_path / 'graph_cache.sqlite3'
+    before = GraphVersionStore(str(path))
+    before.bump('noteId:a')
+    epoch = before.epoch()
+    before._connection().close()
+
+    for file in tmp_path.iterdir():
+        file.unlink()
+
+    after = GraphVersionStore(str(path))
+
+    # Versions restart, so anything derived from them needs the new epoch
+    assert after.get('noteId:a') == 0
+    assert after.epoch() != epoch
+
+
+def test_bump_failures_propagate(tmp_path):
+    store = GraphVersionStore(str(tmp_path / 'graph_cache.sqlite3'))
+    store._connection().execute("DROP TABLE graph_versions")
+
+    with pytest.raises(sqlite3.Error):
+        store.bump('noteId:a')
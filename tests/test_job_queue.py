@@ -0,0 +1,97 @@
+import time
+
+from flask_app.src.job_queue import SqliteJobQueue
+
+
+def make_queue(tmp_path):
+    return SqliteJobQueue(str(tmp_path / 'jobs.sqlite3'))
+
+
+def test_expired_lease_is_claimed_again_and_the_old_worker_loses_the_job(tmp_path):
+    queue = make_queue(tmp_path)
+    jobId = queue.enqueue(job_type='text', args=('note-1',), priority=1)
+
+    assert queue.claim('worker-a', lease_seconds=0.05) == (jobId, 'text', ('note-1',))
+    assert queue.claim('worker-b', lease_seconds=60) is None
+
+    time.sleep(0.1)
+
+    assert queue.claim('worker-b', lease_seconds=60) == (jobId, 'text', ('note-1',))
+
+    # The first run finishing late must not overwrite the second run
+    assert queue.complete(jobId, 'worker-a') is False
+    assert queue.fail(jobId, 'worker-a', error='late', retry_delay=0) is False
+    assert queue.get(jobId)['status'] == 'running'
+
+    assert queue.complete(jobId, 'worker-b') is True
+    job = queue.get(jobId)
+    assert job['status'] == 'complete'
+    assert job['attempts'] == 2
+
+
+def test_failed_job_is_retried_until_max_attempts(tmp_path):
+    queue = make_queue(tmp_path)
+    jobId = queue.enqueue(job_type='youtube', args=(), priority=2, max_attempts=2)
+
+    assert queue.claim('worker', lease_seconds=60)[0] == jobId
+    assert queue.fail(jobId, 'worker', error='first', retry_delay=0) is True
+    assert queue.get(jobId)['status'] == 'queued'
+
+    assert queue.claim('worker', lease_seconds=60)[0] == jobId
+    assert queue.fail(jobId, 'worker', error='second', retry_delay=0) is True
+
+    job = queue.get(jobId)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 2
+    assert job['error'] == 'second'
+    assert queue.claim('worker', lease_seconds=60) is None
+
+
+def test_retry_waits_for_retry_delay(tmp_path):
+    queue = make_queue(tmp_path)
+    jobId = queue.enqueue(job_type='text', args=(), priority=1)
+
+    queue.claim('worker', lease_seconds=60)
+    queue.fail(jobId, 'worker', error='boom', retry_delay=60)
+
+    assert queue.claim('worker', lease_seconds=60) is None
+
+
+def test_lease_expiring_on_the_final_attempt_fails_the_job(tmp_path):
+    queue = make_queue(tmp_path)
+    jobId = queue.enqueue(job_type='audio', args=(), priority=3, max_attempts=1)
+
+    queue.claim('worker-a', lease_seconds=0.05)
+    time.sleep(0.1)
+
+    assert queue.claim('worker-b', lease_seconds=60) is None
+    job = queue.get(jobId)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Lease expired on final attempt'
+
+
+def test_dedupe_key_coalesces_queued_jobs_only(tmp_path):
+    queue = make_queue(tmp_path)
+
+    first = queue.enqueue(job_type='community', args=('course-1',), priority=1, dedupe_key='course-1')
+    second = queue.enqueue(job_type='community', args=('course-1',), priority=1, dedupe_key='course-1')
+    other = queue.enqueue(job_type='community', args=('course-2',), priority=1, dedupe_key='course-2')
+
+    assert second == first
+    assert other != first
+
+    # Once the job is running, a new request needs a new run
+    claimed = [queue.claim('worker', lease_seconds=60)[0] for _ in range(2)]
+    assert sorted(claimed) == sorted([first, other])
+
+    third = queue.enqueue(job_type='community', args=('course-1',), priority=1, dedupe_key='course-1')
+    assert third != first
+
+
+def test_lower_priority_runs_first(tmp_path):
+    queue = make_queue(tmp_path)
+    audio = queue.enqueue(job_type='audio', args=(), priority=3)
+    quiz = queue.enqueue(job_type='quiz', args=(), priority=0)
+
+    assert queue.claim('worker', lease_seconds=60)[0] == quiz
+    assert queue.claim('worker', lease_seconds=60)[0] == audio
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from flask_app.src.llm_scheduler import (
+    RATE_LIMIT_PAUSE_SECONDS,
+    FileRateLimiter,
+    LLMScheduler,
+    LocalRateLimiter,
+)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('Condition not met in time')
+        time.sleep(0.005)
+
+
+def make_scheduler(rate_limiter=None, max_concurrency=1):
+    return LLMScheduler(
+        rate_limiter=rate_limiter or LocalRateLimiter(requests_per_minute=100000, tokens_per_minute=10000000),
+        max_concurrency=max_concurrency,
+        min_concurrency=1,
+        target_latency=30
+    )
+
+
+def test_slots_are_granted_round_robin_across_keys():
+    scheduler = make_scheduler()
+    granted = []
+
+    scheduler.acquire('busy', tokens=1)
+
+    def call(key):
+        scheduler.acquire(key, tokens=1)
+        granted.append(key)
+        scheduler.release(latency=0, rate_limited=False)
+
+    threads = []
+    # A large note queues three calls before a small note queues one
+    for key in ['large', 'large', 'large', 'small']:
+        thread = threading.Thread(target=call, args=(key,))
+        thread.start()
+        threads.append(thread)
+        waiting = len(threads)
+        wait_until(lambda: sum(len(queue) for queue in scheduler._waiting.values()) == waiting)
+
+    scheduler.release(latency=0, rate_limited=False)
+
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert granted == ['large', 'small', 'large', 'large']
+
+
+def test_rate_limit_empties_and_pauses_the_budget():
+    limiter = LocalRateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+
+    assert limiter.try_consume(100) == 0
+
+    limiter.rate_limited()
+
+    wait = limiter.try_consume(100)
+    assert RATE_LIMIT_PAUSE_SECONDS - 1 < wait <= RATE_LIMIT_PAUSE_SECONDS
+
+
+def test_rate_limit_pause_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / 'llm_rate_limit.json')
+    first = FileRateLimiter(requests_per_minute=600, tokens_per_minute=100000, path=path)
+    second = FileRateLimiter(requests_per_minute=600, tokens_per_minute=100000, path=path)
+
+    assert second.try_consume(100) == 0
+
+    first.rate_limited()
+
+    assert second.try_consume(100) > RATE_LIMIT_PAUSE_SECONDS - 1
+
+
+def test_release_after_rate_limit_halves_concurrency_and_pauses_the_limiter():
+    limiter = LocalRateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+    scheduler = make_scheduler(rate_limiter=limiter, max_concurrency=8)
+
+    scheduler.acquire('note-1', tokens=100)
+    scheduler.release(latency=1, rate_limited=True)
+
+    assert scheduler.limit == 4
+    assert scheduler.in_flight == 0
+    assert limiter.try_consume(100) > 0